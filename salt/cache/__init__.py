@@ -8,7 +8,11 @@ Loader mechanism for caching data, with data expiration, etc.
 # Import Python libs
 from __future__ import absolute_import, print_function, unicode_literals
 import logging
+import mmap
+import os
+import struct
 import time
+import zlib
 
 # Import Salt libs
 import salt.config
@@ -17,9 +21,15 @@ from salt.payload import Serial
 from salt.utils.odict import OrderedDict
 import salt.loader
 import salt.syspaths
+import salt.utils.files
+import salt.utils.stringutils
 
 log = logging.getLogger(__name__)
 
+# The number of banks read at once by the callers of fetch_many going through
+# the data of every minion, to not hold all of it in memory at once
+FETCH_MANY_CHUNK_SIZE = 500
+
 
 def factory(opts, **kwargs):
     '''
@@ -155,6 +165,34 @@ class Cache(object):
         fun = '{0}.store'.format(self.driver)
         return self.modules[fun](bank, key, data, **self._kwargs)
 
+    def store_many(self, bank_data, key):
+        '''
+        Store data under the same key in several banks at once, using the
+        ``store_many`` function of the module when it has one, or a ``store``
+        per bank otherwise
+
+        :param bank_data:
+            A dict of the data to store, by the name of the bank which will
+            hold the key.
+
+        :param key:
+            The name of the key (or file inside a directory) which will hold
+            the data in every bank. File extensions should not be provided, as
+            they will be added by the driver itself.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        '''
+        if not bank_data:
+            return
+        fun = '{0}.store_many'.format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](bank_data, key, **self._kwargs)
+        fun = '{0}.store'.format(self.driver)
+        for bank, data in six.iteritems(bank_data):
+            self.modules[fun](bank, key, data, **self._kwargs)
+
     def fetch(self, bank, key):
         '''
         Fetch data using the specified module
@@ -179,6 +217,40 @@ class Cache(object):
         fun = '{0}.fetch'.format(self.driver)
         return self.modules[fun](bank, key, **self._kwargs)
 
+    def fetch_many(self, banks, key):
+        '''
+        Fetch the same key from several banks at once, e.g. the ``data`` key of
+        the ``minions/<minion id>`` banks of many minions, using the
+        ``fetch_many`` function of the module when it has one, or a ``fetch``
+        per bank otherwise
+
+        :param banks:
+            An iterable of the names of the locations inside the cache which
+            hold the key.
+
+        :param key:
+            The name of the key (or file inside a directory) which holds the
+            data in every bank. File extensions should not be provided, as
+            they will be added by the driver itself.
+
+        :return:
+            Return a dict of the python objects fetched from the cache by bank
+            name, with an empty dict for the banks the key was not found in.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        '''
+        banks = list(banks)
+        if not banks:
+            return {}
+        fun = '{0}.fetch_many'.format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](banks, key, **self._kwargs)
+        fun = '{0}.fetch'.format(self.driver)
+        return dict((bank, self.modules[fun](bank, key, **self._kwargs))
+                    for bank in banks)
+
     def updated(self, bank, key):
         '''
         Get the last updated epoch for the specified key
@@ -269,13 +341,93 @@ class Cache(object):
         return self.modules[fun](bank, key, **self._kwargs)
 
 
+class _Generations(object):
+    '''
+    Generations of the cache keys, shared through a memory mapped file by the
+    processes using the same cache directory.
+
+    Storing or flushing a key changes the generation of its slot, and flushing
+    a bank the generation of all the keys, so that the other processes drop
+    the copy of the key they keep in memory.
+    '''
+    SLOTS = 16384
+    _ITEM = struct.Struct(str('=Q'))
+
+    def __init__(self, path):
+        size = (self.SLOTS + 1) * self._ITEM.size
+        with salt.utils.files.fopen(path, 'a+b') as fp_:
+            fp_.seek(0, os.SEEK_END)
+            if fp_.tell() < size:
+                fp_.truncate(size)
+            self.map = mmap.mmap(fp_.fileno(), size)
+
+    def _slot(self, bank, key):
+        name = salt.utils.stringutils.to_bytes('{0}/{1}'.format(bank, key))
+        return (zlib.crc32(name) & 0xffffffff) % self.SLOTS + 1
+
+    def get(self, bank, key):
+        '''
+        Return the generation of a key
+        '''
+        return (self._ITEM.unpack_from(self.map, self._slot(bank, key) * self._ITEM.size)[0],
+                self._ITEM.unpack_from(self.map, 0)[0])
+
+    def bump(self, bank, key=None):
+        '''
+        Change the generation of a key, or of all the keys when key is None
+        '''
+        slot = 0 if key is None else self._slot(bank, key)
+        # A random generation tells the change apart even when two processes
+        # change the same slot at once
+        self.map[slot * self._ITEM.size:(slot + 1) * self._ITEM.size] = os.urandom(self._ITEM.size)
+
+
+# The generations of the cache keys, by cache directory
+_GENERATIONS = {}
+
+
+def _get_generations(cachedir):
+    '''
+    Return the generations of the cache keys of cachedir, or None when the
+    generations file cannot be used
+    '''
+    if cachedir not in _GENERATIONS:
+        path = os.path.join(cachedir, '.memcache_generations')
+        try:
+            _GENERATIONS[cachedir] = _Generations(path)
+        except (IOError, OSError, ValueError) as exc:
+            log.warning(
+                'Unable to share the memcache invalidations through %s, the '
+                'memcache entries only expire: %s', path, exc
+            )
+            _GENERATIONS[cachedir] = None
+    return _GENERATIONS[cachedir]
+
+
+def get_generations(opts):
+    '''
+    Return the generations of the cache keys shared by the processes of the
+    master, or None when ``memcache_invalidation`` is disabled or the
+    generations file cannot be used
+    '''
+    if not opts.get('memcache_invalidation', False):
+        return None
+    return _get_generations(opts.get('cachedir', salt.syspaths.CACHE_DIR))
+
+
 class MemCache(Cache):
     '''
     Short-lived in-memory cache store keeping values on time and/or size (count)
     basis.
+
+    The least recently used values are dropped first when the storage is full.
+    With ``memcache_invalidation`` the values stored or flushed by the other
+    processes of the master are dropped before their expiration.
     '''
-    # {<storage_id>: odict({<key>: [atime, data], ...}), ...}
+    # {<storage_id>: odict({<key>: [atime, data(, generation)], ...}), ...}
     data = {}
+    # {<top level bank>: {'hits': int, 'misses': int, 'invalidated': int}}
+    stats = {}
 
     def __init__(self, opts, **kwargs):
         super(MemCache, self).__init__(opts, **kwargs)
@@ -287,6 +439,10 @@ class MemCache(Cache):
             self.call = 0
             self.hit = 0
         self._storage = None
+        if opts.get('memcache_invalidation', False):
+            self.generations = _get_generations(self.cachedir)
+        else:
+            self.generations = None
 
     @classmethod
     def __cleanup(cls, expire):
@@ -298,6 +454,26 @@ class MemCache(Cache):
                 else:
                     break
 
+    @classmethod
+    def pop_stats(cls):
+        '''
+        Return the hits, misses and invalidated values of the memcache since
+        the last call, with the hit rate, by top level bank
+        '''
+        ret = {}
+        for bank, stats in six.iteritems(cls.stats):
+            calls = stats['hits'] + stats['misses']
+            ret[bank] = dict(stats, rate=float(stats['hits']) / calls if calls else 0.0)
+        cls.stats = {}
+        return ret
+
+    def _count(self, bank, stat):
+        bank_stats = MemCache.stats.get(bank.split('/', 1)[0])
+        if bank_stats is None:
+            bank_stats = MemCache.stats[bank.split('/', 1)[0]] = {
+                'hits': 0, 'misses': 0, 'invalidated': 0}
+        bank_stats[stat] += 1
+
     def _get_storage_id(self):
         fun = '{0}.storage_id'.format(self.driver)
         if fun in self.modules:
@@ -314,44 +490,114 @@ class MemCache(Cache):
             self._storage = MemCache.data[storage_id]
         return self._storage
 
-    def fetch(self, bank, key):
+    def _add(self, bank, key, record):
+        if len(self.storage) >= self.max:
+            if self.cleanup:
+                MemCache.__cleanup(self.expire)
+            if len(self.storage) >= self.max:
+                self.storage.popitem(last=False)
+        self.storage[(bank, key)] = record
+
+    def _new_record(self, now, bank, key, data):
+        if self.generations is None:
+            return [now, data]
+        return [now, data, self.generations.get(bank, key)]
+
+    def _get_record(self, now, bank, key):
+        '''
+        Return the record of the key when it is still valid, moving it to the
+        end of the storage
+        '''
         if self.debug:
             self.call += 1
-        now = time.time()
         record = self.storage.pop((bank, key), None)
+        if record is None or record[0] + self.expire < now:
+            self._count(bank, 'misses')
+            return None
+        if self.generations is not None and record[2] != self.generations.get(bank, key):
+            # Another process stored or flushed the key
+            self._count(bank, 'invalidated')
+            self._count(bank, 'misses')
+            return None
+        self._count(bank, 'hits')
+        if self.debug:
+            self.hit += 1
+        # update atime
+        record[0] = now
+        self.storage[(bank, key)] = record
+        return record
+
+    def fetch(self, bank, key):
+        now = time.time()
+        record = self._get_record(now, bank, key)
         # Have a cached value for the key
-        if record is not None and record[0] + self.expire >= now:
+        if record is not None:
             if self.debug:
-                self.hit += 1
                 log.debug(
                     'MemCache stats (call/hit/rate): %s/%s/%s',
                     self.call, self.hit, float(self.hit) / self.call
                 )
-            # update atime and return
-            record[0] = now
-            self.storage[(bank, key)] = record
             return record[1]
 
-        # Have no value for the key or value is expired
-        data = super(MemCache, self).fetch(bank, key)
-        if len(self.storage) >= self.max:
-            if self.cleanup:
-                MemCache.__cleanup(self.expire)
-            if len(self.storage) >= self.max:
-                self.storage.popitem(last=False)
-        self.storage[(bank, key)] = [now, data]
-        return data
+        # Have no value for the key or value is expired. The generation is
+        # read first, so that a change made meanwhile invalidates the value.
+        record = self._new_record(now, bank, key, None)
+        record[1] = super(MemCache, self).fetch(bank, key)
+        self._add(bank, key, record)
+        return record[1]
+
+    def fetch_many(self, banks, key):
+        now = time.time()
+        ret = {}
+        missing = {}
+        for bank in banks:
+            record = self._get_record(now, bank, key)
+            if record is not None:
+                ret[bank] = record[1]
+            else:
+                missing[bank] = self._new_record(now, bank, key, None)
+        if self.debug and self.call:
+            log.debug(
+                'MemCache stats (call/hit/rate): %s/%s/%s',
+                self.call, self.hit, float(self.hit) / self.call
+            )
+        for bank, data in six.iteritems(super(MemCache, self).fetch_many(list(missing), key)):
+            missing[bank][1] = data
+            self._add(bank, key, missing[bank])
+            ret[bank] = data
+        return ret
 
     def store(self, bank, key, data):
         self.storage.pop((bank, key), None)
         super(MemCache, self).store(bank, key, data)
-        if len(self.storage) >= self.max:
-            if self.cleanup:
-                MemCache.__cleanup(self.expire)
-            if len(self.storage) >= self.max:
-                self.storage.popitem(last=False)
-        self.storage[(bank, key)] = [time.time(), data]
+        if self.generations is not None:
+            # The value is read back by the next fetch, as another process
+            # may store the key right after this one
+            self.generations.bump(bank, key)
+            return
+        self._add(bank, key, [time.time(), data])
+
+    def store_many(self, bank_data, key):
+        for bank in bank_data:
+            self.storage.pop((bank, key), None)
+        super(MemCache, self).store_many(bank_data, key)
+        if self.generations is not None:
+            for bank in bank_data:
+                self.generations.bump(bank, key)
+            return
+        now = time.time()
+        for bank, data in six.iteritems(bank_data):
+            self._add(bank, key, [now, data])
 
     def flush(self, bank, key=None):
-        self.storage.pop((bank, key), None)
+        if key is None:
+            # Drop the keys of the bank and of its sub-banks
+            prefix = bank + '/'
+            for item in list(self.storage):
+                if item[0] == bank or item[0].startswith(prefix):
+                    del self.storage[item]
+        else:
+            self.storage.pop((bank, key), None)
         super(MemCache, self).flush(bank, key)
+        if self.generations is not None:
+            self.generations.bump(bank, key)
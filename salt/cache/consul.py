@@ -48,6 +48,7 @@ value to ``consul``:
 '''
 from __future__ import absolute_import, print_function, unicode_literals
 import logging
+import os.path
 try:
     import consul
     HAS_CONSUL = True
@@ -126,6 +127,35 @@ def fetch(bank, key):
         )
 
 
+def fetch_many(banks, key):
+    '''
+    Fetch the values of the same key in several banks.
+
+    The banks are read with a single recursive request on the bank they
+    share, e.g. ``minions`` for the ``minions/<minion id>`` banks, which also
+    returns the other keys of the banks but saves a request per bank.
+    '''
+    parent = os.path.commonprefix(banks)
+    parent = parent[:parent.rfind('/') + 1]
+    if len(banks) == 1 or not parent:
+        return dict((bank, fetch(bank, key)) for bank in banks)
+    c_keys = dict(('{0}/{1}'.format(bank, key), bank) for bank in banks)
+    try:
+        _, values = api.kv.get(parent, recurse=True)
+    except Exception as exc:
+        raise SaltCacheError(
+            'There was an error reading the keys under {0}: {1}'.format(
+                parent, exc
+            )
+        )
+    ret = dict((bank, {}) for bank in banks)
+    for value in values or []:
+        bank = c_keys.get(value['Key'])
+        if bank is not None and value['Value'] is not None:
+            ret[bank] = __context__['serial'].loads(value['Value'])
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content.
@@ -51,6 +51,7 @@ value to ``etcd``:
 from __future__ import absolute_import, print_function, unicode_literals
 import logging
 import base64
+import os.path
 try:
     import etcd
     HAS_ETCD = True
@@ -153,6 +154,36 @@ def fetch(bank, key):
         )
 
 
+def fetch_many(banks, key):
+    '''
+    Fetch the values of the same key in several banks, with a single recursive
+    read of the directory of the bank they share.
+    '''
+    parent = os.path.commonprefix(banks)
+    parent = parent[:parent.rfind('/') + 1].rstrip('/')
+    if len(banks) == 1 or not parent:
+        return dict((bank, fetch(bank, key)) for bank in banks)
+    _init_client()
+    etcd_keys = dict(('{0}/{1}/{2}'.format(path_prefix, bank, key), bank) for bank in banks)
+    ret = dict((bank, {}) for bank in banks)
+    etcd_dir = '{0}/{1}'.format(path_prefix, parent)
+    try:
+        leaves = client.read(etcd_dir, recursive=True).leaves
+        for leaf in leaves:
+            bank = etcd_keys.get(leaf.key)
+            if bank is not None:
+                ret[bank] = __context__['serial'].loads(base64.b64decode(leaf.value))
+    except etcd.EtcdKeyNotFound:
+        pass
+    except Exception as exc:
+        raise SaltCacheError(
+            'There was an error reading the keys under {0}: {1}'.format(
+                etcd_dir, exc
+            )
+        )
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content.
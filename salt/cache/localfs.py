@@ -100,6 +100,32 @@ def fetch(bank, key, cachedir):
         )
 
 
+def fetch_many(banks, key, cachedir):
+    '''
+    Fetch information from the files of the same key in several banks.
+
+    The files are opened right away instead of being looked up first, which
+    halves the filesystem calls made for the minions of a large master.
+    '''
+    ret = {}
+    load = __context__['serial'].load
+    for bank in banks:
+        key_file = os.path.join(cachedir, os.path.normpath(bank), '{0}.p'.format(key))
+        try:
+            with salt.utils.files.fopen(key_file, 'rb') as fh_:
+                ret[bank] = load(fh_)
+        except IOError as exc:
+            if exc.errno not in (errno.ENOENT, errno.ENOTDIR):
+                raise SaltCacheError(
+                    'There was an error reading the cache file "{0}": {1}'.format(
+                        key_file, exc
+                    )
+                )
+            # The bank may include the full filename, with the key inside it
+            ret[bank] = fetch(bank, key, cachedir)
+    return ret
+
+
 def updated(bank, key, cachedir):
     '''
     Return the epoch of the mtime for this cache file
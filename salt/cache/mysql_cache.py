@@ -66,10 +66,15 @@ except ImportError:
         MySQLdb = None
 
 from salt.exceptions import SaltCacheError
+from salt.ext import six
+from salt.ext.six.moves import range
 
 _DEFAULT_DATABASE_NAME = "salt_cache"
 _DEFAULT_CACHE_TABLE_NAME = "cache"
 _RECONNECT_INTERVAL_SEC = 0.050
+# The number of rows read or written by a single query of fetch_many and
+# store_many
+_MANY_CHUNK_SIZE = 500
 
 log = logging.getLogger(__name__)
 client = None
@@ -89,16 +94,16 @@ def __virtual__():
     return bool(MySQLdb), 'No python mysql client installed.' if MySQLdb is None else ''
 
 
-def run_query(conn, query, retries=3):
+def run_query(conn, query, retries=3, args=None):
     '''
-    Get a cursor and run a query. Reconnect up to `retries` times if
-    needed.
+    Get a cursor and run a query, with the `args` parameters when given.
+    Reconnect up to `retries` times if needed.
     Returns: cursor, affected rows counter
     Raises: SaltCacheError, AttributeError, OperationalError
     '''
     try:
         cur = conn.cursor()
-        out = cur.execute(query)
+        out = cur.execute(query, args)
         return cur, out
     except (AttributeError, OperationalError) as e:
         if retries == 0:
@@ -111,7 +116,7 @@ def run_query(conn, query, retries=3):
             log.info("mysql_cache: recreating db connection due to: %r", e)
         global client
         client = MySQLdb.connect(**_mysql_kwargs)
-        return run_query(client, query, retries - 1)
+        return run_query(client, query, retries - 1, args=args)
     except Exception as e:
         if len(query) > 150:
             query = query[:150] + "<...>"
@@ -211,6 +216,40 @@ def fetch(bank, key):
     return __context__['serial'].loads(r[0])
 
 
+def store_many(bank_data, key):
+    '''
+    Store the values of the same key in several banks, with a multi-row
+    REPLACE query per chunk of banks.
+    '''
+    _init_client()
+    rows = [(bank, key, __context__['serial'].dumps(data))
+            for bank, data in six.iteritems(bank_data)]
+    for idx in range(0, len(rows), _MANY_CHUNK_SIZE):
+        chunk = rows[idx:idx + _MANY_CHUNK_SIZE]
+        query = "REPLACE INTO {0} (bank, etcd_key, data) VALUES {1}".format(
+            _table_name, ', '.join(['(%s, %s, %s)'] * len(chunk)))
+        cur, _ = run_query(client, query, args=[value for row in chunk for value in row])
+        cur.close()
+
+
+def fetch_many(banks, key):
+    '''
+    Fetch the values of the same key in several banks, with an IN query per
+    chunk of banks.
+    '''
+    _init_client()
+    ret = dict((bank, {}) for bank in banks)
+    for idx in range(0, len(banks), _MANY_CHUNK_SIZE):
+        chunk = banks[idx:idx + _MANY_CHUNK_SIZE]
+        query = "SELECT bank, data FROM {0} WHERE etcd_key=%s AND bank IN ({1})".format(
+            _table_name, ', '.join(['%s'] * len(chunk)))
+        cur, _ = run_query(client, query, args=[key] + list(chunk))
+        for bank, data in cur.fetchall():
+            ret[bank] = __context__['serial'].loads(data)
+        cur.close()
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content.
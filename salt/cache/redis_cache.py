@@ -157,6 +157,7 @@ except ImportError:
     HAS_REDIS_CLUSTER = False
 
 # Import salt
+from salt.ext import six
 from salt.ext.six.moves import range
 from salt.exceptions import SaltCacheError
 
@@ -376,6 +377,53 @@ def fetch(bank, key):
     return __context__['serial'].loads(redis_value)
 
 
+def store_many(bank_data, key):
+    '''
+    Store the data of the same key in several banks, in a single pipelined
+    request.
+    '''
+    redis_server = _get_redis_server()
+    redis_pipe = redis_server.pipeline()
+    try:
+        for bank, data in six.iteritems(bank_data):
+            _build_bank_hier(bank, redis_pipe)
+            redis_pipe.set(_get_key_redis_key(bank, key), __context__['serial'].dumps(data))
+            redis_pipe.sadd(_get_bank_keys_redis_key(bank), key)
+        log.debug('Setting the value for %s under %d banks', key, len(bank_data))
+        redis_pipe.execute()
+    except (RedisConnectionError, RedisResponseError) as rerr:
+        mesg = 'Cannot set the Redis cache key {key} under {nbanks} banks: {rerr}'.format(
+            key=key,
+            nbanks=len(bank_data),
+            rerr=rerr)
+        log.error(mesg)
+        raise SaltCacheError(mesg)
+
+
+def fetch_many(banks, key):
+    '''
+    Fetch the data of the same key in several banks, with a single MGET.
+    '''
+    redis_server = _get_redis_server()
+    redis_keys = [_get_key_redis_key(bank, key) for bank in banks]
+    try:
+        redis_values = redis_server.mget(redis_keys)
+    except (RedisConnectionError, RedisResponseError) as rerr:
+        mesg = 'Cannot fetch the Redis cache key {key} under {nbanks} banks: {rerr}'.format(
+            key=key,
+            nbanks=len(redis_keys),
+            rerr=rerr)
+        log.error(mesg)
+        raise SaltCacheError(mesg)
+    ret = {}
+    for bank, redis_value in zip(banks, redis_values):
+        if redis_value is None:
+            ret[bank] = {}
+        else:
+            ret[bank] = __context__['serial'].loads(redis_value)
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content. If no key is specified, remove
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+'''
+Minion data cache plugin for an SQLite database file.
+
+.. versionadded:: Neon
+
+The keys of all the banks are kept in a single table of an SQLite database
+file, instead of a file per key as with the ``localfs`` cache. Listing the
+minions or reading their data does not need to open a file per minion, and
+the ``fetch_many`` and ``store_many`` functions read or write the keys of many
+banks in a single query or transaction.
+
+The database is used in WAL mode, so that the worker processes of the master
+read the cache while another one writes to it. SQLite is part of the Python
+standard library, no other service or package is needed.
+
+The database file is created in the ``cachedir`` of the master. The following
+values can be set in the master config, these are the defaults:
+
+.. code-block:: yaml
+
+    cache.sqlite.path: <cachedir>/cache.sqlite
+    cache.sqlite.timeout: 30
+
+``cache.sqlite.timeout`` is the number of seconds to wait for another process
+writing to the database before failing.
+
+To use SQLite as the minion data cache backend, set the master ``cache`` config
+value to ``sqlite``:
+
+.. code-block:: yaml
+
+    cache: sqlite
+'''
+from __future__ import absolute_import, print_function, unicode_literals
+import logging
+import os
+import threading
+import time
+
+try:
+    import sqlite3
+    HAS_SQLITE3 = True
+except ImportError:
+    HAS_SQLITE3 = False
+
+from salt.exceptions import SaltCacheError
+from salt.ext import six
+from salt.ext.six.moves import range
+import salt.syspaths
+
+log = logging.getLogger(__name__)
+
+# The number of banks read by a single query of fetch_many, below the default
+# limit of 999 parameters of SQLite
+_MANY_CHUNK_SIZE = 500
+
+# The connections to the databases by path, opened by the current thread
+_local = threading.local()
+
+# Module properties
+
+__virtualname__ = 'sqlite'
+__func_alias__ = {'list_': 'list'}
+
+
+def __virtual__():
+    '''
+    Confirm that the sqlite3 module of the standard library is available.
+    '''
+    if not HAS_SQLITE3:
+        return (False, 'The sqlite3 python module is not available')
+    return __virtualname__
+
+
+def __cachedir(kwargs=None):
+    if kwargs and 'cachedir' in kwargs:
+        return kwargs['cachedir']
+    return __opts__.get('cachedir', salt.syspaths.CACHE_DIR)
+
+
+def init_kwargs(kwargs):
+    return {'cachedir': __cachedir(kwargs)}
+
+
+def get_storage_id(kwargs):
+    return ('sqlite', __cachedir(kwargs))
+
+
+def _db_path(cachedir):
+    '''
+    Return the path of the database file
+    '''
+    return __opts__.get('cache.sqlite.path') or os.path.join(cachedir, 'cache.sqlite')
+
+
+def _get_conn(cachedir):
+    '''
+    Return the connection of the current thread to the database, created
+    along with the database and its table if needed. The connections are not
+    shared with the processes forked later on.
+    '''
+    path = _db_path(cachedir)
+    conns = getattr(_local, 'conns', None)
+    if conns is None or _local.pid != os.getpid():
+        conns = _local.conns = {}
+        _local.pid = os.getpid()
+    conn = conns.get(path)
+    if conn is not None:
+        return conn
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        # Autocommit, the transactions of store_many are explicit
+        conn = sqlite3.connect(path,
+                               timeout=__opts__.get('cache.sqlite.timeout', 30),
+                               isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS cache ('
+                     'bank TEXT NOT NULL, '
+                     'key TEXT NOT NULL, '
+                     'data BLOB, '
+                     'updated INTEGER NOT NULL, '
+                     'PRIMARY KEY (bank, key))')
+    except (OSError, sqlite3.Error) as exc:
+        raise SaltCacheError(
+            'Unable to open the cache database {0}: {1}'.format(path, exc)
+        )
+    conns[path] = conn
+    return conn
+
+
+def _run(cachedir, query, args=()):
+    '''
+    Run a query and return its cursor
+    '''
+    try:
+        return _get_conn(cachedir).execute(query, args)
+    except sqlite3.Error as exc:
+        raise SaltCacheError(
+            'Error running {0}: {1}'.format(query, exc)
+        )
+
+
+def _sub_banks(bank):
+    '''
+    Return the bounds of the names of the sub-banks of a bank
+    '''
+    # '0' is the character following '/'
+    return bank + '/', bank + '0'
+
+
+def _loads(data):
+    '''
+    Deserialize a value the way the localfs cache reads its files
+    '''
+    if six.PY3:
+        return __context__['serial'].loads(data, encoding='utf-8')
+    return __context__['serial'].loads(data)
+
+
+def store(bank, key, data, cachedir):
+    '''
+    Store a key value.
+    '''
+    _run(cachedir,
+         'INSERT OR REPLACE INTO cache (bank, key, data, updated) VALUES (?, ?, ?, ?)',
+         (bank, key, sqlite3.Binary(__context__['serial'].dumps(data)), int(time.time())))
+
+
+def store_many(bank_data, key, cachedir):
+    '''
+    Store the values of the same key in several banks, in a single
+    transaction.
+    '''
+    now = int(time.time())
+    rows = [(bank, key, sqlite3.Binary(__context__['serial'].dumps(data)), now)
+            for bank, data in six.iteritems(bank_data)]
+    conn = _get_conn(cachedir)
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT OR REPLACE INTO cache (bank, key, data, updated) VALUES (?, ?, ?, ?)',
+                rows)
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    except sqlite3.Error as exc:
+        raise SaltCacheError(
+            'There was an error storing the key {0} of {1} banks: {2}'.format(
+                key, len(rows), exc
+            )
+        )
+
+
+def fetch(bank, key, cachedir):
+    '''
+    Fetch a key value.
+    '''
+    row = _run(cachedir,
+               'SELECT data FROM cache WHERE bank = ? AND key = ?',
+               (bank, key)).fetchone()
+    if row is None:
+        return {}
+    return _loads(row[0])
+
+
+def fetch_many(banks, key, cachedir):
+    '''
+    Fetch the values of the same key in several banks, with a query per chunk
+    of banks.
+    '''
+    ret = dict((bank, {}) for bank in banks)
+    for idx in range(0, len(banks), _MANY_CHUNK_SIZE):
+        chunk = banks[idx:idx + _MANY_CHUNK_SIZE]
+        cur = _run(cachedir,
+                   'SELECT bank, data FROM cache WHERE key = ? AND bank IN ({0})'.format(
+                       ', '.join(['?'] * len(chunk))),
+                   [key] + list(chunk))
+        for bank, data in cur:
+            ret[bank] = _loads(data)
+    return ret
+
+
+def updated(bank, key, cachedir):
+    '''
+    Return the epoch of the last time the key was stored.
+    '''
+    row = _run(cachedir,
+               'SELECT updated FROM cache WHERE bank = ? AND key = ?',
+               (bank, key)).fetchone()
+    if row is None:
+        log.warning('Cache key "%s/%s" does not exist', bank, key)
+        return None
+    return row[0]
+
+
+def flush(bank, key=None, cachedir=None):
+    '''
+    Remove the key from the cache bank, or the whole bank with its sub-banks
+    when no key is specified.
+    '''
+    if cachedir is None:
+        cachedir = __cachedir()
+    if key is None:
+        start, end = _sub_banks(bank)
+        cur = _run(cachedir,
+                   'DELETE FROM cache WHERE bank = ? OR (bank >= ? AND bank < ?)',
+                   (bank, start, end))
+    else:
+        cur = _run(cachedir,
+                   'DELETE FROM cache WHERE bank = ? AND key = ?',
+                   (bank, key))
+    return cur.rowcount > 0
+
+
+def list_(bank, cachedir):
+    '''
+    Return the keys and the names of the sub-banks of the specified bank.
+    '''
+    ret = set(row[0] for row in _run(cachedir,
+                                     'SELECT key FROM cache WHERE bank = ?',
+                                     (bank,)))
+    start, end = _sub_banks(bank)
+    for row in _run(cachedir,
+                    'SELECT DISTINCT bank FROM cache WHERE bank >= ? AND bank < ?',
+                    (start, end)):
+        ret.add(row[0][len(start):].split('/', 1)[0])
+    return list(ret)
+
+
+def contains(bank, key, cachedir):
+    '''
+    Checks if the specified bank contains the specified key, or if the bank
+    exists when no key is specified.
+    '''
+    if key is not None:
+        query = 'SELECT 1 FROM cache WHERE bank = ? AND key = ? LIMIT 1'
+        args = (bank, key)
+    else:
+        start, end = _sub_banks(bank)
+        query = 'SELECT 1 FROM cache WHERE bank = ? OR (bank >= ? AND bank < ?) LIMIT 1'
+        args = (bank, start, end)
+    return _run(cachedir, query, args).fetchone() is not None
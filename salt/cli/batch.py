@@ -11,6 +11,7 @@ import copy
 from datetime import datetime, timedelta
 
 # Import salt libs
+import salt.cache
 import salt.utils.stringutils
 import salt.client
 import salt.output
@@ -78,6 +79,9 @@ def batch_get_opts(
         opts['gather_job_timeout'] = kwargs['gather_job_timeout']
     if 'batch_wait' in kwargs:
         opts['batch_wait'] = int(kwargs['batch_wait'])
+    for key in ('batch_adaptive', 'batch_order_by_duration'):
+        if key in kwargs:
+            opts[key] = kwargs[key]
 
     for key, val in six.iteritems(parent_opts):
         if key not in opts:
@@ -99,6 +103,130 @@ def batch_get_eauth(kwargs):
     return eauth
 
 
+def _durations_key(opts):
+    fun = opts['fun']
+    if isinstance(fun, (list, tuple)):
+        fun = ','.join(fun)
+    return fun
+
+
+def get_durations(opts):
+    '''
+    Return the durations of the last batch runs of the function, in seconds
+    by minion
+    '''
+    try:
+        return salt.cache.factory(opts).fetch('batch/durations', _durations_key(opts)) or {}
+    except salt.exceptions.SaltCacheError as exc:
+        log.debug('Unable to read the batch durations: %s', exc)
+        return {}
+
+
+def store_durations(opts, durations):
+    '''
+    Keep the durations of a batch run of the function, for the next runs to
+    start the longest minions first
+    '''
+    if not durations:
+        return
+    ret = get_durations(opts)
+    ret.update(durations)
+    try:
+        salt.cache.factory(opts).store('batch/durations', _durations_key(opts), ret)
+    except salt.exceptions.SaltCacheError as exc:
+        log.debug('Unable to store the batch durations: %s', exc)
+
+
+def order_by_duration(minions, durations):
+    '''
+    Return the minions, the minions whose past runs were the longest first.
+    The minions without a past run are given the mean duration.
+    '''
+    known = [durations[minion] for minion in minions if minion in durations]
+    mean = sum(known) / len(known) if known else 0
+    return sorted(minions, key=lambda minion: (-durations.get(minion, mean), minion))
+
+
+def failed_return(data):
+    '''
+    Tell whether a minion return is a failure or a timeout
+    '''
+    # The raw returns are the return events
+    data = data.get('data', data)
+    if data.get('success') is False:
+        return True
+    retcode = data.get('retcode')
+    return retcode is None or retcode != 0
+
+
+class BatchSizer(object):
+    '''
+    Adapt the number of minions running the job at once to the minion returns
+    and to the load of the master, with the batch_adaptive option.
+
+    Like the TCP congestion control, the batch grows by one minion once every
+    minion of the batch returned in time (additive increase), and is halved
+    when a minion fails or times out, returns more slowly than
+    ``batch_adaptive_latency`` seconds (by default three times the fastest
+    return, and at least one second), or when the master takes more than
+    ``batch_adaptive_publish_latency`` seconds to publish the job
+    (multiplicative decrease). The requests waiting for the master workers
+    make the publishes slower. Only the minions started since the last
+    decrease can decrease the batch again.
+    '''
+    def __init__(self, opts, size):
+        self.size = float(max(size, 1))
+        self.min_size = max(int(opts.get('batch_adaptive_min', 1)), 1)
+        self.max_size = int(opts.get('batch_adaptive_max', 0))
+        self.latency = float(opts.get('batch_adaptive_latency', 0))
+        self.publish_latency = float(opts.get('batch_adaptive_publish_latency', 1))
+        self.fastest = None
+        self.decreased = 0
+
+    @property
+    def bnum(self):
+        '''
+        Return the number of minions to run the job on at once
+        '''
+        return int(self.size)
+
+    def _increase(self):
+        self.size += 1.0 / self.size
+        if self.max_size:
+            self.size = min(self.size, self.max_size)
+
+    def _decrease(self, start, end, reason):
+        if start < self.decreased:
+            # The minion was started with a batch larger than the current one
+            return
+        self.size = max(self.size / 2.0, self.min_size)
+        self.decreased = end
+        log.debug('Reducing the batch to %d minions: %s', self.bnum, reason)
+
+    def published(self, start, end):
+        '''
+        Adapt the batch to the time the master took to publish a job
+        '''
+        if self.publish_latency and end - start > self.publish_latency:
+            self._decrease(start, end, 'slow publish')
+
+    def returned(self, start, end, failed=False):
+        '''
+        Adapt the batch to a minion return, or to a minion timing out when
+        failed is set
+        '''
+        if failed:
+            self._decrease(start, end, 'failed minion')
+            return
+        latency = end - start
+        if self.fastest is None or latency < self.fastest:
+            self.fastest = latency
+        if latency > (self.latency or max(3 * self.fastest, 1)):
+            self._decrease(start, end, 'slow return')
+        else:
+            self._increase()
+
+
 class Batch(object):
     '''
     Manage the execution of batch runs
@@ -178,6 +306,16 @@ class Batch(object):
         if not self.minions:
             return
         to_run = copy.deepcopy(self.minions)
+        sizer = None
+        if self.opts.get('batch_adaptive'):
+            sizer = BatchSizer(self.opts, bnum)
+        # the time each minion was started at and the duration of its run
+        started = {}
+        durations = {}
+        order = self.opts.get('batch_order_by_duration')
+        if order:
+            # to_run is consumed from its end
+            to_run = order_by_duration(to_run, get_durations(self.opts))[::-1]
         active = []
         ret = {}
         iters = []
@@ -209,6 +347,8 @@ class Batch(object):
         # Iterate while we still have things to execute
         while len(ret) < len(self.minions):
             next_ = []
+            if sizer:
+                bnum = sizer.bnum
             if bwait and wait:
                 self.__update_wait(wait)
             if len(to_run) <= bnum - len(wait) and not active:
@@ -245,6 +385,10 @@ class Batch(object):
                 # every iterator added is 'active' and has its set of minions
                 minion_tracker[new_iter]['minions'] = next_
                 minion_tracker[new_iter]['active'] = True
+                minion_tracker[new_iter]['published'] = False
+                now = time.time()
+                for minion in next_:
+                    started[minion] = now
 
             else:
                 time.sleep(0.02)
@@ -264,7 +408,12 @@ class Batch(object):
                     # Gather returns until we get to the bottom
                     ncnt = 0
                     while True:
+                        start = time.time()
                         part = next(queue)
+                        if sizer and not minion_tracker[queue]['published']:
+                            # The first step of the iterator publishes the job
+                            minion_tracker[queue]['published'] = True
+                            sizer.published(start, time.time())
                         if part is None:
                             time.sleep(0.01)
                             ncnt += 1
@@ -305,6 +454,14 @@ class Batch(object):
                     active.remove(minion)
                     if bwait:
                         wait.append(datetime.now() + timedelta(seconds=bwait))
+                if minion in started:
+                    now = time.time()
+                    failed = failed_return(data)
+                    if sizer:
+                        sizer.returned(started[minion], now, failed)
+                    if order and not failed:
+                        durations[minion] = now - started[minion]
+                    del started[minion]
                 # Munge retcode into return data
                 failhard = False
                 if 'retcode' in data and isinstance(data['ret'], dict) and 'retcode' not in data['ret']:
@@ -347,3 +504,6 @@ class Batch(object):
                             active.remove(minion)
                             if bwait:
                                 wait.append(datetime.now() + timedelta(seconds=bwait))
+
+        if order:
+            store_durations(self.opts, durations)
@@ -5,6 +5,7 @@ Execute a job on the targeted minions by using a moving window of fixed size `ba
 
 # Import python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import time
 import tornado
 
 # Import salt libs
@@ -16,7 +17,16 @@ import fnmatch
 
 log = logging.getLogger(__name__)
 
-from salt.cli.batch import get_bnum, batch_get_opts, batch_get_eauth
+from salt.cli.batch import (
+    get_bnum,
+    batch_get_opts,
+    batch_get_eauth,
+    get_durations,
+    store_durations,
+    order_by_duration,
+    BatchSizer,
+    failed_return
+)
 
 
 class BatchAsync(object):
@@ -31,6 +41,10 @@ class BatchAsync(object):
         - batch_delay: minimum wait time between batches
         - gather_job_timeout: `find_job` timeout
         - timeout: time to wait before firing a `find_job`
+        - batch_adaptive: adapt the number of concurrent running minions to
+          their returns and to the load of the master, see ``BatchSizer``
+        - batch_order_by_duration: start the minions whose past runs were the
+          longest first
 
     When the batch stars, a `start` event is fired:
          - tag: salt/batch/<batch-jid>/start
@@ -62,6 +76,9 @@ class BatchAsync(object):
             clear_load['kwargs'].pop('batch'),
             self.local.opts,
             **clear_load)
+        for key in ('batch_adaptive', 'batch_order_by_duration'):
+            if key in clear_load['kwargs']:
+                self.opts[key] = clear_load['kwargs'][key]
         self.eauth = batch_get_eauth(clear_load['kwargs'])
         self.metadata = clear_load['kwargs'].get('metadata', {})
         self.minions = set()
@@ -69,6 +86,12 @@ class BatchAsync(object):
         self.timedout_minions = set()
         self.done_minions = set()
         self.active = set()
+        self.sizer = None
+        self.past_durations = {}
+        # the time each active minion was started at and the duration of the
+        # minion runs
+        self.started = {}
+        self.durations = {}
         self.initialized = False
         self.ping_jid = jid_gen()
         self.batch_jid = jid_gen()
@@ -115,21 +138,37 @@ class BatchAsync(object):
                     if minion in self.active:
                         self.active.remove(minion)
                         self.done_minions.add(minion)
+                        self.__returned(minion, failed_return(data))
                         # call later so that we maybe gather more returns
                         self.event.io_loop.call_later(self.batch_delay, self.schedule_next)
 
         if self.initialized and self.done_minions == self.minions.difference(self.timedout_minions):
             self.end_batch()
 
+    def __returned(self, minion, failed):
+        start = self.started.pop(minion, None)
+        if start is None:
+            return
+        now = time.time()
+        if self.sizer:
+            self.sizer.returned(start, now, failed)
+        if self.opts.get('batch_order_by_duration') and not failed:
+            self.durations[minion] = now - start
+
     def _get_next(self):
         to_run = self.minions.difference(
             self.done_minions).difference(
             self.active).difference(
             self.timedout_minions)
+        batch_size = self.sizer.bnum if self.sizer else self.batch_size
         next_batch_size = min(
             len(to_run),                   # partial batch (all left)
-            self.batch_size - len(self.active)  # full batch or available slots
+            batch_size - len(self.active)  # full batch or available slots
         )
+        if next_batch_size <= 0:
+            return set()
+        if self.opts.get('batch_order_by_duration'):
+            to_run = order_by_duration(to_run, self.past_durations)
         return set(list(to_run)[:next_batch_size])
 
     @tornado.gen.coroutine
@@ -142,6 +181,7 @@ class BatchAsync(object):
                 if minion in self.active:
                     self.active.remove(minion)
                 self.timedout_minions.add(minion)
+                self.__returned(minion, True)
         running = minions.difference(did_not_return).difference(self.done_minions).difference(self.timedout_minions)
         if running:
             self.event.io_loop.add_callback(self.find_job, running)
@@ -186,6 +226,10 @@ class BatchAsync(object):
     def start_batch(self):
         if not self.initialized:
             self.batch_size = get_bnum(self.opts, self.minions, True)
+            if self.opts.get('batch_adaptive'):
+                self.sizer = BatchSizer(self.opts, self.batch_size)
+            if self.opts.get('batch_order_by_duration'):
+                self.past_durations = get_durations(self.opts)
             self.initialized = True
             data = {
                 "available_minions": self.minions,
@@ -205,11 +249,16 @@ class BatchAsync(object):
         }
         self.event.fire_event(data, "salt/batch/{0}/done".format(self.batch_jid))
         self.event.remove_event_handler(self.__event_handler)
+        if self.opts.get('batch_order_by_duration'):
+            store_durations(self.opts, self.durations)
 
     @tornado.gen.coroutine
     def schedule_next(self):
         next_batch = self._get_next()
         if next_batch:
+            start = time.time()
+            for minion in next_batch:
+                self.started[minion] = start
             yield self.local.run_job_async(
                 next_batch,
                 self.opts['fun'],
@@ -220,5 +269,7 @@ class BatchAsync(object):
                 gather_job_timeout=self.opts['gather_job_timeout'],
                 jid=self.batch_jid,
                 metadata=self.metadata)
+            if self.sizer:
+                self.sizer.published(start, time.time())
             self.event.io_loop.call_later(self.opts['timeout'], self.find_job, set(next_batch))
             self.active = self.active.union(next_batch)
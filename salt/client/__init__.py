@@ -992,9 +992,8 @@ class LocalClient(object):
         # start this before the cache lookup-- in case new stuff comes in
         event_iter = self.get_event_iter_returns(jid, minions, timeout=timeout)
 
-        # get the info from the cache
-        ret = self.get_cache_returns(jid)
-        if ret != {}:
+        # get the info from the cache, one minion at a time
+        for ret in self.get_cache_returns_iter(jid):
             found.update(set(ret))
             yield ret
 
@@ -1088,6 +1087,12 @@ class LocalClient(object):
         # are there still minions running the job out there
         # start as True so that we ping at least once
         minions_running = True
+        # the job tracker of the master tells which minions are still running
+        # the job, instead of pinging them
+        tracked = self.opts.get('job_tracker', False) and not self.opts['order_masters']
+        tracker_done = False
+        running_tag = salt.utils.event.tagify([jid, 'running'], 'job')
+        complete_tag = salt.utils.event.tagify([jid, 'complete'], 'job')
         log.debug(
             'get_iter_returns for jid %s sent to %s will timeout at %s',
             jid, minions, datetime.fromtimestamp(timeout_at).time()
@@ -1098,6 +1103,25 @@ class LocalClient(object):
                 # if we got None, then there were no events
                 if raw is None:
                     break
+                if tracked and raw.get('tag') == running_tag:
+                    minions_running = True
+                    for id_ in minions - found:
+                        minion_timeouts[id_] = time.time() + timeout
+                    continue
+                if tracked and raw.get('tag') == complete_tag:
+                    log.debug('jid %s is complete, unresponsive minions: %s',
+                              jid, raw['data'].get('unresponsive'))
+                    if raw['data'].get('unknown'):
+                        # The job tracker never heard from these minions, such
+                        # as the minions without heartbeats, ping them instead
+                        log.debug('jid %s: pinging the minions which never sent '
+                                  'a heartbeat: %s', jid, raw['data']['unknown'])
+                        tracked = False
+                        minions_running = True
+                        timeout_at = time.time()
+                        continue
+                    tracker_done = True
+                    break
                 if 'minions' in raw.get('data', {}):
                     minions.update(raw['data']['minions'])
                     if 'missing' in raw.get('data', {}):
@@ -1122,6 +1146,9 @@ class LocalClient(object):
                     log.debug('jid %s return from %s', jid, raw['data']['id'])
                     yield ret
 
+            if tracker_done:
+                break
+
             # if we have all of the returns (and we aren't a syndic), no need for anything fancy
             if len(found.intersection(minions)) >= len(minions) and not self.opts['order_masters']:
                 # All minions have returned, break out of the loop
@@ -1147,7 +1174,12 @@ class LocalClient(object):
 
             # if the jinfo has timed out and some minions are still running the job
             # re-do the ping
-            if time.time() > timeout_at and minions_running:
+            if time.time() > timeout_at and minions_running and tracked:
+                # the running events of the job tracker tell whether the
+                # minions are still running the job
+                minions_running = False
+                timeout_at = time.time() + gather_job_timeout
+            elif time.time() > timeout_at and minions_running:
                 # since this is a new ping, no one has responded yet
                 jinfo = self.gather_job_info(jid, list(minions - found), 'list', **kwargs)
                 minions_running = False
@@ -1328,25 +1360,8 @@ class LocalClient(object):
         # create the iterator-- since we want to get anyone in the middle
         event_iter = self.get_event_iter_returns(jid, minions, timeout=timeout)
 
-        try:
-            data = self.returners['{0}.get_jid'.format(self.opts['master_job_cache'])](jid)
-        except Exception as exc:
-            raise SaltClientError('Returner {0} could not fetch jid data. '
-                                  'Exception details: {1}'.format(
-                                      self.opts['master_job_cache'],
-                                      exc))
-        for minion in data:
-            m_data = {}
-            if 'return' in data[minion]:
-                m_data['ret'] = data[minion].get('return')
-            else:
-                m_data['ret'] = data[minion].get('return')
-            if 'out' in data[minion]:
-                m_data['out'] = data[minion]['out']
-            if minion in ret:
-                ret[minion].update(m_data)
-            else:
-                ret[minion] = m_data
+        for m_ret in self.get_cache_returns_iter(jid):
+            ret.update(m_ret)
 
         # if we have all the minion returns, lets just return
         if len(set(ret).intersection(minions)) >= len(minions):
@@ -1376,28 +1391,35 @@ class LocalClient(object):
         Execute a single pass to gather the contents of the job cache
         '''
         ret = {}
+        for m_ret in self.get_cache_returns_iter(jid):
+            ret.update(m_ret)
+        return ret
 
+    def get_cache_returns_iter(self, jid):
+        '''
+        .. versionadded:: Neon
+
+        Yield the contents of the job cache one minion at a time, as
+        ``{minion_id: {'ret': ..., 'out': ...}}`` dicts. The returns are read
+        one by one when the job cache provides a ``get_jid_iter`` function.
+        '''
+        fstr = '{0}.get_jid_iter'.format(self.opts['master_job_cache'])
         try:
-            data = self.returners['{0}.get_jid'.format(self.opts['master_job_cache'])](jid)
+            if fstr in self.returners:
+                data = self.returners[fstr](jid)
+            else:
+                data = six.iteritems(self.returners['{0}.get_jid'.format(
+                    self.opts['master_job_cache'])](jid))
+            for minion, m_data in data:
+                ret = {'ret': m_data.get('return')}
+                if 'out' in m_data:
+                    ret['out'] = m_data['out']
+                yield {minion: ret}
         except Exception as exc:
             raise SaltClientError('Could not examine master job cache. '
                                   'Error occurred in {0} returner. '
                                   'Exception details: {1}'.format(self.opts['master_job_cache'],
                                                                   exc))
-        for minion in data:
-            m_data = {}
-            if 'return' in data[minion]:
-                m_data['ret'] = data[minion].get('return')
-            else:
-                m_data['ret'] = data[minion].get('return')
-            if 'out' in data[minion]:
-                m_data['out'] = data[minion]['out']
-            if minion in ret:
-                ret[minion].update(m_data)
-            else:
-                ret[minion] = m_data
-
-        return ret
 
     def get_cli_static_event_returns(
             self,
@@ -356,6 +356,10 @@ VALID_OPTS = immutabletypes.freeze({
     # Whether or not processes should be forked when needed. The alternative is to use threading.
     'multiprocessing': bool,
 
+    # Whether the job processes of a minion send their requests to the master through the
+    # minion process, over IPC, rather than connecting to the master themselves
+    'minion_request_broker': bool,
+
     # Maximum number of concurrently active processes at any given point in time
     'process_count_max': int,
 
@@ -381,6 +385,18 @@ VALID_OPTS = immutabletypes.freeze({
     # The chunk size to use when streaming files with the file server
     'file_buffer_size': int,
 
+    # Only fetch the blocks of a file which differ from the cached copy
+    'file_delta_transfer': bool,
+
+    # Keep the files cached by the minion in a store keyed by their hash, so
+    # identical files served from several paths or saltenvs are only fetched
+    # and stored once
+    'file_cache_dedup': bool,
+
+    # The maximum number of bytes kept in the minion file store, the least
+    # recently used files are evicted past this size. 0 means no limit.
+    'file_cache_max_size': int,
+
     # The TCP port on which minion events should be published if ipc_mode is TCP
     'tcp_pub_port': int,
 
@@ -400,6 +416,10 @@ VALID_OPTS = immutabletypes.freeze({
     # The TCP port for mworkers to connect to on the master
     'tcp_master_workers': int,
 
+    # The first TCP port on which the publisher shards after the first one pull the loads to publish
+    # if ipc_mode is TCP
+    'tcp_master_publish_pull_shard': int,
+
     # The file to send logging data to
     'log_file': six.string_types,
 
@@ -484,6 +504,10 @@ VALID_OPTS = immutabletypes.freeze({
     # Fire events as state chunks are processed by the state compiler
     'state_events': bool,
 
+    # The number of state results sent to the master per batch while a state
+    # run is in progress. 0 sends all of them with the return of the job.
+    'state_return_batch_size': int,
+
     # The number of seconds a minion should wait before retry when attempting authentication
     'acceptance_wait_time': float,
 
@@ -589,6 +613,14 @@ VALID_OPTS = immutabletypes.freeze({
     # connect to to listen for publications.
     'publish_port': int,
 
+    # The number of publisher processes of a salt master. Each one serves the minions whose id
+    # hashes to it, the first one listens on publish_port and the others on the ports starting at
+    # publish_shard_port.
+    'publish_shards': int,
+
+    # The first port the publisher shards after the first one listen on
+    'publish_shard_port': int,
+
     # TODO unknown option!
     'auth_mode': int,
 
@@ -616,6 +648,10 @@ VALID_OPTS = immutabletypes.freeze({
     # the number of connected minions increases.
     'worker_threads': int,
 
+    # The number of worker processes which can authenticate minions at once, the
+    # minions are told to retry later when they are all busy. 0 means no limit.
+    'auth_workers': int,
+
     # The port for the master to listen to returns on. The minion needs to connect to this port
     # to send returns.
     'ret_port': int,
@@ -874,6 +910,52 @@ VALID_OPTS = immutabletypes.freeze({
     # The queue size for workers in the reactor
     'reactor_worker_hwm': int,
 
+    # The number of threads matching the events and running their reactions in
+    # the reactor, 0 to process the events one at a time in the reactor loop
+    'reactor_render_threads': int,
+
+    # Process the events with the same tag in the order they were received,
+    # when the reactor uses render threads
+    'reactor_tag_ordering': bool,
+
+    # The number of seconds between the events listing the jobs still running
+    # on the minion, 0 to disable them
+    'job_heartbeat_interval': int,
+
+    # Start the process tracking the minions still running the jobs from the
+    # heartbeats of the minions, instead of checking them with find_job
+    'job_tracker': bool,
+
+    # The number of seconds after which a minion which did not list a job in
+    # its heartbeats is not running it anymore
+    'job_tracker_timeout': int,
+
+    # Adapt the number of minions of the batch runs to the minion returns and
+    # to the load of the master
+    'batch_adaptive': bool,
+
+    # The bounds of the number of minions of the adaptive batch runs, 0 for no
+    # upper bound
+    'batch_adaptive_min': int,
+    'batch_adaptive_max': int,
+
+    # The number of seconds above which a minion return or the publish of the
+    # job reduces the adaptive batch, 0 to derive the return latency from the
+    # fastest return
+    'batch_adaptive_latency': float,
+    'batch_adaptive_publish_latency': float,
+
+    # Start the minions whose past batch runs of the function were the longest
+    # first
+    'batch_order_by_duration': bool,
+
+    # The number of segment files of the ring buffer keeping the events of the
+    # master event bus, 0 to disable it
+    'event_ring_segments': int,
+
+    # The size in bytes of each segment file of the event ring
+    'event_ring_segment_size': int,
+
     # Defines engines. See https://docs.saltstack.com/en/latest/topics/engines/
     'engines': list,
 
@@ -959,6 +1041,13 @@ VALID_OPTS = immutabletypes.freeze({
     # If this is set to True the first newline after a Jinja block is removed
     'jinja_trim_blocks': bool,
 
+    # Keep the compiled Jinja templates in the cachedir
+    'jinja_bytecode_cache': bool,
+
+    # Execute the Jinja templates imported without context once per state run
+    # or pillar compilation
+    'jinja_import_cache': bool,
+
     # Cache minion ID to file
     'minion_id_caching': bool,
 
@@ -977,6 +1066,15 @@ VALID_OPTS = immutabletypes.freeze({
     # The transport system for this daemon. (i.e. zeromq, tcp, detect, etc)
     'transport': six.string_types,
 
+    # Compress the encrypted payloads sent by this daemon with this algorithm (zlib or lz4), when
+    # they are at least transport_compression_threshold bytes long
+    'transport_compression': (type(None), six.string_types),
+    'transport_compression_threshold': int,
+
+    # The largest size in bytes a compressed payload received by this daemon can decompress to,
+    # the larger payloads are dropped. 0 means no limit
+    'transport_decompression_max': int,
+
     # The number of seconds to wait when the client is requesting information about running jobs
     'gather_job_timeout': int,
 
@@ -1046,6 +1144,10 @@ VALID_OPTS = immutabletypes.freeze({
     # Use zmq.SUSCRIBE to limit listening sockets to only process messages bound for them
     'zmq_filtering': bool,
 
+    # Route the publishes of every target type, not only glob, pcre and list, to
+    # the minions matched on the master when zmq_filtering is enabled
+    'zmq_filtering_all_targets': bool,
+
     # Connection caching. Can greatly speed up salt performance.
     'con_cache': bool,
     'rotate_aes_key': bool,
@@ -1115,6 +1217,17 @@ VALID_OPTS = immutabletypes.freeze({
     'memcache_full_cleanup': bool,
     # Enable collecting the memcache stats and log it on `debug` log level.
     'memcache_debug': bool,
+    # Drop the memcache values stored or flushed by the other processes of the master.
+    'memcache_invalidation': bool,
+
+    # The grains and pillar keys to keep in the targeting snapshot of the minions, which
+    # the cache based matchers read instead of the whole minion data.
+    'minion_data_cache_target_keys': dict,
+
+    # The number of seconds the master processes keep the results of the mine.get
+    # calls of the minions, dropped earlier when the mine of a minion changes. 0
+    # to disable it.
+    'mine_get_cache_ttl': int,
 
     # Thin and minimal Salt extra modules
     'thin_extra_mods': six.string_types,
@@ -1159,6 +1272,10 @@ VALID_OPTS = immutabletypes.freeze({
     # tcp transport
     'tcp_authentication_retries': int,
 
+    # The number of requests to the master which can be waiting for their reply at once on
+    # a connection with the tcp transport, 0 means no limit
+    'tcp_req_window': int,
+
     # Permit or deny allowing minions to request revoke of its own key
     'allow_minion_key_revoke': bool,
 
@@ -1257,6 +1374,8 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze({
     'renderer': 'jinja|yaml',
     'renderer_whitelist': [],
     'renderer_blacklist': [],
+    'jinja_bytecode_cache': True,
+    'jinja_import_cache': False,
     'random_startup_delay': 0,
     'failhard': False,
     'autoload_dynamic_modules': True,
@@ -1377,6 +1496,7 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze({
     'auto_accept': True,
     'autosign_timeout': 120,
     'multiprocessing': True,
+    'minion_request_broker': False,
     'process_count_max': -1,
     'process_count_max_sleep_secs': 10,
     'mine_enabled': True,
@@ -1389,9 +1509,13 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze({
     'ipc_so_backlog': 128,
     'ipv6': None,
     'file_buffer_size': 262144,
+    'file_delta_transfer': False,
+    'file_cache_dedup': False,
+    'file_cache_max_size': 0,
     'tcp_pub_port': 4510,
     'tcp_pull_port': 4511,
     'tcp_authentication_retries': 5,
+    'tcp_req_window': 16,
     'log_file': os.path.join(salt.syspaths.LOGS_DIR, 'minion'),
     'log_level': 'warning',
     'log_level_logfile': None,
@@ -1415,6 +1539,7 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze({
     'state_output_diff': False,
     'state_auto_order': True,
     'state_events': False,
+    'state_return_batch_size': 0,
     'state_aggregate': False,
     'snapper_states': False,
     'snapper_states_config': 'root',
@@ -1459,6 +1584,9 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze({
     'reactor_refresh_interval': 60,
     'reactor_worker_threads': 10,
     'reactor_worker_hwm': 10000,
+    'reactor_render_threads': 0,
+    'reactor_tag_ordering': True,
+    'job_heartbeat_interval': 0,
     'engines': [],
     'tcp_keepalive': True,
     'tcp_keepalive_idle': 300,
@@ -1471,6 +1599,9 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze({
     'minion_id_remove_domain': False,
     'keysize': 2048,
     'transport': 'zeromq',
+    'transport_compression': None,
+    'transport_compression_threshold': 4096,
+    'transport_decompression_max': 104857600,
     'auth_timeout': 5,
     'auth_tries': 7,
     'master_tries': _MASTER_TRIES,
@@ -1523,11 +1654,14 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze({
 DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'interface': '0.0.0.0',
     'publish_port': 4505,
+    'publish_shards': 1,
+    'publish_shard_port': 4530,
     'zmq_backlog': 1000,
     'pub_hwm': 1000,
     'auth_mode': 1,
     'user': _MASTER_USER,
     'worker_threads': 5,
+    'auth_workers': 0,
     'sock_dir': os.path.join(salt.syspaths.SOCK_DIR, 'master'),
     'sock_pool_size': 1,
     'ret_port': 4506,
@@ -1717,6 +1851,7 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'tcp_master_pull_port': 4513,
     'tcp_master_publish_pull': 4514,
     'tcp_master_workers': 4515,
+    'tcp_master_publish_pull_shard': 4540,
     'log_file': os.path.join(salt.syspaths.LOGS_DIR, 'master'),
     'log_level': 'warning',
     'log_level_logfile': None,
@@ -1735,6 +1870,18 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'reactor_refresh_interval': 60,
     'reactor_worker_threads': 10,
     'reactor_worker_hwm': 10000,
+    'reactor_render_threads': 0,
+    'reactor_tag_ordering': True,
+    'event_ring_segments': 0,
+    'event_ring_segment_size': 16777216,
+    'job_tracker': False,
+    'job_tracker_timeout': 30,
+    'batch_adaptive': False,
+    'batch_adaptive_min': 1,
+    'batch_adaptive_max': 0,
+    'batch_adaptive_latency': 0,
+    'batch_adaptive_publish_latency': 1,
+    'batch_order_by_duration': False,
     'engines': [],
     'event_return': '',
     'event_return_queue': 0,
@@ -1783,6 +1930,8 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'jinja_sls_env': {},
     'jinja_lstrip_blocks': False,
     'jinja_trim_blocks': False,
+    'jinja_bytecode_cache': True,
+    'jinja_import_cache': False,
     'tcp_keepalive': True,
     'tcp_keepalive_idle': 300,
     'tcp_keepalive_cnt': -1,
@@ -1790,6 +1939,9 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'sign_pub_messages': True,
     'keysize': 2048,
     'transport': 'zeromq',
+    'transport_compression': None,
+    'transport_compression_threshold': 4096,
+    'transport_decompression_max': 104857600,
     'gather_job_timeout': 10,
     'syndic_event_forward_timeout': 0.5,
     'syndic_jid_forward_cache_hwm': 100,
@@ -1816,6 +1968,7 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'master_pubkey_signature': 'master_pubkey_signature',
     'master_use_pubkey_signature': False,
     'zmq_filtering': False,
+    'zmq_filtering_all_targets': False,
     'zmq_monitor': False,
     'con_cache': False,
     'rotate_aes_key': True,
@@ -1831,6 +1984,9 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'memcache_max_items': 1024,
     'memcache_full_cleanup': False,
     'memcache_debug': False,
+    'memcache_invalidation': True,
+    'minion_data_cache_target_keys': {},
+    'mine_get_cache_ttl': 0,
     'thin_extra_mods': '',
     'min_extra_mods': '',
     'ssl': None,
@@ -3884,6 +4040,43 @@ def _update_discovery_config(opts):
         opts['discovery'] = salt.utils.dictupdate.update(discovery_config, opts['discovery'], True, True)
 
 
+def _check_publish_shard_ports(opts):
+    '''
+    Make sure the ports of the publisher shards do not overlap the other ports
+    the master listens on.
+
+    :param opts:
+    :return:
+    '''
+    try:
+        shards = int(opts.get('publish_shards', 1))
+    except (TypeError, ValueError):
+        return
+    if shards <= 1:
+        return
+    ports = {}
+    ports['publish_port'] = [int(opts['publish_port'])]
+    ports['ret_port'] = [int(opts['ret_port'])]
+    ports['publish_shard_port'] = [int(opts['publish_shard_port']) + shard
+                                   for shard in range(shards - 1)]
+    if opts.get('ipc_mode') == 'tcp':
+        for key in ('tcp_master_pub_port', 'tcp_master_pull_port',
+                    'tcp_master_publish_pull', 'tcp_master_workers'):
+            ports[key] = [int(opts[key])]
+        ports['tcp_master_publish_pull_shard'] = [
+            int(opts['tcp_master_publish_pull_shard']) + shard
+            for shard in range(shards - 1)]
+    used = {}
+    for key in sorted(ports):
+        for port in ports[key]:
+            if port in used:
+                raise salt.exceptions.SaltConfigurationError(
+                    'The ports of the {0} publisher shards overlap: port {1} '
+                    'is used by both {2} and {3}'.format(
+                        shards, port, used[port], key))
+            used[port] = key
+
+
 def master_config(path, env_var='SALT_MASTER_CONFIG', defaults=None, exit_on_config_errors=False):
     '''
     Reads in the master configuration file and sets up default options
@@ -4085,6 +4278,7 @@ def apply_master_config(overrides=None, defaults=None):
     # Check and update TLS/SSL configuration
     _update_ssl_config(opts)
     _update_discovery_config(opts)
+    _check_publish_shard_ports(opts)
 
     return opts
 
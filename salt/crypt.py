@@ -217,6 +217,19 @@ def get_rsa_pub_key(path):
     return key
 
 
+def get_rsa_pub_key_str(data):
+    '''
+    Load a public key from its PEM string, as read off the disk.
+    '''
+    if HAS_M2:
+        data = salt.utils.stringutils.to_bytes(data).replace(b'RSA ', b'')
+        bio = BIO.MemoryBuffer(data)
+        key = RSA.load_pub_key_bio(bio)
+    else:
+        key = RSA.importKey(data)
+    return key
+
+
 def sign_message(privkey_path, message, passphrase=None):
     '''
     Use Crypto.Signature.PKCS1_v1_5 to sign a message. Returns the signature.
@@ -606,11 +619,11 @@ class AsyncAuth(object):
                 except SaltClientError as exc:
                     error = exc
                     break
-                if creds == 'retry':
+                if creds in ('retry', 'busy'):
                     if self.opts.get('detect_mode') is True:
                         error = SaltClientError('Detect mode is on')
                         break
-                    if self.opts.get('caller'):
+                    if creds == 'retry' and self.opts.get('caller'):
                         # We have a list of masters, so we should break
                         # and try the next one in the list.
                         if self.opts.get('local_masters', None):
@@ -749,6 +762,13 @@ class AsyncAuth(object):
                 # has the master returned that its maxed out with minions?
                 elif payload['load']['ret'] == 'full':
                     raise tornado.gen.Return('full')
+                # is the master too busy authenticating other minions?
+                elif payload['load']['ret'] == 'busy':
+                    log.info(
+                        'The Salt Master is busy authenticating other minions, '
+                        'this salt minion will retry to authenticate'
+                    )
+                    raise tornado.gen.Return('busy')
                 else:
                     log.error(
                         'The Salt Master has cached the public key for this '
@@ -825,6 +845,8 @@ class AsyncAuth(object):
         payload = {}
         payload['cmd'] = '_auth'
         payload['id'] = self.opts['id']
+        # Tell the master this minion retries when it is busy
+        payload['auth_busy'] = True
         if 'autosign_grains' in self.opts:
             autosign_grains = {}
             for grain in self.opts['autosign_grains']:
@@ -1229,8 +1251,8 @@ class SAuth(AsyncAuth):
         try:
             while True:
                 creds = self.sign_in(channel=channel)
-                if creds == 'retry':
-                    if self.opts.get('caller'):
+                if creds in ('retry', 'busy'):
+                    if creds == 'retry' and self.opts.get('caller'):
                         # We have a list of masters, so we should break
                         # and try the next one in the list.
                         if self.opts.get('local_masters', None):
@@ -1331,6 +1353,13 @@ class SAuth(AsyncAuth):
                 # has the master returned that its maxed out with minions?
                 elif payload['load']['ret'] == 'full':
                     return 'full'
+                # is the master too busy authenticating other minions?
+                elif payload['load']['ret'] == 'busy':
+                    log.info(
+                        'The Salt Master is busy authenticating other minions, '
+                        'this salt minion will retry to authenticate'
+                    )
+                    return 'busy'
                 else:
                     log.error(
                         'The Salt Master has cached the public key for this '
@@ -1376,6 +1405,9 @@ class Crypticle(object):
     '''
 
     PICKLE_PAD = b'pickle::'
+    # The objects compressed before being encrypted are prefixed with the
+    # name of the compression algorithm instead of PICKLE_PAD
+    COMPRESSED_PADS = {b'zlib::': 'zlib', b'lz4::': 'lz4'}
     AES_BLOCK_SIZE = 16
     SIG_SIZE = hashlib.sha256().digest_size
 
@@ -1384,6 +1416,16 @@ class Crypticle(object):
         self.keys = self.extract_keys(self.key_string, key_size)
         self.key_size = key_size
         self.serial = salt.payload.Serial(opts)
+        self.compression = opts.get('transport_compression') or None
+        if self.compression is not None \
+                and self.compression not in salt.transport.frame.COMPRESSORS:
+            log.warning(
+                'The %s compression is not available, the payloads will not '
+                'be compressed', self.compression
+            )
+            self.compression = None
+        self.compression_threshold = opts.get('transport_compression_threshold', 4096)
+        self.decompression_max = opts.get('transport_decompression_max', 104857600)
 
     @classmethod
     def generate_key_string(cls, key_size=192):
@@ -1466,8 +1508,18 @@ class Crypticle(object):
     def dumps(self, obj):
         '''
         Serialize and encrypt a python object
+
+        When ``transport_compression`` is set, the serialized objects of at
+        least ``transport_compression_threshold`` bytes are compressed before
+        being encrypted.
         '''
-        return self.encrypt(self.PICKLE_PAD + self.serial.dumps(obj))
+        data = self.serial.dumps(obj)
+        if self.compression is not None and len(data) >= self.compression_threshold:
+            compressed = salt.transport.frame.compress(data, self.compression)
+            if len(compressed) < len(data):
+                pad = salt.utils.stringutils.to_bytes(self.compression) + b'::'
+                return self.encrypt(pad + compressed)
+        return self.encrypt(self.PICKLE_PAD + data)
 
     def loads(self, data, raw=False):
         '''
@@ -1475,7 +1527,25 @@ class Crypticle(object):
         '''
         data = self.decrypt(data)
         # simple integrity check to verify that we got meaningful data
-        if not data.startswith(self.PICKLE_PAD):
-            return {}
-        load = self.serial.loads(data[len(self.PICKLE_PAD):], raw=raw)
+        if data.startswith(self.PICKLE_PAD):
+            data = data[len(self.PICKLE_PAD):]
+        else:
+            for pad, compression in six.iteritems(self.COMPRESSED_PADS):
+                if data.startswith(pad):
+                    break
+            else:
+                return {}
+            if compression not in salt.transport.frame.COMPRESSORS:
+                log.error(
+                    'Unable to load a payload compressed with %s, it is not '
+                    'available', compression
+                )
+                return {}
+            try:
+                data = salt.transport.frame.decompress(
+                    data[len(pad):], compression, self.decompression_max)
+            except ValueError as exc:
+                log.error('Unable to load a compressed payload: %s', exc)
+                return {}
+        load = self.serial.loads(data, raw=raw)
         return load
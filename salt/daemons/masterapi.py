@@ -46,6 +46,7 @@ import salt.utils.user
 import salt.utils.verify
 import salt.utils.versions
 from salt.defaults import DEFAULT_TARGET_DELIM
+from salt.utils.odict import OrderedDict
 from salt.pillar import git_pillar
 
 # Import 3rd-party libs
@@ -407,6 +408,12 @@ class RemoteFuncs(object):
     Funcitons made available to minions, this class includes the raw routines
     post validation that make up the minion access to the master
     '''
+    # The results of _mine_get kept by the process with mine_get_cache_ttl,
+    # the least recently stored dropped first:
+    # odict({(tgt, tgt_type, functions, ret_dict): (time, ret, {minion: generation})})
+    mine_get_results = OrderedDict()
+    mine_get_results_max = 256
+
     def __init__(self, opts):
         self.opts = opts
         self.event = salt.utils.event.get_event(
@@ -435,6 +442,7 @@ class RemoteFuncs(object):
         '''
         fs_ = salt.fileserver.Fileserver(self.opts)
         self._serve_file = fs_.serve_file
+        self._file_blocks = fs_.file_blocks
         self._file_find = fs_._find_file
         self._file_hash = fs_.file_hash
         self._file_list = fs_.file_list
@@ -599,6 +607,17 @@ class RemoteFuncs(object):
             match_type = 'pillar_exact'
         if match_type.lower() == 'compound':
             match_type = 'compound_pillar_exact'
+        ttl = self.opts.get('mine_get_cache_ttl', 0)
+        generations = salt.cache.get_generations(self.opts) if ttl else None
+        if generations is not None:
+            tgt = load['tgt']
+            memo_key = (tuple(tgt) if isinstance(tgt, list) else tgt,
+                        match_type,
+                        tuple(functions_allowed),
+                        _ret_dict)
+            memo = self._get_mine_get_result(memo_key, generations, ttl)
+            if memo is not None:
+                return memo
         checker = salt.utils.minions.CkMinions(self.opts)
         _res = checker.check_minions(
                 load['tgt'],
@@ -606,8 +625,15 @@ class RemoteFuncs(object):
                 greedy=False
                 )
         minions = _res['minions']
+        if generations is not None:
+            # The generations are read first, so that a mine stored meanwhile
+            # invalidates the result
+            minion_generations = dict(
+                (minion, generations.get('minions/{0}'.format(minion), 'mine'))
+                for minion in minions)
+        cdata = self.cache.fetch_many(['minions/{0}'.format(minion) for minion in minions], 'mine')
         for minion in minions:
-            fdata = self.cache.fetch('minions/{0}'.format(minion), 'mine')
+            fdata = cdata.get('minions/{0}'.format(minion))
 
             if not isinstance(fdata, dict):
                 continue
@@ -618,8 +644,41 @@ class RemoteFuncs(object):
                 for fun in list(set(functions_allowed) & set(fdata.keys())):
                     ret.setdefault(fun, {})[minion] = fdata.get(fun)
 
+        if generations is not None:
+            results = RemoteFuncs.mine_get_results
+            results.pop(memo_key, None)
+            results[memo_key] = (time.time(), ret, minion_generations)
+            while len(results) > self.mine_get_results_max:
+                results.popitem(last=False)
         return ret
 
+    def _get_mine_get_result(self, memo_key, generations, ttl):
+        '''
+        Return the result of a previous _mine_get for the same target and
+        functions, when it did not expire and the mine of none of its minions
+        changed since
+        '''
+        memo = RemoteFuncs.mine_get_results.get(memo_key)
+        if memo is None:
+            return None
+        stamp, ret, minion_generations = memo
+        if stamp + ttl < time.time() or any(
+                generations.get('minions/{0}'.format(minion), 'mine') != generation
+                for minion, generation in six.iteritems(minion_generations)):
+            del RemoteFuncs.mine_get_results[memo_key]
+            return None
+        return ret
+
+    def _mine_updated(self, minion_id):
+        '''
+        Drop the _mine_get results holding the mine of a minion, in all the
+        processes of the master
+        '''
+        if self.opts.get('mine_get_cache_ttl', 0):
+            generations = salt.cache.get_generations(self.opts)
+            if generations is not None:
+                generations.bump('minions/{0}'.format(minion_id), 'mine')
+
     def _mine(self, load, skip_verify=False):
         '''
         Return the mine data
@@ -636,6 +695,7 @@ class RemoteFuncs(object):
                     data.update(load['data'])
                     load['data'] = data
             self.cache.store(cbank, ckey, load['data'])
+            self._mine_updated(load['id'])
         return True
 
     def _mine_delete(self, load):
@@ -654,6 +714,7 @@ class RemoteFuncs(object):
                 if load['fun'] in data:
                     del data[load['fun']]
                     self.cache.store(cbank, ckey, data)
+                    self._mine_updated(load['id'])
             except OSError:
                 return False
         return True
@@ -665,7 +726,9 @@ class RemoteFuncs(object):
         if not skip_verify and 'id' not in load:
             return False
         if self.opts.get('minion_data_cache', False) or self.opts.get('enforce_mine_cache', False):
-            return self.cache.flush('minions/{0}'.format(load['id']), 'mine')
+            ret = self.cache.flush('minions/{0}'.format(load['id']), 'mine')
+            self._mine_updated(load['id'])
+            return ret
         return True
 
     def _file_recv(self, load):
@@ -747,9 +810,10 @@ class RemoteFuncs(object):
                 pillar_override=load.get('pillar_override', {}))
         data = pillar.compile_pillar()
         if self.opts.get('minion_data_cache', False):
-            self.cache.store('minions/{0}'.format(load['id']),
-                             'data',
-                             {'grains': load['grains'], 'pillar': data})
+            salt.utils.minions.store_minion_data(self.cache,
+                                                 self.opts,
+                                                 load['id'],
+                                                 {'grains': load['grains'], 'pillar': data})
             if self.opts.get('minion_data_cache_events') is True:
                 self.event.fire_event({'comment': 'Minion data cache refresh'}, salt.utils.event.tagify(load['id'], 'refresh', 'minion'))
         return data
@@ -7,6 +7,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 # Import python libs
 import contextlib
 import errno
+import hashlib
 import logging
 import os
 import string
@@ -27,6 +28,7 @@ import salt.transport.client
 import salt.fileserver
 import salt.utils.data
 import salt.utils.files
+import salt.utils.filestore
 import salt.utils.gzip_util
 import salt.utils.hashutils
 import salt.utils.http
@@ -92,6 +94,12 @@ class Client(object):
         self.opts = opts
         self.utils = salt.loader.utils(self.opts)
         self.serial = salt.payload.Serial(self.opts)
+        self.file_store = None
+        if self.opts.get('file_cache_dedup', False) \
+                and not salt.utils.platform.is_windows():
+            self.file_store = salt.utils.filestore.FileStore(
+                os.path.join(self.opts['cachedir'], 'file_store'),
+                self.opts.get('file_cache_max_size', 0))
 
     # Add __setstate__ and __getstate__ so that the object may be
     # deep copied. It normally can't be deep copied because its
@@ -209,13 +217,10 @@ class Client(object):
         '''
         Download and cache all files on a master in a specified environment
         '''
-        ret = []
-        for path in self.file_list(saltenv):
-            ret.append(
-                self.cache_file(
-                    salt.utils.url.create(path), saltenv, cachedir=cachedir)
-            )
-        return ret
+        return self.cache_files(
+            [salt.utils.url.create(path) for path in self.file_list(saltenv)],
+            saltenv,
+            cachedir=cachedir)
 
     def cache_dir(self, path, saltenv='base', include_empty=False,
                   include_pat=None, exclude_pat=None, cachedir=None):
@@ -1014,6 +1019,8 @@ class RemoteClient(Client):
             self.auth = self.channel.auth
         else:
             self.auth = ''
+        # The (hash, stat) of the files about to be fetched, by (path, saltenv)
+        self._prefetched = {}
 
     def _refresh_channel(self):
         '''
@@ -1096,6 +1103,13 @@ class RemoteClient(Client):
             '\'%s\'', saltenv, dest2check, path
         )
 
+        # Only files fetched into the cache are kept in the file store, files
+        # copied to an explicit dest are left alone
+        file_store = None
+        if not dest and isinstance(hash_server, dict) \
+                and 'hsum' in hash_server:
+            file_store = self.file_store
+
         if dest2check and os.path.isfile(dest2check):
             if not salt.utils.platform.is_windows():
                 hash_local, stat_local = \
@@ -1109,8 +1123,27 @@ class RemoteClient(Client):
                 mode_local = None
 
             if hash_local == hash_server:
+                if file_store is not None:
+                    file_store.add(dest2check,
+                                   hash_server['hsum'],
+                                   hash_server['hash_type'])
                 return dest2check
 
+        if file_store is not None and file_store.link(
+                hash_server['hsum'], hash_server['hash_type'], dest2check):
+            # The same content was already fetched for another path or saltenv
+            return dest2check
+
+        if self.opts.get('file_delta_transfer', False) \
+                and dest2check and os.path.isfile(dest2check) \
+                and self._get_file_delta(path, saltenv, dest2check,
+                                         hash_server, gzip=gzip):
+            if file_store is not None:
+                file_store.add(dest2check,
+                               hash_server['hsum'],
+                               hash_server['hash_type'])
+            return dest2check
+
         log.debug(
             'Fetching file from saltenv \'%s\', ** attempting ** \'%s\'',
             saltenv, path
@@ -1165,7 +1198,9 @@ class RemoteClient(Client):
                                 saltenv,
                                 cachedir=cachedir) as cache_dest:
                             dest = cache_dest
-                            with salt.utils.files.fopen(cache_dest, 'wb+') as ofile:
+                            # Replace rather than truncate the file, which
+                            # may be linked to the file store
+                            with salt.utils.atomicfile.atomic_open(cache_dest, 'wb+') as ofile:
                                 ofile.write(data['data'])
                     if 'hsum' in data and d_tries < 3:
                         # Master has prompted a file verification, if the
@@ -1224,6 +1259,10 @@ class RemoteClient(Client):
                 'Fetching file from saltenv \'%s\', ** done ** \'%s\'',
                 saltenv, path
             )
+            if file_store is not None:
+                file_store.add(dest,
+                               hash_server['hsum'],
+                               hash_server['hash_type'])
         else:
             log.debug(
                 'In saltenv \'%s\', we are ** missing ** the file \'%s\'',
@@ -1232,6 +1271,95 @@ class RemoteClient(Client):
 
         return dest
 
+    def _get_file_delta(self, path, saltenv, dest, hash_server, gzip=None):
+        '''
+        Bring the local copy of a file at ``dest`` up to date with the file on
+        the master by only fetching the blocks which differ. Blocks of the
+        local copy are reused wherever their hash matches a block of the file
+        on the master, even if they moved by a whole number of blocks.
+
+        Returns ``False`` when the master cannot serve the block hashes or
+        when the rebuilt file does not match the hash on the master, so that
+        the caller falls back to a full transfer.
+        '''
+        if not isinstance(hash_server, dict):
+            return False
+        path = self._check_proto(path)
+        load = {'path': path,
+                'saltenv': saltenv,
+                'cmd': '_file_blocks'}
+        blocks = self.channel.send(load)
+        if not isinstance(blocks, dict) or not blocks.get('blocks'):
+            log.debug(
+                'Block hashes for \'%s\' in saltenv \'%s\' are not available, '
+                'falling back to a full transfer', path, saltenv
+            )
+            return False
+        if blocks.get('hsum') != hash_server.get('hsum'):
+            # The file changed on the master since it was hashed
+            return False
+
+        block_size = blocks['block_size']
+        hash_type = blocks['hash_type']
+        try:
+            local_blocks = {}
+            for idx, hsum in enumerate(
+                    salt.utils.hashutils.get_block_hashes(
+                        dest, block_size, hash_type)):
+                local_blocks.setdefault(hsum, idx)
+        except (IOError, OSError, ValueError) as exc:
+            log.debug('Unable to hash the blocks of %s: %s', dest, exc)
+            return False
+
+        fetched = 0
+        hash_obj = hashlib.new(hash_type)
+        try:
+            with salt.utils.files.fopen(dest, 'rb') as ifile, \
+                    salt.utils.atomicfile.atomic_open(dest, 'wb+') as ofile:
+                for idx, hsum in enumerate(blocks['blocks']):
+                    if hsum in local_blocks:
+                        ifile.seek(local_blocks[hsum] * block_size)
+                        data = ifile.read(block_size)
+                    else:
+                        load = {'path': path,
+                                'saltenv': saltenv,
+                                'cmd': '_serve_file',
+                                'loc': idx * block_size}
+                        if gzip:
+                            load['gzip'] = int(gzip)
+                        chunk = self.channel.send(load, raw=True)
+                        if six.PY3:
+                            chunk = decode_dict_keys_to_str(chunk)
+                        if chunk.get('gzip', None):
+                            data = salt.utils.gzip_util.uncompress(chunk['data'])
+                        else:
+                            data = chunk['data']
+                        if six.PY3 and isinstance(data, str):
+                            data = data.encode()
+                        fetched += 1
+                    hash_obj.update(data)
+                    ofile.write(data)
+                if hash_obj.hexdigest() != hash_server['hsum']:
+                    # Leaving the context with an exception discards the
+                    # temporary file and keeps the original one in place
+                    raise MinionError(
+                        'Rebuilt file does not match the master hash'
+                    )
+        except (AttributeError, KeyError, TypeError, IOError, OSError,
+                MinionError) as exc:
+            log.warning(
+                'Delta transfer of \'%s\' in saltenv \'%s\' failed, falling '
+                'back to a full transfer: %s', path, saltenv, exc
+            )
+            return False
+
+        log.info(
+            'Fetching file from saltenv \'%s\', ** done ** \'%s\' '
+            '(%d of %d blocks transferred)',
+            saltenv, path, fetched, len(blocks['blocks'])
+        )
+        return True
+
     def file_list(self, saltenv='base', prefix=''):
         '''
         List the files on the master
@@ -1302,13 +1430,71 @@ class RemoteClient(Client):
         master file server prepend the path with salt://<file on server>
         otherwise, prepend the file with / for a local file.
         '''
+        if (path, saltenv) in self._prefetched:
+            return self._prefetched.pop((path, saltenv))[0]
         return self.__hash_and_stat_file(path, saltenv)
 
+    def _prefetch_hashes(self, paths, saltenv):
+        '''
+        Get the hash and stat of the files on the master in as many requests
+        in flight at once as the channel allows, rather than one round trip
+        after the other as each file is fetched
+        '''
+        if len(paths) < 2 or not hasattr(self.channel, 'send_many'):
+            return
+        keys = []
+        loads = []
+        for path in paths:
+            if not isinstance(path, six.string_types) \
+                    or urlparse(path).scheme != 'salt':
+                continue
+            path, senv = salt.utils.url.split_env(path)
+            try:
+                rel_path = self._check_proto(path)
+            except MinionError:
+                continue
+            keys.append((path, senv or saltenv))
+            for cmd in ('_file_hash', '_file_find'):
+                loads.append({'path': rel_path,
+                              'saltenv': senv or saltenv,
+                              'cmd': cmd})
+        if len(keys) < 2:
+            return
+        try:
+            rets = self.channel.send_many(loads)
+        except Exception as exc:
+            log.debug('Unable to prefetch the hashes of %d files: %s',
+                      len(keys), exc)
+            return
+        for idx, key in enumerate(keys):
+            fnd = rets[2 * idx + 1]
+            try:
+                stat_result = fnd.get('stat')
+            except AttributeError:
+                stat_result = None
+            self._prefetched[key] = (rets[2 * idx], stat_result)
+
+    def cache_files(self, paths, saltenv='base', cachedir=None):
+        '''
+        Download a list of files stored on the master and put them in the
+        minion file cache
+        '''
+        if isinstance(paths, six.string_types):
+            paths = paths.split(',')
+        self._prefetch_hashes(paths, saltenv)
+        try:
+            return super(RemoteClient, self).cache_files(
+                paths, saltenv, cachedir=cachedir)
+        finally:
+            self._prefetched = {}
+
     def hash_and_stat_file(self, path, saltenv='base'):
         '''
         The same as hash_file, but also return the file's mode, or None if no
         mode data is present.
         '''
+        if (path, saltenv) in self._prefetched:
+            return self._prefetched.pop((path, saltenv))
         hash_result = self.hash_file(path, saltenv)
         try:
             path = self._check_proto(path)
@@ -1386,6 +1572,7 @@ class FSClient(RemoteClient):
         self._closing = False
         self.channel = salt.fileserver.FSChan(opts)
         self.auth = DumbAuth()
+        self._prefetched = {}
 
 
 # Provide backward compatibility for anyone directly using LocalClient (but no
@@ -16,8 +16,10 @@ import time
 
 # Import salt libs
 import salt.loader
+import salt.utils.atomicfile
 import salt.utils.data
 import salt.utils.files
+import salt.utils.hashutils
 import salt.utils.path
 import salt.utils.url
 import salt.utils.versions
@@ -650,6 +652,72 @@ class Fileserver(object):
             return self.servers[fstr](load, fnd)
         return ret
 
+    def file_blocks(self, load):
+        '''
+        Return the hash of a file together with the hashes of the fixed-size
+        blocks it is made of. The blocks are the chunks returned by
+        ``serve_file``, so a minion holding an outdated copy of the file can
+        request only the blocks which have changed.
+
+        The block hashes are cached on disk, keyed by the hash of the whole
+        file.
+        '''
+        if 'env' in load:
+            # "env" is not supported; Use "saltenv".
+            load.pop('env')
+
+        if 'path' not in load or 'saltenv' not in load:
+            return {}
+        if not isinstance(load['saltenv'], six.string_types):
+            load['saltenv'] = six.text_type(load['saltenv'])
+
+        fnd = self.find_file(salt.utils.stringutils.to_unicode(load['path']),
+                load['saltenv'])
+        if not fnd.get('back') or not fnd.get('path'):
+            return {}
+        fstr = '{0}.file_hash'.format(fnd['back'])
+        if fstr not in self.servers:
+            return {}
+        hash_ret = self.servers[fstr](load, fnd)
+        if not hash_ret:
+            return {}
+
+        ret = {'hsum': hash_ret['hsum'],
+               'hash_type': hash_ret['hash_type'],
+               'block_size': self.opts['file_buffer_size']}
+        cache_path = os.path.join(
+            self.opts['cachedir'],
+            'file_blocks',
+            ret['hash_type'],
+            '{0}.{1}'.format(ret['hsum'], ret['block_size']))
+        try:
+            with salt.utils.files.fopen(cache_path, 'r') as fp_:
+                ret['blocks'] = fp_.read().split()
+            return ret
+        except (IOError, OSError):
+            pass
+
+        try:
+            ret['blocks'] = salt.utils.hashutils.get_block_hashes(
+                os.path.normpath(fnd['path']),
+                ret['block_size'],
+                ret['hash_type'])
+        except (IOError, OSError, ValueError) as exc:
+            log.error('Failed to hash the blocks of %s: %s', fnd['path'], exc)
+            return {}
+
+        try:
+            cache_dir = os.path.dirname(cache_path)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            with salt.utils.atomicfile.atomic_open(cache_path, 'w') as fp_:
+                fp_.write('\n'.join(ret['blocks']))
+        except (IOError, OSError) as exc:
+            if exc.errno != errno.EEXIST:
+                log.debug('Failed to cache the blocks of %s: %s',
+                          fnd['path'], exc)
+        return ret
+
     def __file_hash_and_stat(self, load):
         '''
         Common code for hashing and stating files
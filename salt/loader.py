@@ -627,12 +627,19 @@ def ssh_wrapper(opts, functions=None, context=None):
     )
 
 
-def render(opts, functions, states=None, proxy=None):
+def render(opts, functions, states=None, proxy=None, context=None):
     '''
     Returns the render modules
+
+    The ``context`` dict is shared by the renderers for the lifetime of the
+    returned loader. A state run or a pillar compilation passes a context
+    with a ``jinja_env_cache`` dict, for the jinja renderer to reuse its
+    environment until the end of the run. The loaders created without it,
+    which may live as long as the process, never reuse the environment.
     '''
     pack = {'__salt__': functions,
-            '__grains__': opts.get('grains', {})}
+            '__grains__': opts.get('grains', {}),
+            '__context__': context}
     if states:
         pack['__states__'] = states
     pack['__proxy__'] = proxy or {}
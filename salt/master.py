@@ -30,6 +30,7 @@ from salt.utils.zeromq import zmq, ZMQDefaultLoop, install_zmq, ZMQ_VERSION_INFO
 import tornado.gen  # pylint: disable=F0401
 
 # Import salt libs
+import salt.cache
 import salt.crypt
 import salt.cli.batch_async
 import salt.client
@@ -58,6 +59,7 @@ import salt.utils.gitfs
 import salt.utils.gzip_util
 import salt.utils.jid
 import salt.utils.job
+import salt.utils.jobtracker
 import salt.utils.master
 import salt.utils.minions
 import salt.utils.platform
@@ -708,6 +710,10 @@ class Master(SMaster):
                 log.info('Creating master event return process')
                 self.process_manager.add_process(salt.utils.event.EventReturn, args=(self.opts,))
 
+            if self.opts['job_tracker']:
+                log.info('Creating master job tracker process')
+                self.process_manager.add_process(salt.utils.jobtracker.JobTracker, args=(self.opts,))
+
             ext_procs = self.opts.get('ext_processes', [])
             for proc in ext_procs:
                 log.info('Creating ext_processes process: %s', proc)
@@ -1071,7 +1077,10 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         end_time = time.time()
         if end_time - self.stat_clock > self.opts['master_stats_event_iter']:
             # Fire the event with the stats and wipe the tracker
-            self.aes_funcs.event.fire_event({'time': end_time - self.stat_clock, 'worker': self.name, 'stats': stats}, tagify(self.name, 'stats'))
+            data = {'time': end_time - self.stat_clock, 'worker': self.name, 'stats': stats}
+            if self.opts.get('memcache_expire_seconds', 0):
+                data['cache'] = salt.cache.MemCache.pop_stats()
+            self.aes_funcs.event.fire_event(data, tagify(self.name, 'stats'))
             self.stats = collections.defaultdict(lambda: {'mean': 0, 'latency': 0, 'runs': 0})
             self.stat_clock = end_time
 
@@ -1180,6 +1189,7 @@ class AESFuncs(object):
         import salt.fileserver
         self.fs_ = salt.fileserver.Fileserver(self.opts)
         self._serve_file = self.fs_.serve_file
+        self._file_blocks = self.fs_.file_blocks
         self._file_find = self.fs_._find_file
         self._file_hash = self.fs_.file_hash
         self._file_hash_and_stat = self.fs_.file_hash_and_stat
@@ -1539,10 +1549,11 @@ class AESFuncs(object):
         data = pillar.compile_pillar()
         self.fs_.update_opts()
         if self.opts.get('minion_data_cache', False):
-            self.masterapi.cache.store('minions/{0}'.format(load['id']),
-                                       'data',
-                                       {'grains': load['grains'],
-                                        'pillar': data})
+            salt.utils.minions.store_minion_data(self.masterapi.cache,
+                                                 self.opts,
+                                                 load['id'],
+                                                 {'grains': load['grains'],
+                                                  'pillar': data})
             if self.opts.get('minion_data_cache_events') is True:
                 self.event.fire_event({'Minion data cache refresh': load['id']}, tagify(load['id'], 'refresh', 'minion'))
         return data
@@ -1634,6 +1645,30 @@ class AESFuncs(object):
         except salt.exceptions.SaltCacheError:
             log.error('Could not store job information for load: %s', load)
 
+    def _return_partial(self, load):
+        '''
+        Handle a batch of state results sent by a minion while its job is
+        still running, see :conf_minion:`state_return_batch_size`.
+
+        The batch is stored in the job cache and merged back into the final
+        return of the minion.
+
+        :param dict load: The minion payload
+
+        :rtype: bool
+        :return: True if the batch was stored
+        '''
+        load = self.__verify_load(load, ('id', 'jid', 'seq', 'return', 'tok'))
+        if load is False:
+            return False
+        try:
+            return salt.utils.job.store_partial(
+                self.opts, load, event=self.event, mminion=self.mminion)
+        except salt.exceptions.SaltCacheError:
+            log.error('Could not store the partial return of %s for job %s',
+                      load['id'], load['jid'])
+            return False
+
     def _syndic_return(self, load):
         '''
         Receive a syndic minion return and format it to look like returns from
@@ -2158,7 +2193,7 @@ class ClearFuncs(object):
 
         # Send it!
         self._send_ssh_pub(payload, ssh_minions=ssh_minions)
-        self._send_pub(payload)
+        self._send_pub(payload, minions=minions)
 
         return {
             'enc': 'clear',
@@ -2212,13 +2247,13 @@ class ClearFuncs(object):
             return {'error': msg}
         return jid
 
-    def _send_pub(self, load):
+    def _send_pub(self, load, minions=None):
         '''
         Take a load and send it across the network to connected minions
         '''
         for transport, opts in iter_transport_opts(self.opts):
             chan = salt.transport.server.PubServerChannel.factory(opts)
-            chan.publish(load)
+            chan.publish(load, minions=minions)
 
     @property
     def ssh_client(self):
@@ -29,6 +29,7 @@ from salt.utils.network import parse_host_port
 from salt.ext.six.moves import range
 from salt.utils.zeromq import zmq, ZMQDefaultLoop, install_zmq, ZMQ_VERSION_INFO
 import salt.transport.client
+import salt.transport.broker
 import salt.defaults.exitcodes
 
 from salt.utils.ctx import RequestContext
@@ -1132,6 +1133,7 @@ class Minion(MinionBase):
         self.ready = False
         self.jid_queue = [] if jid_queue is None else jid_queue
         self.periodic_callbacks = {}
+        self.request_broker = None
 
         if io_loop is None:
             install_zmq()
@@ -1552,6 +1554,9 @@ class Minion(MinionBase):
                 # let python reconstruct the minion on the other side if we're
                 # running on windows
                 instance = None
+            if self.request_broker is not None:
+                # The master may have changed since the last job
+                self.request_broker.advertise(self.opts)
             with default_signals(signal.SIGINT, signal.SIGTERM):
                 process = SignalHandlingMultiprocessingProcess(
                     target=self._target, args=(instance, self.opts, data, self.connected)
@@ -1690,6 +1695,12 @@ class Minion(MinionBase):
                     func = function_name
                     args, kwargs = data['arg'], data
                 minion_instance.functions.pack['__context__']['retcode'] = 0
+                if opts.get('state_return_batch_size', 0) > 0:
+                    # Let the state system send the results to the master
+                    # while the job runs. The streams are kept by jid, the
+                    # context is shared by the jobs run in threads.
+                    minion_instance.functions.pack['__context__'].setdefault(
+                        'state_streams', {})[data['jid']] = {}
                 if isinstance(executors, six.string_types):
                     executors = [executors]
                 elif not isinstance(executors, list) or not executors:
@@ -1812,10 +1823,13 @@ class Minion(MinionBase):
                 ret['metadata'] = data['metadata']
             else:
                 log.warning('The metadata parameter must be a dictionary. Ignoring.')
+        stream = minion_instance.functions.pack['__context__'].get(
+            'state_streams', {}).pop(data['jid'], None)
         if minion_instance.connected:
             minion_instance._return_pub(
                 ret,
-                timeout=minion_instance._return_retry_timer()
+                timeout=minion_instance._return_retry_timer(),
+                stream=stream
             )
 
         # Add default returners from minion config
@@ -1970,9 +1984,12 @@ class Minion(MinionBase):
                         data['jid'], exc
                     )
 
-    def _return_pub(self, ret, ret_cmd='_return', timeout=60, sync=True):
+    def _return_pub(self, ret, ret_cmd='_return', timeout=60, sync=True, stream=None):
         '''
         Return the data from the executed command to the master server
+
+        ``stream`` holds the state results already sent to the master while
+        the job was running, they are left out of the return.
         '''
         jid = ret.get('jid', ret.get('__jid__'))
         fun = ret.get('fun', ret.get('__fun__'))
@@ -2007,6 +2024,13 @@ class Minion(MinionBase):
                     'id': self.opts['id']}
             for key, value in six.iteritems(ret):
                 load[key] = value
+            if stream and stream.get('tags') and isinstance(ret.get('return'), dict):
+                # The master merges the partial returns back into this one
+                load['return'] = dict(
+                    (tag, value) for tag, value in six.iteritems(ret['return'])
+                    if tag not in stream['tags'])
+                load['stream'] = {'batches': stream['seq'],
+                                  'states': len(stream['tags'])}
 
         if 'out' in ret:
             if isinstance(ret['out'], six.string_types):
@@ -2797,6 +2821,10 @@ class Minion(MinionBase):
                 # Make sure there is a chance for one iteration to occur before connect
                 handle_schedule()
 
+        if self.opts['job_heartbeat_interval'] > 0 and 'job_heartbeat' not in self.periodic_callbacks:
+            new_periodic_callbacks['job_heartbeat'] = tornado.ioloop.PeriodicCallback(
+                    self._fire_job_heartbeat, self.opts['job_heartbeat_interval'] * 1000)
+
         if 'cleanup' not in self.periodic_callbacks:
             new_periodic_callbacks['cleanup'] = tornado.ioloop.PeriodicCallback(
                     self._fallback_cleanups, loop_interval * 1000)
@@ -2807,6 +2835,39 @@ class Minion(MinionBase):
 
         self.periodic_callbacks.update(new_periodic_callbacks)
 
+    def _fire_job_heartbeat(self):
+        '''
+        Tell the master which jobs are still running on the minion, for its
+        job tracker
+        '''
+        if not self.connected:
+            return
+        jids = sorted(set(job['jid'] for job in salt.utils.minion.running(self.opts)
+                          if 'jid' in job))
+        if jids:
+            self._fire_master({'jids': jids}, tagify(['heartbeat', self.opts['id']], 'job'), sync=False)
+
+    def setup_request_broker(self):
+        '''
+        Start the request broker the job processes send their requests to the
+        master through, when enabled.
+        This is safe to call multiple times.
+        '''
+        if self.request_broker is not None \
+                or not self.opts.get('minion_request_broker') \
+                or not self.opts['multiprocessing'] \
+                or self.opts.get('ipc_mode') == 'tcp' \
+                or salt.utils.platform.is_windows():
+            return
+        broker = salt.transport.broker.RequestBroker(self.opts, io_loop=self.io_loop)
+        try:
+            broker.start()
+        except Exception as exc:
+            log.error('Unable to start the minion request broker: %s', exc)
+            broker.close()
+            return
+        self.request_broker = broker
+
     # Main Minion Tune In
     def tune_in(self, start=True):
         '''
@@ -2839,6 +2900,8 @@ class Minion(MinionBase):
 
         self.setup_beacons()
         self.setup_scheduler()
+        if self.opts.get('master_type') != 'disable':
+            self.setup_request_broker()
 
         # schedule the stuff that runs every interval
         ping_interval = self.opts.get('ping_interval', 0) * 60
@@ -2943,6 +3006,9 @@ class Minion(MinionBase):
         if hasattr(self, 'periodic_callbacks'):
             for cb in six.itervalues(self.periodic_callbacks):
                 cb.stop()
+        if getattr(self, 'request_broker', None) is not None:
+            self.request_broker.close()
+            self.request_broker = None
 
     def __del__(self):
         self.destroy()
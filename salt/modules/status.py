@@ -1619,7 +1619,10 @@ def master(master=None, connected=True):
         return
 
     master_connection_status = False
-    port = __salt__['config.get']('publish_port', default=4505)
+    # The port the minion subscribes to, the master can send it to the
+    # port of a publisher shard
+    port = __opts__.get('master_publish_port') or \
+        __salt__['config.get']('publish_port', default=4505)
     connected_ips = salt.utils.network.remote_port_tcp(port)
 
     # Get connection status for master
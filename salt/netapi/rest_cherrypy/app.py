@@ -622,6 +622,7 @@ import salt
 import salt.auth
 import salt.exceptions
 import salt.utils.event
+import salt.utils.eventring
 import salt.utils.json
 import salt.utils.stringutils
 import salt.utils.versions
@@ -2218,7 +2219,7 @@ class Events(object):
 
         return False
 
-    def GET(self, token=None, salt_token=None):
+    def GET(self, token=None, salt_token=None, since=None):
         r'''
         An HTTP stream of the Salt master event bus
 
@@ -2239,6 +2240,12 @@ class Events(object):
                 *eauth token* (not to be confused with the token returned from
                 the /login URL). E.g.,
                 ``curl -NsS localhost:8000/events?salt_token=30742765``
+            :query since: **optional** sequence number of the last event
+                received, the stream starts with the events following it.
+                Requires the :conf_master:`event_ring_segments` master
+                option. The ``Last-Event-ID`` header sent by the
+                ``EventSource`` clients when they reconnect is used the same
+                way.
 
         **Example request:**
 
@@ -2301,6 +2308,19 @@ class Events(object):
           very busy and can quickly overwhelm the memory allocated to a
           browser tab.
 
+        When the event ring of the master is enabled with
+        :conf_master:`event_ring_segments`, each event also has an ``id``
+        field holding its sequence number. The ``EventSource`` clients send it
+        back when they reconnect, and the stream resumes with the events
+        published while they were disconnected, as long as they are still in
+        the ring.
+
+        .. code-block:: text
+
+            id: 1067
+            tag: salt/job/20130802115730568475/new
+            data: {'tag': 'salt/job/20130802115730568475/new', 'data': {'minions': ['ms-4', 'ms-3', 'ms-2', 'ms-1', 'ms-0']}}
+
         A full, working proof-of-concept JavaScript application is available
         :blob:`adjacent to this file <salt/netapi/rest_cherrypy/index.html>`.
         It can be viewed by pointing a browser at the ``/app`` endpoint in a
@@ -2358,6 +2378,13 @@ class Events(object):
         cherrypy.response.headers['Cache-Control'] = 'no-cache'
         cherrypy.response.headers['Connection'] = 'keep-alive'
 
+        since = since or cherrypy.request.headers.get('Last-Event-ID')
+        try:
+            since = int(since) if since else None
+        except ValueError:
+            raise cherrypy.HTTPError(400, 'since must be an event sequence number')
+        ring = salt.utils.eventring.get_event_ring(self.opts)
+
         def listen():
             '''
             An iterator to yield Salt events
@@ -2368,10 +2395,18 @@ class Events(object):
                     transport=self.opts['transport'],
                     opts=self.opts,
                     listen=True)
-            stream = event.iter_events(full=True, auto_reconnect=True)
 
             yield str('retry: 400\n')  # future lint: disable=blacklisted-function
 
+            if ring is not None:
+                # The events are read from the ring, the event bus only tells
+                # when there are new ones
+                for seq, tag, data in ring.iter_events(since, event=event):
+                    yield str('id: {0}\n').format(seq)  # future lint: disable=blacklisted-function
+                    yield str('tag: {0}\n').format(tag)  # future lint: disable=blacklisted-function
+                    yield str('data: {0}\n\n').format(salt.utils.json.dumps({'data': data, 'tag': tag}))  # future lint: disable=blacklisted-function
+
+            stream = event.iter_events(full=True, auto_reconnect=True)
             while True:
                 data = next(stream)
                 yield str('tag: {0}\n').format(data.get('tag', ''))  # future lint: disable=blacklisted-function
@@ -11,6 +11,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 import logging
 import gc
 import datetime
+import threading
 
 # Import salt libs
 import salt.log
@@ -20,6 +21,7 @@ import salt.utils.immutabletypes as immutabletypes
 import salt.utils.stringutils
 from salt.exceptions import SaltReqTimeoutError
 from salt.utils.data import CaseInsensitiveDict
+from salt.utils.thread_local_proxy import ThreadLocalProxy
 
 # Import third party libs
 from salt.ext import six
@@ -78,6 +80,84 @@ if HAS_MSGPACK and not hasattr(msgpack, 'exceptions'):
 
     msgpack.exceptions = exceptions()
 
+# The msgpack Packers of the current thread, by use_bin_type
+_PACKERS = threading.local()
+
+# The number of bytes read at a time when deserializing a file
+_UNPACKER_READ_SIZE = 64 * 1024
+
+# The Packers whose buffer grew past this size to serialize a large message
+# are dropped rather than holding on to the memory
+_PACKER_MAX_BUFFER_SIZE = 1024 * 1024
+
+
+def _ext_type_encoder(obj):
+    '''
+    Convert the objects msgpack does not know how to serialize
+    '''
+    obj = ThreadLocalProxy.unproxy(obj)
+    if isinstance(obj, six.integer_types):
+        # msgpack can't handle the very long Python longs for jids
+        # Convert any very long longs to strings
+        return six.text_type(obj)
+    elif isinstance(obj, (datetime.datetime, datetime.date)):
+        # msgpack doesn't support datetime.datetime and datetime.date datatypes.
+        # So here we have converted these types to custom datatype
+        # This is msgpack Extended types numbered 78
+        return msgpack.ExtType(78, salt.utils.stringutils.to_bytes(
+            obj.strftime('%Y%m%dT%H:%M:%S.%f')))
+    # The same for immutable types. Their items are frozen again when they
+    # are accessed, so serialize the structure they wrap instead to not call
+    # this function again for every nested dict and list.
+    elif isinstance(obj, (immutabletypes.ImmutableDict,
+                          immutabletypes.ImmutableList)):
+        return immutabletypes.thaw(obj)
+    elif isinstance(obj, immutabletypes.ImmutableSet):
+        return tuple(immutabletypes.thaw(obj))
+    elif isinstance(obj, set):
+        # msgpack can't handle set so translate it to tuple
+        return tuple(obj)
+    elif isinstance(obj, CaseInsensitiveDict):
+        return dict(obj)
+    # Nothing known exceptions found. Let msgpack raise it's own.
+    return obj
+
+
+def _ext_type_decoder(code, data):
+    '''
+    Convert the msgpack extended types serialized by _ext_type_encoder back
+    '''
+    if code == 78:
+        data = salt.utils.stringutils.to_unicode(data)
+        return datetime.datetime.strptime(data, '%Y%m%dT%H:%M:%S.%f')
+    return data
+
+
+def _pack(msg, use_bin_type):
+    '''
+    Serialize msg with the msgpack Packer of the current thread, creating a
+    Packer for every message costs more than packing most messages
+    '''
+    try:
+        packers = _PACKERS.packers
+    except AttributeError:
+        packers = _PACKERS.packers = {}
+    try:
+        packer = packers[use_bin_type]
+    except KeyError:
+        packer = packers[use_bin_type] = msgpack.Packer(
+            default=_ext_type_encoder, use_bin_type=use_bin_type)
+    try:
+        ret = packer.pack(msg)
+    except Exception:
+        # Older msgpack versions leave what was packed of the message in the
+        # buffer of the Packer
+        del packers[use_bin_type]
+        raise
+    if len(ret) > _PACKER_MAX_BUFFER_SIZE:
+        del packers[use_bin_type]
+    return ret
+
 
 def package(payload):
     '''
@@ -139,12 +219,6 @@ class Serial(object):
                          the contents cannot be converted.
         '''
         try:
-            def ext_type_decoder(code, data):
-                if code == 78:
-                    data = salt.utils.stringutils.to_unicode(data)
-                    return datetime.datetime.strptime(data, '%Y%m%dT%H:%M:%S.%f')
-                return data
-
             gc.disable()  # performance optimization for msgpack
             if msgpack.version >= (0, 4, 0):
                 # msgpack only supports 'encoding' starting in 0.4.0.
@@ -153,15 +227,15 @@ class Serial(object):
                 # of msgpack.
                 try:
                     ret = salt.utils.msgpack.loads(msg, use_list=True,
-                                                   ext_hook=ext_type_decoder,
+                                                   ext_hook=_ext_type_decoder,
                                                    encoding=encoding,
                                                    _msgpack_module=msgpack)
                 except UnicodeDecodeError:
                     # msg contains binary data
-                    ret = msgpack.loads(msg, use_list=True, ext_hook=ext_type_decoder)
+                    ret = msgpack.loads(msg, use_list=True, ext_hook=_ext_type_decoder)
             else:
                 ret = salt.utils.msgpack.loads(msg, use_list=True,
-                                               ext_hook=ext_type_decoder,
+                                               ext_hook=_ext_type_decoder,
                                                _msgpack_module=msgpack)
             if six.PY3 and encoding is None and not raw:
                 ret = salt.transport.frame.decode_embedded_strs(ret)
@@ -191,6 +265,57 @@ class Serial(object):
             else:
                 return self.loads(data)
 
+    def load_iter(self, fn_, read_size=_UNPACKER_READ_SIZE):
+        '''
+        Deserialize the msgpack messages in the named file object one by one,
+        like ``load`` does for a file holding a single message, without
+        reading the whole file in memory first. The file object is closed
+        once every message has been yielded.
+
+        :param read_size: The number of bytes read from the file at a time
+        '''
+        encoding = 'utf-8' if six.PY3 else None
+        try:
+            start = fn_.tell()
+            while True:
+                unpacker = self._unpacker(fn_, read_size, encoding)
+                offset = 0
+                try:
+                    for msg in unpacker:
+                        offset = unpacker.tell()
+                        yield msg
+                    return
+                except UnicodeDecodeError:
+                    if encoding is None or not hasattr(unpacker, 'tell'):
+                        raise
+                # The message contains binary data, load it without decoding
+                # its strings like loads does, then go on with the next one
+                fn_.seek(start + offset)
+                unpacker = self._unpacker(fn_, read_size, None)
+                yield next(unpacker)
+                start += offset + unpacker.tell()
+                fn_.seek(start)
+        finally:
+            fn_.close()
+
+    @staticmethod
+    def _unpacker(fn_, read_size, encoding):
+        '''
+        Return a msgpack Unpacker reading the named file object
+        '''
+        kwargs = {}
+        if encoding is not None and msgpack.version >= (0, 4, 0):
+            kwargs['encoding'] = encoding
+        # Newer msgpack versions limit the size of the strings, lists and
+        # maps to a fraction of max_buffer_size, the messages of a file are
+        # only limited by the size of the file.
+        return msgpack.Unpacker(fn_,
+                                read_size=read_size,
+                                max_buffer_size=2**31 - 1,
+                                use_list=True,
+                                ext_hook=_ext_type_decoder,
+                                **kwargs)
+
     def dumps(self, msg, use_bin_type=False):
         '''
         Run the correct dumps serialization format
@@ -201,41 +326,15 @@ class Serial(object):
                              Since this changes the wire protocol, this
                              option should not be used outside of IPC.
         '''
-        def ext_type_encoder(obj):
-            if isinstance(obj, six.integer_types):
-                # msgpack can't handle the very long Python longs for jids
-                # Convert any very long longs to strings
-                return six.text_type(obj)
-            elif isinstance(obj, (datetime.datetime, datetime.date)):
-                # msgpack doesn't support datetime.datetime and datetime.date datatypes.
-                # So here we have converted these types to custom datatype
-                # This is msgpack Extended types numbered 78
-                return msgpack.ExtType(78, salt.utils.stringutils.to_bytes(
-                    obj.strftime('%Y%m%dT%H:%M:%S.%f')))
-            # The same for immutable types
-            elif isinstance(obj, immutabletypes.ImmutableDict):
-                return dict(obj)
-            elif isinstance(obj, immutabletypes.ImmutableList):
-                return list(obj)
-            elif isinstance(obj, (set, immutabletypes.ImmutableSet)):
-                # msgpack can't handle set so translate it to tuple
-                return tuple(obj)
-            elif isinstance(obj, CaseInsensitiveDict):
-                return dict(obj)
-            # Nothing known exceptions found. Let msgpack raise it's own.
-            return obj
-
         try:
-            if msgpack.version >= (0, 4, 0):
+            if msgpack.version >= (0, 4, 0) and hasattr(msgpack, 'Packer'):
                 # msgpack only supports 'use_bin_type' starting in 0.4.0.
                 # Due to this, if we don't need it, don't pass it at all so
                 # that under Python 2 we can still work with older versions
                 # of msgpack.
-                return salt.utils.msgpack.dumps(msg, default=ext_type_encoder,
-                                                use_bin_type=use_bin_type,
-                                                _msgpack_module=msgpack)
+                return _pack(msg, use_bin_type)
             else:
-                return salt.utils.msgpack.dumps(msg, default=ext_type_encoder,
+                return salt.utils.msgpack.dumps(msg, default=_ext_type_encoder,
                                                 _msgpack_module=msgpack)
         except (OverflowError, msgpack.exceptions.PackValueError):
             # msgpack<=0.4.6 don't call ext encoder on very long integers raising the error instead.
@@ -265,11 +364,11 @@ class Serial(object):
 
             msg = verylong_encoder(msg, set())
             if msgpack.version >= (0, 4, 0):
-                return salt.utils.msgpack.dumps(msg, default=ext_type_encoder,
+                return salt.utils.msgpack.dumps(msg, default=_ext_type_encoder,
                                                 use_bin_type=use_bin_type,
                                                 _msgpack_module=msgpack)
             else:
-                return salt.utils.msgpack.dumps(msg, default=ext_type_encoder,
+                return salt.utils.msgpack.dumps(msg, default=_ext_type_encoder,
                                                 _msgpack_module=msgpack)
 
     def dump(self, msg, fn_):
@@ -405,7 +405,8 @@ class Pillar(object):
             self.functions = functions
 
         self.matchers = salt.loader.matchers(self.opts)
-        self.rend = salt.loader.render(self.opts, self.functions)
+        self.rend = salt.loader.render(self.opts, self.functions,
+                                       context={'jinja_env_cache': {}})
         ext_pillar_opts = copy.deepcopy(self.opts)
         # Keep the incoming opts ID intact, ie, the master id
         if 'id' in opts:
@@ -1022,7 +1023,8 @@ class Pillar(object):
         if ext:
             if self.opts.get('ext_pillar_first', False):
                 self.opts['pillar'], errors = self.ext_pillar(self.pillar_override)
-                self.rend = salt.loader.render(self.opts, self.functions)
+                self.rend = salt.loader.render(self.opts, self.functions,
+                                               context={'jinja_env_cache': {}})
                 matches = self.top_matches(top)
                 pillar, errors = self.render_pillar(matches, errors=errors)
                 pillar = merge(
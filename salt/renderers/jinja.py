@@ -56,9 +56,23 @@ def render(template_file, saltenv='base', sls='', argline='',
             'Unknown renderer option: {opt}'.format(opt=argline)
         )
 
+    env_cache = __context__.get('jinja_env_cache') if isinstance(__context__, dict) else None
+    if env_cache is not None:
+        # Reuse the Jinja environment for every template rendered during the
+        # state run or the pillar compilation which created the loader
+        kws.setdefault('_jinja_env_cache', env_cache)
+        # The same salt object for every render, for the templates imported
+        # once per session to be reused
+        split = __context__.get('jinja_salt')
+        if split is None or split[0] is not __salt__:
+            split = __context__['jinja_salt'] = (__salt__, _split_module_dicts())
+        salt_dict = split[1]
+    else:
+        salt_dict = _split_module_dicts()
+
     tmp_data = salt.utils.templates.JINJA(template_file,
                                           to_str=True,
-                                          salt=_split_module_dicts(),
+                                          salt=salt_dict,
                                           grains=__grains__,
                                           opts=__opts__,
                                           pillar=__pillar__,
@@ -42,6 +42,10 @@ SYNDIC_MINIONS_P = '.minions.{0}.p'
 RETURN_P = 'return.p'
 # out is the "out" from the minion data
 OUT_P = 'out.p'
+# the state results a minion sends while its job is running, one file per
+# batch under PARTIAL_DIR/<minion id>/
+PARTIAL_DIR = '.partial'
+PARTIAL_P = '{0}.p'
 # endtime is the end time for a job, not stored as msgpack
 ENDTIME = 'endtime'
 
@@ -183,6 +187,71 @@ def returner(load):
             )
         )
 
+    # The partial returns are part of the return now
+    partial_dir = os.path.join(jid_dir, PARTIAL_DIR, load['id'])
+    if os.path.isdir(partial_dir):
+        shutil.rmtree(partial_dir, ignore_errors=True)
+
+
+def save_partial_return(jid, minion_id, seq, ret):
+    '''
+    Save a batch of results sent by a minion while the job is running. The
+    batches are read back by get_partial_returns when the minion returns.
+
+    Returns False if the job is not in the cache.
+    '''
+    jid_dir = salt.utils.jid.jid_dir(jid, _job_dir(), __opts__['hash_type'])
+    if not os.path.isdir(jid_dir) \
+            or os.path.exists(os.path.join(jid_dir, 'nocache')) \
+            or os.path.exists(os.path.join(jid_dir, minion_id, RETURN_P)):
+        return False
+
+    partial_dir = os.path.join(jid_dir, PARTIAL_DIR, minion_id)
+    try:
+        os.makedirs(partial_dir)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            log.error('Failed to create %s: %s', partial_dir, exc)
+            return False
+
+    serial = salt.payload.Serial(__opts__)
+    try:
+        with salt.utils.atomicfile.atomic_open(
+                os.path.join(partial_dir, PARTIAL_P.format(int(seq))), 'w+b') as wfh:
+            serial.dump(ret, wfh)
+    except (IOError, OSError, ValueError) as exc:
+        log.error('Failed to store the partial return %s of %s for job %s: %s',
+                  seq, minion_id, jid, exc)
+        return False
+    return True
+
+
+def get_partial_returns(jid, minion_id):
+    '''
+    Return the results a minion sent while the job was running, merged in the
+    order they were sent
+    '''
+    jid_dir = salt.utils.jid.jid_dir(jid, _job_dir(), __opts__['hash_type'])
+    partial_dir = os.path.join(jid_dir, PARTIAL_DIR, minion_id)
+    ret = {}
+    if not os.path.isdir(partial_dir):
+        return ret
+
+    serial = salt.payload.Serial(__opts__)
+    batches = []
+    for fn_ in os.listdir(partial_dir):
+        seq, ext = os.path.splitext(fn_)
+        if ext == '.p' and seq.isdigit():
+            batches.append(int(seq))
+    for seq in sorted(batches):
+        path = os.path.join(partial_dir, PARTIAL_P.format(seq))
+        try:
+            with salt.utils.files.fopen(path, 'rb') as rfh:
+                ret.update(serial.load(rfh))
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error('Failed to read the partial return %s: %s', path, exc)
+    return ret
+
 
 def save_load(jid, clear_load, minions=None, recurse_count=0):
     '''
@@ -337,38 +406,48 @@ def get_jid(jid):
     '''
     Return the information returned when the specified job id was executed
     '''
+    return dict(get_jid_iter(jid))
+
+
+def get_jid_iter(jid):
+    '''
+    .. versionadded:: Neon
+
+    Yield the ``(minion_id, return)`` pairs of the specified job id one minion
+    at a time, to not hold the returns of every minion in memory at once
+    '''
     jid_dir = salt.utils.jid.jid_dir(jid, _job_dir(), __opts__['hash_type'])
     serial = salt.payload.Serial(__opts__)
 
-    ret = {}
-    # Check to see if the jid is real, if not return the empty dict
+    # Check to see if the jid is real, if not there are no returns
     if not os.path.isdir(jid_dir):
-        return ret
+        return
     for fn_ in os.listdir(jid_dir):
         if fn_.startswith('.'):
             continue
-        if fn_ not in ret:
-            retp = os.path.join(jid_dir, fn_, RETURN_P)
-            outp = os.path.join(jid_dir, fn_, OUT_P)
-            if not os.path.isfile(retp):
+        retp = os.path.join(jid_dir, fn_, RETURN_P)
+        outp = os.path.join(jid_dir, fn_, OUT_P)
+        if not os.path.isfile(retp):
+            continue
+        while True:
+            try:
+                with salt.utils.files.fopen(retp, 'rb') as rfh:
+                    # An empty file loads as None, like with serial.load
+                    ret_data = next(serial.load_iter(rfh), None)
+                if not isinstance(ret_data, dict) or 'return' not in ret_data:
+                    # Convert the old format in which return.p contains the only return data to
+                    # the new that is dict containing 'return' and optionally 'retcode' and
+                    # 'success'.
+                    ret_data = {'return': ret_data}
+                if os.path.isfile(outp):
+                    with salt.utils.files.fopen(outp, 'rb') as rfh:
+                        ret_data['out'] = serial.load(rfh)
+            except Exception as exc:
+                if 'Permission denied:' in six.text_type(exc):
+                    raise
                 continue
-            while fn_ not in ret:
-                try:
-                    with salt.utils.files.fopen(retp, 'rb') as rfh:
-                        ret_data = serial.load(rfh)
-                    if not isinstance(ret_data, dict) or 'return' not in ret_data:
-                        # Convert the old format in which return.p contains the only return data to
-                        # the new that is dict containing 'return' and optionally 'retcode' and
-                        # 'success'.
-                        ret_data = {'return': ret_data}
-                    ret[fn_] = ret_data
-                    if os.path.isfile(outp):
-                        with salt.utils.files.fopen(outp, 'rb') as rfh:
-                            ret[fn_]['out'] = serial.load(rfh)
-                except Exception as exc:
-                    if 'Permission denied:' in six.text_type(exc):
-                        raise
-    return ret
+            break
+        yield fn_, ret_data
 
 
 def get_jids():
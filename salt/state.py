@@ -28,6 +28,7 @@ import random
 import collections
 
 # Import salt libs
+import salt.crypt
 import salt.loader
 import salt.minion
 import salt.pillar
@@ -760,6 +761,7 @@ class State(object):
         self.instance_id = six.text_type(id(self))
         self.inject_globals = {}
         self.mocked = mocked
+        self._stream = None
 
     def _gather_pillar(self):
         '''
@@ -993,7 +995,8 @@ class State(object):
         self.serializers = salt.loader.serializers(self.opts)
         self._load_states()
         self.rend = salt.loader.render(self.opts, self.functions,
-                                       states=self.states, proxy=self.proxy)
+                                       states=self.states, proxy=self.proxy,
+                                       context={'jinja_env_cache': {}})
 
     def module_refresh(self):
         '''
@@ -2499,6 +2502,71 @@ class State(object):
             preload = {'jid': self.jid}
             ev_func(ret, tag, preload=preload)
 
+    def _start_stream(self):
+        '''
+        Start sending the results of this state run to the master in batches,
+        if the minion asked for it by adding the jid to ``state_streams`` in
+        the context of the job (see :conf_minion:`state_return_batch_size`)
+        '''
+        self._stream = None
+        streams = self.state_con.get('state_streams')
+        stream = streams.get(self.jid) if isinstance(streams, dict) else None
+        if not isinstance(stream, dict):
+            return
+        if 'tags' in stream:
+            # This state run is nested in another one, which already streams
+            # the results of the job
+            return
+        stream['tags'] = set()
+        stream['seq'] = 0
+        self._stream = stream
+        self._stream_batch = {}
+
+    def stream_result(self, tag, result):
+        '''
+        Queue the result of a state to be sent to the master, and send the
+        queued results once there are ``state_return_batch_size`` of them
+        '''
+        if self._stream is None or 'proc' in result:
+            # Parallel states are only part of the final return
+            return
+        self._stream_batch[tag] = result
+        if len(self._stream_batch) >= self.opts.get('state_return_batch_size', 0):
+            self.flush_results()
+
+    def flush_results(self):
+        '''
+        Send the queued results to the master with a ``_return_partial`` call.
+        The results the master stored are left out of the final return. If the
+        master did not store them, streaming stops and the results are all
+        part of the final return.
+        '''
+        if self._stream is None or not self._stream_batch:
+            return
+        load = {'cmd': '_return_partial',
+                'id': self.opts['id'],
+                'jid': self.jid,
+                'seq': self._stream['seq'],
+                'return': self._stream_batch}
+        channel = salt.transport.client.ReqChannel.factory(self.opts)
+        try:
+            load['tok'] = salt.crypt.SAuth(self.opts).gen_token(b'salt')
+            stored = channel.send(load)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.debug('Failed to send state results to the master: %s', exc)
+            stored = False
+        finally:
+            channel.close()
+        if stored is True:
+            self._stream['tags'].update(self._stream_batch)
+            self._stream['seq'] += 1
+            self._stream_batch = {}
+        else:
+            log.debug('The master did not store the partial return of job %s, '
+                      'sending the remaining results with the final return',
+                      self.jid)
+            self._stream = None
+
     def call_chunk(self, low, running, chunks):
         '''
         Check if a chunk has any requires, execute the requires and then
@@ -2587,6 +2655,8 @@ class State(object):
                                  '__sls__': low['__sls__']}
                 self.__run_num += 1
                 self.event(run_dict[tag], len(chunks), fire_event=low.get('fire_event'))
+                if run_dict is running:
+                    self.stream_result(tag, running[tag])
                 return running
             for chunk in reqs:
                 # Check to see if the chunk has been run, only run it if
@@ -2612,6 +2682,7 @@ class State(object):
                                     '__sls__': low['__sls__']}
                         self.__run_num += 1
                         self.event(running[tag], len(chunks), fire_event=low.get('fire_event'))
+                        self.stream_result(tag, running[tag])
                         return running
                     running = self.call_chunk(chunk, running, chunks)
                     if self.check_failhard(chunk, running):
@@ -2727,6 +2798,7 @@ class State(object):
         if tag in running:
             running[tag]['__saltfunc__'] = '{0}.{1}'.format(low['state'], low['fun'])
             self.event(running[tag], len(chunks), fire_event=low.get('fire_event'))
+            self.stream_result(tag, running[tag])
         return running
 
     def call_listen(self, chunks, running):
@@ -2849,8 +2921,11 @@ class State(object):
         # the low data chunks
         if errors:
             return errors
+        self._start_stream()
         ret = self.call_chunks(chunks)
         ret = self.call_listen(chunks, ret)
+        self.flush_results()
+        self._stream = None
 
         def _cleanup_accumulator_data():
             accum_data_path = os.path.join(
@@ -4,9 +4,12 @@ Encapsulate the different transports available to Salt.
 '''
 # Import Python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import hashlib
 import logging
+import os
 
 # Import Salt libs
+import salt.utils.stringutils
 import salt.utils.versions
 
 # Import third party libs
@@ -33,6 +36,56 @@ def iter_transport_opts(opts):
         yield opts['transport'], opts
 
 
+def publish_shard_count(opts):
+    '''
+    Return the number of publisher processes the master runs, as set by
+    ``publish_shards``
+    '''
+    try:
+        return max(int(opts.get('publish_shards', 1)), 1)
+    except (TypeError, ValueError):
+        log.warning(
+            'publish_shards is not correctly set, the option should be an '
+            'integer greater than 0 but is instead %s', opts['publish_shards']
+        )
+        return 1
+
+
+def publish_shard(opts, minion_id):
+    '''
+    Return the publisher shard the minion with the given id subscribes to
+    '''
+    shards = publish_shard_count(opts)
+    if shards == 1:
+        return 0
+    digest = hashlib.sha1(salt.utils.stringutils.to_bytes(minion_id)).hexdigest()
+    return int(digest, 16) % shards
+
+
+def publish_shard_port(opts, shard=0):
+    '''
+    Return the port the publisher shard listens on, the first shard listens on
+    ``publish_port`` and the others on the ports from ``publish_shard_port``
+    '''
+    if shard == 0:
+        return int(opts['publish_port'])
+    return int(opts.get('publish_shard_port', 4530)) + shard - 1
+
+
+def publish_pull_path(opts, shard=0):
+    '''
+    Return the port (when ``ipc_mode`` is ``tcp``) or the path of the socket
+    the publisher shard receives the loads to publish on
+    '''
+    if opts.get('ipc_mode', '') == 'tcp':
+        if shard == 0:
+            return int(opts.get('tcp_master_publish_pull', 4514))
+        return int(opts.get('tcp_master_publish_pull_shard', 4540)) + shard - 1
+    if shard == 0:
+        return os.path.join(opts['sock_dir'], 'publish_pull.ipc')
+    return os.path.join(opts['sock_dir'], 'publish_pull_{0}.ipc'.format(shard))
+
+
 # for backwards compatibility
 class Channel(object):
     @staticmethod
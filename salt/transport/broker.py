@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+'''
+A request broker for the job processes of a minion
+
+The minion process serves the requests its job processes send to the master,
+such as job returns, pillar and file requests, over an IPC socket. It forwards
+them through the channel it keeps connected to the master, so that the job
+processes do not connect and authenticate to the master for every job.
+'''
+
+# Import Python Libs
+from __future__ import absolute_import, print_function, unicode_literals
+import hashlib
+import logging
+import os
+
+# Import Tornado Libs
+import tornado.gen
+import tornado.ioloop
+import tornado.iostream
+
+# Import Salt Libs
+import salt.crypt
+import salt.payload
+import salt.transport.client
+import salt.transport.ipc
+import salt.utils.stringutils
+from salt.exceptions import SaltClientError, SaltReqTimeoutError
+from salt.ext import six
+
+log = logging.getLogger(__name__)
+
+# The brokers started by this process or by the parents it was forked from,
+# as (pid, socket path) by the key of the channels they serve
+_BROKERS = {}
+
+
+def _channel_key(opts):
+    '''
+    Return the key of the channels to the master opts points to
+    '''
+    return (opts['pki_dir'], opts['id'], opts.get('master_uri'))
+
+
+def socket_path(opts):
+    '''
+    Return the path of the socket of the request broker of the minion
+    '''
+    hash_ = hashlib.sha256(salt.utils.stringutils.to_bytes(
+        '{0}-{1}'.format(opts['id'], opts.get('master')))).hexdigest()[:10]
+    return os.path.join(opts['sock_dir'], 'minion_req_{0}.ipc'.format(hash_))
+
+
+def get_broker(opts, **kwargs):
+    '''
+    Return the socket path of the request broker a request channel created
+    with opts and kwargs should send its requests through, or ``None`` when
+    the channel should connect to the master itself.
+
+    Only the processes forked from the minion process running the broker use
+    it, and only for the encrypted requests to the master of the minion. The
+    requests to an explicit ``master_uri`` are sent to that master directly.
+    '''
+    if kwargs.get('crypt', 'aes') != 'aes' or 'master_uri' in kwargs:
+        return None
+    broker = _BROKERS.get(_channel_key(opts))
+    if broker is None or broker[0] == os.getpid():
+        return None
+    return broker[1]
+
+
+def _dumps(serial, msg):
+    '''
+    Serialize a message sent over the socket of the broker
+    '''
+    return serial.dumps(msg, use_bin_type=six.PY3)
+
+
+def _loads(serial, msg):
+    '''
+    Deserialize a message received over the socket of the broker
+    '''
+    if six.PY3:
+        return serial.loads(msg, encoding='utf-8')
+    return serial.loads(msg)
+
+
+@tornado.gen.coroutine
+def _forward(channel, req):
+    '''
+    Send the request a job process passed to the broker through channel
+    '''
+    if req['cmd'] == 'crypted_transfer_decode_dictentry':
+        ret = yield channel.crypted_transfer_decode_dictentry(
+            req['load'],
+            dictkey=req['dictkey'],
+            tries=req['tries'],
+            timeout=req['timeout'])
+    else:
+        ret = yield channel.send(
+            req['load'],
+            tries=req['tries'],
+            timeout=req['timeout'],
+            raw=req['raw'])
+    raise tornado.gen.Return(ret)
+
+
+class RequestBroker(object):
+    '''
+    Serve the requests of the job processes of a minion over an IPC socket,
+    through a channel to the master shared by all of them
+
+    :param dict opts: The options of the minion
+    :param IOLoop io_loop: The ioloop of the minion
+    '''
+    def __init__(self, opts, io_loop=None):
+        self.opts = opts
+        self.io_loop = io_loop or tornado.ioloop.IOLoop.current()
+        self.socket_path = socket_path(opts)
+        self.serial = salt.payload.Serial(opts)
+        self.server = None
+        self.channel = None
+        self._master_uri = None
+
+    def start(self):
+        '''
+        Bind the socket of the broker and advertise it to the job processes
+        '''
+        self.server = salt.transport.ipc.IPCServer(
+            self.opts,
+            self.socket_path,
+            io_loop=self.io_loop,
+            payload_handler=self.handle_request)
+        self.server.start()
+        self.advertise()
+        log.debug('Minion request broker listening on %s', self.socket_path)
+
+    def advertise(self, opts=None):
+        '''
+        Make the job processes forked from now on send their requests through
+        the broker. The options of the minion are updated to opts when given,
+        since the master they point to changes on failover.
+        '''
+        if opts is not None:
+            self.opts = opts
+        for key, (_, path) in list(six.iteritems(_BROKERS)):
+            if path == self.socket_path:
+                del _BROKERS[key]
+        _BROKERS[_channel_key(self.opts)] = (os.getpid(), self.socket_path)
+
+    def _get_channel(self):
+        '''
+        Return the channel to the master, connected once and kept open for
+        the next requests
+        '''
+        if self.channel is not None and self._master_uri != self.opts.get('master_uri'):
+            # The minion failed over to another master
+            self.channel.close()
+            self.channel = None
+        if self.channel is None:
+            self._master_uri = self.opts.get('master_uri')
+            self.channel = salt.transport.client.AsyncReqChannel.factory(
+                self.opts, io_loop=self.io_loop, broker=False)
+        return self.channel
+
+    @tornado.gen.coroutine
+    def handle_request(self, body, write_callback):
+        '''
+        Forward a request from a job process to the master, and pass the
+        reply back
+        '''
+        try:
+            req = _loads(self.serial, body)
+            ret = yield _forward(self._get_channel(), req)
+            reply = {'ret': ret}
+        except SaltReqTimeoutError as exc:
+            reply = {'error': 'timeout', 'message': six.text_type(exc)}
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error('Failed to forward a request to the master: %s', exc)
+            reply = {'error': 'error', 'message': six.text_type(exc)}
+        yield write_callback(_dumps(self.serial, reply))
+
+    def close(self):
+        '''
+        Stop serving requests and close the channel to the master
+        '''
+        for key, (_, path) in list(six.iteritems(_BROKERS)):
+            if path == self.socket_path:
+                del _BROKERS[key]
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+        if self.channel is not None:
+            self.channel.close()
+            self.channel = None
+
+
+class AsyncBrokerReqChannel(salt.transport.client.AsyncReqChannel):
+    '''
+    Send the requests of a job process through the request broker of the
+    minion. The requests are sent to the master directly when the broker
+    cannot be reached.
+
+    :param dict opts: The options of the minion
+    :param str socket_path: The path of the socket of the broker
+    '''
+    def __init__(self, opts, socket_path, **kwargs):  # pylint: disable=redefined-outer-name
+        self.opts = opts
+        self.socket_path = socket_path
+        self.crypt = 'aes'
+        self.io_loop = kwargs.get('io_loop') or tornado.ioloop.IOLoop.current()
+        self.kwargs = kwargs
+        self.serial = salt.payload.Serial(opts)
+        self.client = None
+        self._auth = None
+
+    @property
+    def auth(self):
+        '''
+        The authentication of the job process with the master, used to sign
+        the tokens of its requests. It is only set up when first needed.
+        '''
+        if self._auth is None:
+            self._auth = salt.crypt.AsyncAuth(self.opts, io_loop=self.io_loop)
+        return self._auth
+
+    @tornado.gen.coroutine
+    def _send_direct(self, req):
+        '''
+        Send a request to the master without going through the broker
+        '''
+        channel = salt.transport.client.AsyncReqChannel.factory(
+            self.opts, broker=False, **self.kwargs)
+        try:
+            ret = yield _forward(channel, req)
+        finally:
+            channel.close()
+        raise tornado.gen.Return(ret)
+
+    @tornado.gen.coroutine
+    def _request(self, req):
+        '''
+        Send a request through the broker and return the reply of the master
+        '''
+        if self.client is None:
+            self.client = salt.transport.ipc.IPCRequestClient(
+                self.socket_path, io_loop=self.io_loop)
+        try:
+            if not self.client.connected():
+                yield self.client.connect()
+        except Exception as exc:  # pylint: disable=broad-except
+            log.warning(
+                'Unable to connect to the minion request broker at %s, '
+                'sending the request to the master directly: %s',
+                self.socket_path, exc
+            )
+            ret = yield self._send_direct(req)
+            raise tornado.gen.Return(ret)
+
+        # The broker makes as many tries as the channel would, and may have to
+        # authenticate with the master first
+        timeout = req['timeout'] * req['tries'] + self.opts.get('auth_timeout', 60)
+        try:
+            reply = yield self.client.send(_dumps(self.serial, req), timeout=timeout)
+        except tornado.ioloop.TimeoutError:
+            raise SaltReqTimeoutError('Message timed out')
+        except tornado.iostream.StreamClosedError:
+            raise SaltReqTimeoutError('The minion request broker closed the connection')
+        reply = _loads(self.serial, reply)
+        if 'error' in reply:
+            if reply['error'] == 'timeout':
+                raise SaltReqTimeoutError(reply['message'])
+            raise SaltClientError(reply['message'])
+        raise tornado.gen.Return(reply['ret'])
+
+    def send(self, load, tries=3, timeout=60, raw=False):
+        '''
+        Send "load" to the master.
+        '''
+        return self._request({'cmd': 'send',
+                              'load': load,
+                              'tries': tries,
+                              'timeout': timeout,
+                              'raw': raw})
+
+    def crypted_transfer_decode_dictentry(self, load, dictkey=None, tries=3, timeout=60):
+        '''
+        Send "load" to the master in a way that the load is only readable by
+        the minion and the master (not other minions etc.)
+        '''
+        return self._request({'cmd': 'crypted_transfer_decode_dictentry',
+                              'load': load,
+                              'dictkey': dictkey,
+                              'tries': tries,
+                              'timeout': timeout})
+
+    def close(self):
+        '''
+        Close the connection to the broker
+        '''
+        if self.client is not None:
+            self.client.close()
+            self.client = None
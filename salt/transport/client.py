@@ -93,6 +93,14 @@ class AsyncReqChannel(AsyncChannel):
     '''
     @classmethod
     def factory(cls, opts, **kwargs):
+        # The job processes of a minion send their requests through the
+        # request broker of the minion, unless asked not to
+        if kwargs.pop('broker', True) and opts.get('minion_request_broker'):
+            import salt.transport.broker
+            socket_path = salt.transport.broker.get_broker(opts, **kwargs)
+            if socket_path is not None:
+                return salt.transport.broker.AsyncBrokerReqChannel(opts, socket_path, **kwargs)
+
         # Default to ZeroMQ for now
         ttype = 'zeromq'
 
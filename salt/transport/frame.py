@@ -4,9 +4,34 @@ Helper functions for transport components to handle message framing
 '''
 # Import python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import zlib
+
 import salt.utils.msgpack
 from salt.ext import six
 
+try:
+    import lz4.frame
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
+
+def _zlib_decompress(data, max_length):
+    return zlib.decompressobj().decompress(data, max_length)
+
+
+def _lz4_decompress(data, max_length):
+    return lz4.frame.LZ4FrameDecompressor().decompress(
+        data, max_length=max_length or -1)
+
+
+# The algorithms the payloads can be compressed with, as
+# (compress, decompress) functions, decompress returns at most max_length
+# bytes, or everything when max_length is 0
+COMPRESSORS = {'zlib': (zlib.compress, _zlib_decompress)}
+if HAS_LZ4:
+    COMPRESSORS['lz4'] = (lz4.frame.compress, _lz4_decompress)
+
 
 def frame_msg(body, header=None, raw_body=False):  # pylint: disable=unused-argument
     '''
@@ -110,3 +135,28 @@ def decode_embedded_strs(src):
             return src
     else:
         return src
+
+
+def compress(data, algorithm):
+    '''
+    Compress the bytes ``data`` with the given algorithm
+    '''
+    return COMPRESSORS[algorithm][0](data)
+
+
+def decompress(data, algorithm, max_size=0):
+    '''
+    Decompress the bytes ``data`` with the given algorithm
+
+    :param int max_size: Raise a ``ValueError`` rather than decompress more
+        than this number of bytes, 0 for no limit
+    '''
+    if not max_size:
+        return COMPRESSORS[algorithm][1](data, 0)
+    # Decompress one more byte than allowed to find out the oversized data
+    # without decompressing all of it
+    ret = COMPRESSORS[algorithm][1](data, max_size + 1)
+    if len(ret) > max_size:
+        raise ValueError(
+            'The decompressed data is larger than {0} bytes'.format(max_size))
+    return ret
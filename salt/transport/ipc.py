@@ -474,6 +474,84 @@ class IPCMessageClient(IPCClient):
         yield self.stream.write(pack)
 
 
+class IPCRequestClient(IPCClient):
+    '''
+    Salt IPC request client
+
+    Send messages to an IPCServer and wait for the replies its
+    ``payload_handler`` passes to the ``write_callback`` it is given. Several
+    requests can wait for their reply at once on the same connection.
+    '''
+    def __singleton_init__(self, socket_path, io_loop=None):
+        super(IPCRequestClient, self).__singleton_init__(socket_path, io_loop=io_loop)
+        self._mid = 0
+        self._futures = {}
+        self._reading = False
+
+    @tornado.gen.coroutine
+    def send(self, msg, timeout=None):
+        '''
+        Send a message to an IPC socket and return the reply to it
+
+        If the socket is not currently connected, a connection will be
+        established, a failure to connect is raised right away.
+
+        :param msg: The message to be sent
+        :param int timeout: The number of seconds to wait for the reply,
+            ``tornado.ioloop.TimeoutError`` is raised past it
+        '''
+        if not self.connected():
+            yield self.connect()
+        if not self._reading:
+            self._reading = True
+            self.io_loop.spawn_callback(self._read_replies, self.stream)
+        self._mid += 1
+        mid = self._mid
+        future = self._futures[mid] = tornado.concurrent.Future()
+        try:
+            pack = salt.transport.frame.frame_msg_ipc(
+                msg,
+                header={'mid': mid},
+                raw_body=True,
+            )
+            yield self.stream.write(pack)
+            if timeout is not None:
+                future = FutureWithTimeout(self.io_loop, future, timeout)
+            ret = yield future
+        finally:
+            self._futures.pop(mid, None)
+        raise tornado.gen.Return(ret)
+
+    @tornado.gen.coroutine
+    def _read_replies(self, stream):
+        '''
+        Pass the replies read from stream to the requests waiting for them
+        '''
+        if six.PY2:
+            encoding = None
+        else:
+            encoding = 'utf-8'
+        unpacker = msgpack.Unpacker(encoding=encoding)
+        try:
+            while not stream.closed():
+                wire_bytes = yield stream.read_bytes(4096, partial=True)
+                unpacker.feed(wire_bytes)
+                for framed_msg in unpacker:
+                    future = self._futures.get(framed_msg['head'].get('mid'))
+                    if future is not None and not future.done():
+                        future.set_result(framed_msg['body'])
+        except tornado.iostream.StreamClosedError:
+            log.trace('IPC server %s closed the connection', self.socket_path)
+        except Exception as exc:
+            log.error('Exception occurred while reading replies: %s', exc)
+            stream.close()
+        finally:
+            self._reading = False
+            for future in list(self._futures.values()):
+                if not future.done():
+                    future.set_exception(tornado.iostream.StreamClosedError())
+
+
 class IPCMessageServer(IPCServer):
     '''
     Salt IPC message server
@@ -9,6 +9,7 @@ import os
 import hashlib
 import shutil
 import binascii
+import time
 
 # Import Salt Libs
 import salt.crypt
@@ -18,6 +19,7 @@ import salt.transport.frame
 import salt.utils.event
 import salt.utils.files
 import salt.utils.minions
+import salt.utils.process
 import salt.utils.stringutils
 import salt.utils.verify
 from salt.utils.cache import CacheCli
@@ -87,6 +89,12 @@ class AESReqServerMixin(object):
                 ),
                 'reload': salt.crypt.Crypticle.generate_key_string
             }
+        # The pids of the workers authenticating a minion, shared by all the
+        # workers to keep the others serving the other requests
+        if self.opts.get('auth_workers', 0) > 0:
+            self._auth_slots = multiprocessing.Array(ctypes.c_int, self.opts['auth_workers'])
+        else:
+            self._auth_slots = None
 
     def post_fork(self, _, __):
         self.serial = salt.payload.Serial(self.opts)
@@ -107,6 +115,99 @@ class AESReqServerMixin(object):
 
         self.master_key = salt.crypt.MasterKeys(self.opts)
 
+        # The accepted public keys of the minions, by minion id, as
+        # (file stat, key string, key object)
+        self._minion_keys = {}
+        # The master public key, its signature and the signature of the last
+        # AES key sent, which only change with the master keys or the AES key
+        self._master_pub = None
+        self._master_pub_sig = None
+        self._aes_sig = (None, None)
+        self._reset_auth_stats()
+
+    def _reset_auth_stats(self):
+        '''
+        Start collecting the authentication stats of a new period
+        '''
+        self._auth_stats = {'runs': 0, 'mean': 0, 'busy': 0,
+                            'key_cache_hits': 0, 'in_progress': 0}
+        self._auth_stat_clock = time.time()
+
+    def _get_minion_key(self, minion_id, path, load_key=False):
+        '''
+        Return the public key of a minion stored in path, as a string and as a
+        key object when load_key is True. The key is only read again from the
+        disk once the file changed, when it was accepted, rejected or deleted.
+        '''
+        stat = os.stat(path)
+        stat = (stat.st_ino, stat.st_size, stat.st_mtime, stat.st_ctime)
+        cached = self._minion_keys.get(minion_id)
+        if cached is None or cached[0] != (path, stat):
+            with salt.utils.files.fopen(path, 'r') as fp_:
+                cached = [(path, stat), fp_.read(), None]
+            self._minion_keys[minion_id] = cached
+        if load_key:
+            if cached[2] is None:
+                cached[2] = salt.crypt.get_rsa_pub_key_str(cached[1])
+            else:
+                self._auth_stats['key_cache_hits'] += 1
+        return cached[1], cached[2]
+
+    def _admit_auth(self):
+        '''
+        Take one of the :conf_master:`auth_workers` slots of the master for
+        this worker, or return False if the other workers hold all of them
+        '''
+        slots = getattr(self, '_auth_slots', None)
+        if slots is None:
+            return True
+        pid = os.getpid()
+        with slots.get_lock():
+            free = [idx for idx, slot in enumerate(slots) if not slot]
+            if not free:
+                # The slots of the workers which died while authenticating a
+                # minion are free again
+                free = [idx for idx, slot in enumerate(slots)
+                        if slot == pid or not salt.utils.process.os_is_running(slot)]
+            if not free:
+                self._auth_stats['in_progress'] = len(slots)
+                return False
+            slots[free[0]] = pid
+            self._auth_stats['in_progress'] = max(
+                self._auth_stats['in_progress'],
+                len(slots) - len(free) + 1)
+        return True
+
+    def _release_auth(self):
+        '''
+        Give back the :conf_master:`auth_workers` slot of this worker
+        '''
+        slots = getattr(self, '_auth_slots', None)
+        if slots is None:
+            return
+        pid = os.getpid()
+        with slots.get_lock():
+            for idx, slot in enumerate(slots):
+                if slot == pid:
+                    slots[idx] = 0
+
+    def _post_auth_stats(self, start):
+        '''
+        Update the authentication stats, and fire them on the event bus with
+        the master stats when it is time
+        '''
+        end_time = time.time()
+        stats = self._auth_stats
+        if start is not None:
+            stats['runs'] += 1
+            stats['mean'] = (stats['mean'] * (stats['runs'] - 1) + end_time - start) / stats['runs']
+        if end_time - self._auth_stat_clock > self.opts['master_stats_event_iter']:
+            self.event.fire_event({'time': end_time - self._auth_stat_clock,
+                                   'worker': os.getpid(),
+                                   'stats': {'_auth': stats}},
+                                  salt.utils.event.tagify('auth', 'stats'))
+            self._reset_auth_stats()
+
     def _encrypt_private(self, ret, dictkey, target):
         '''
         The server equivalent of ReqChannel.crypted_transfer_decode_dictentry
@@ -120,10 +221,10 @@ class AESReqServerMixin(object):
             self.opts,
             key)
         try:
-            pub = salt.crypt.get_rsa_pub_key(pubfn)
+            pub = self._get_minion_key(target, pubfn, load_key=True)[1]
         except (ValueError, IndexError, TypeError):
             return self.crypticle.dumps({})
-        except IOError:
+        except (IOError, OSError):
             log.error('AES key not found')
             return {'error': 'AES key not found'}
 
@@ -162,6 +263,37 @@ class AESReqServerMixin(object):
         return payload
 
     def _auth(self, load):
+        '''
+        Authenticate the client, unless :conf_master:`auth_workers` other
+        workers are already authenticating minions. The minion is then told
+        that the master is busy, and retries later.
+
+        Only the minions flagging ``auth_busy`` in their load know the busy
+        reply, the older ones are authenticated anyway since salt-call would
+        exit on it.
+        '''
+        admitted = self._admit_auth()
+        if not admitted:
+            if load.get('auth_busy'):
+                log.info('Authentication request from %s deferred, the master is '
+                         'busy authenticating other minions', load.get('id'))
+                self._auth_stats['busy'] += 1
+                if self.opts['master_stats']:
+                    self._post_auth_stats(None)
+                return {'enc': 'clear',
+                        'load': {'ret': 'busy'}}
+            log.debug('Authenticating %s while the master is busy, it does not '
+                      'support being deferred', load.get('id'))
+        start = time.time()
+        try:
+            return self._auth_minion(load)
+        finally:
+            if admitted:
+                self._release_auth()
+            if self.opts['master_stats']:
+                self._post_auth_stats(start)
+
+    def _auth_minion(self, load):
         '''
         Authenticate the client, use the sent public key to encrypt the AES key
         which was generated at start up.
@@ -248,24 +380,23 @@ class AESReqServerMixin(object):
 
         elif os.path.isfile(pubfn):
             # The key has been accepted, check it
-            with salt.utils.files.fopen(pubfn, 'r') as pubfn_handle:
-                if pubfn_handle.read().strip() != load['pub'].strip():
-                    log.error(
-                        'Authentication attempt from %s failed, the public '
-                        'keys did not match. This may be an attempt to compromise '
-                        'the Salt cluster.', load['id']
-                    )
-                    # put denied minion key into minions_denied
-                    with salt.utils.files.fopen(pubfn_denied, 'w+') as fp_:
-                        fp_.write(load['pub'])
-                    eload = {'result': False,
-                             'id': load['id'],
-                             'act': 'denied',
-                             'pub': load['pub']}
-                    if self.opts.get('auth_events') is True:
-                        self.event.fire_event(eload, salt.utils.event.tagify(prefix='auth'))
-                    return {'enc': 'clear',
-                            'load': {'ret': False}}
+            if self._get_minion_key(load['id'], pubfn)[0].strip() != load['pub'].strip():
+                log.error(
+                    'Authentication attempt from %s failed, the public '
+                    'keys did not match. This may be an attempt to compromise '
+                    'the Salt cluster.', load['id']
+                )
+                # put denied minion key into minions_denied
+                with salt.utils.files.fopen(pubfn_denied, 'w+') as fp_:
+                    fp_.write(load['pub'])
+                eload = {'result': False,
+                         'id': load['id'],
+                         'act': 'denied',
+                         'pub': load['pub']}
+                if self.opts.get('auth_events') is True:
+                    self.event.fire_event(eload, salt.utils.event.tagify(prefix='auth'))
+                return {'enc': 'clear',
+                        'load': {'ret': False}}
 
         elif not os.path.isfile(pubfn_pend):
             # The key has not been accepted, this is a new minion
@@ -433,7 +564,7 @@ class AESReqServerMixin(object):
         # The key payload may sometimes be corrupt when using auto-accept
         # and an empty request comes in
         try:
-            pub = salt.crypt.get_rsa_pub_key(pubfn)
+            pub = self._get_minion_key(load['id'], pubfn, load_key=True)[1]
         except (ValueError, IndexError, TypeError) as err:
             log.error('Corrupt public key "%s": %s', pubfn, err)
             return {'enc': 'clear',
@@ -441,9 +572,13 @@ class AESReqServerMixin(object):
 
         if not HAS_M2:
             cipher = PKCS1_OAEP.new(pub)
+        # Send the minion to the publisher shard it subscribes to
+        shard = salt.transport.publish_shard(self.opts, load['id'])
+        if self._master_pub is None:
+            self._master_pub = self.master_key.get_pub_str()
         ret = {'enc': 'pub',
-               'pub_key': self.master_key.get_pub_str(),
-               'publish_port': self.opts['publish_port']}
+               'pub_key': self._master_pub,
+               'publish_port': salt.transport.publish_shard_port(self.opts, shard)}
 
         # sign the master's pubkey (if enabled) before it is
         # sent to the minion that was just authenticated
@@ -455,15 +590,16 @@ class AESReqServerMixin(object):
                 ret.update({'pub_sig': self.master_key.pubkey_signature()})
             else:
                 # the master has its own signing-keypair, compute the master.pub's
-                # signature and append that to the auth-reply
-
-                # get the key_pass for the signing key
-                key_pass = salt.utils.sdb.sdb_get(self.opts['signing_key_pass'], self.opts)
+                # signature once and append that to the auth-reply
+                if self._master_pub_sig is None:
+                    # get the key_pass for the signing key
+                    key_pass = salt.utils.sdb.sdb_get(self.opts['signing_key_pass'], self.opts)
 
-                log.debug("Signing master public key before sending")
-                pub_sign = salt.crypt.sign_message(self.master_key.get_sign_paths()[1],
-                                                   ret['pub_key'], key_pass)
-                ret.update({'pub_sig': binascii.b2a_base64(pub_sign)})
+                    log.debug("Signing master public key before sending")
+                    pub_sign = salt.crypt.sign_message(self.master_key.get_sign_paths()[1],
+                                                       ret['pub_key'], key_pass)
+                    self._master_pub_sig = binascii.b2a_base64(pub_sign)
+                ret.update({'pub_sig': self._master_pub_sig})
 
         if not HAS_M2:
             mcipher = PKCS1_OAEP.new(self.master_key.key)
@@ -508,9 +644,12 @@ class AESReqServerMixin(object):
                                                 RSA.pkcs1_oaep_padding)
             else:
                 ret['aes'] = cipher.encrypt(aes)
-        # Be aggressive about the signature
+        # Be aggressive about the signature. The AES key is the same for every
+        # minion unless auth_mode is 2, so is its signature.
         digest = salt.utils.stringutils.to_bytes(hashlib.sha256(aes).hexdigest())
-        ret['sig'] = salt.crypt.private_encrypt(self.master_key.key, digest)
+        if self._aes_sig[0] != digest:
+            self._aes_sig = (digest, salt.crypt.private_encrypt(self.master_key.key, digest))
+        ret['sig'] = self._aes_sig[1]
         eload = {'result': True,
                  'act': 'accept',
                  'id': load['id'],
@@ -7,6 +7,12 @@ This includes server side transport, for the ReqServer and the Publisher
 
 # Import Python Libs
 from __future__ import absolute_import, print_function, unicode_literals
+import time
+
+# Import Salt Libs
+import salt.crypt
+import salt.master
+import salt.utils.event
 
 
 class ReqServerChannel(object):
@@ -94,10 +100,67 @@ class PubServerChannel(object):
         '''
         pass
 
-    def publish(self, load):
+    def publish(self, load, minions=None):
         '''
         Publish "load" to minions
+
+        ``minions`` is the list of minions matched by the target of the load,
+        if the caller already knows it
         '''
         raise NotImplementedError()
 
+    @property
+    def crypticle(self):
+        '''
+        The Crypticle encrypting the publishes with the current AES key of the
+        master. It is only rebuilt when the key is rotated.
+        '''
+        key = salt.master.SMaster.secrets['aes']['secret'].value
+        crypticle = getattr(self, '_crypticle', None)
+        if crypticle is None or crypticle.key_string != key:
+            crypticle = self._crypticle = salt.crypt.Crypticle(self.opts, key)
+        return crypticle
+
+
+class PublishStats(object):
+    '''
+    Track the subscriber connections and the backlog of a publisher shard and
+    fire them on the master event bus every ``master_stats_event_iter``
+    seconds, with the tag ``salt/stats/Publisher-<shard>``
+    '''
+    def __init__(self, opts, shard=0):
+        self.opts = opts
+        self.name = 'Publisher-{0}'.format(shard)
+        self.connections = 0
+        self.queue_depth = 0
+        self.payloads = 0
+        self.clock = time.time()
+        self.event = None
+
+    def timeout(self):
+        '''
+        Return the number of seconds left until the next stats event is due
+        '''
+        return max(self.clock + self.opts['master_stats_event_iter'] - time.time(), 0)
+
+    def post(self):
+        '''
+        Fire an event with the stats if it's time
+        '''
+        end_time = time.time()
+        if end_time - self.clock < self.opts['master_stats_event_iter']:
+            return
+        if self.event is None:
+            self.event = salt.utils.event.get_master_event(
+                self.opts, self.opts['sock_dir'], listen=False)
+        stats = {'connections': self.connections,
+                 'queue_depth': self.queue_depth,
+                 'payloads': self.payloads}
+        self.event.fire_event(
+            {'time': end_time - self.clock, 'worker': self.name, 'stats': stats},
+            salt.utils.event.tagify(self.name, 'stats'))
+        self.queue_depth = 0
+        self.payloads = 0
+        self.clock = end_time
+
 # EOF
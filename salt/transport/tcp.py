@@ -35,6 +35,7 @@ import salt.transport.server
 import salt.transport.mixins.auth
 from salt.ext import six
 from salt.ext.six.moves import queue  # pylint: disable=import-error
+from salt.ext.six.moves import range  # pylint: disable=import-error
 from salt.exceptions import SaltReqTimeoutError, SaltClientError
 from salt.transport import iter_transport_opts
 
@@ -43,6 +44,7 @@ import tornado
 import tornado.tcpserver
 import tornado.gen
 import tornado.concurrent
+import tornado.locks
 import tornado.tcpclient
 import tornado.netutil
 from tornado.iostream import StreamClosedError
@@ -291,7 +293,8 @@ class AsyncTCPReqChannel(salt.transport.client.ReqChannel):
                                                     args=(self.opts, master_host, int(master_port),),
                                                     kwargs={'io_loop': self.io_loop, 'resolver': resolver,
                                                             'source_ip': self.opts.get('source_ip'),
-                                                            'source_port': self.opts.get('source_ret_port')})
+                                                            'source_port': self.opts.get('source_ret_port'),
+                                                            'window': self.opts.get('tcp_req_window', 0)})
 
     def close(self):
         if self._closing:
@@ -411,6 +414,28 @@ class AsyncTCPReqChannel(salt.transport.client.ReqChannel):
             raise SaltClientError('Connection to master lost')
         raise tornado.gen.Return(ret)
 
+    @tornado.gen.coroutine
+    def send_many(self, loads, tries=3, timeout=60, raw=False):
+        '''
+        Send several requests at once over the connection to the master, and
+        return the replies in the same order as the loads. At most
+        ``tcp_req_window`` requests are waiting for their reply at a time, the
+        next loads are only encrypted and sent once a reply comes back.
+        '''
+        loads = list(loads)
+        window = self.opts.get('tcp_req_window', 0) or len(loads) or 1
+        with salt.utils.asynchronous.current_ioloop(self.io_loop):
+            semaphore = tornado.locks.Semaphore(window)
+
+        @tornado.gen.coroutine
+        def _send(load):
+            with (yield semaphore.acquire()):
+                ret = yield self.send(load, tries=tries, timeout=timeout, raw=raw)
+            raise tornado.gen.Return(ret)
+
+        ret = yield [_send(load) for load in loads]
+        raise tornado.gen.Return(ret)
+
 
 class AsyncTCPPubChannel(salt.transport.mixins.auth.AESPubClientMixin, salt.transport.client.AsyncPubChannel):
     def __init__(self,
@@ -558,6 +583,8 @@ class AsyncTCPPubChannel(salt.transport.mixins.auth.AESPubClientMixin, salt.tran
                 # else take the relayed publish_port master reports
                 else:
                     self.publish_port = self.auth.creds['publish_port']
+                # Keep the port for status.master, it can be the port of a shard
+                self.opts['master_publish_port'] = int(self.publish_port)
 
                 self.message_client = SaltMessageClientPool(
                     self.opts,
@@ -904,15 +931,18 @@ class SaltMessageClientPool(salt.transport.MessageClientPool):
 
 
 # TODO consolidate with IPCClient
-# TODO: limit in-flight messages.
 # TODO: singleton? Something to not re-create the tcp connection so much
 class SaltMessageClient(object):
     '''
     Low-level message sending client
+
+    :param int window: The number of messages which can be waiting for their
+        reply at once, the next messages wait in the send queue until a reply
+        comes back. ``0`` means no limit.
     '''
     def __init__(self, opts, host, port, io_loop=None, resolver=None,
                  connect_callback=None, disconnect_callback=None,
-                 source_ip=None, source_port=None):
+                 source_ip=None, source_port=None, window=0):
         self.opts = opts
         self.host = host
         self.port = port
@@ -925,6 +955,10 @@ class SaltMessageClient(object):
 
         with salt.utils.asynchronous.current_ioloop(self.io_loop):
             self._tcp_client = TCPClientKeepAlive(opts, resolver=resolver)
+            self._window_open = tornado.locks.Condition()
+
+        self.window = window or 0
+        self.in_flight = set()  # request_ids sent and waiting for their reply
 
         self._mid = 1
         self._max_messages = int((1 << 31) - 2)  # number of IDs before we wrap
@@ -955,6 +989,7 @@ class SaltMessageClient(object):
             try:
                 orig_loop = tornado.ioloop.IOLoop.current()
                 self.io_loop.make_current()
+                self._window_open.notify_all()
                 self._stream.close()
                 if self._read_until_future is not None:
                     # This will prevent this message from showing up:
@@ -1058,6 +1093,7 @@ class SaltMessageClient(object):
                         if message_id in self.send_future_map:
                             self.send_future_map.pop(message_id).set_result(body)
                             self.remove_message_timeout(message_id)
+                            self._release(message_id)
                         else:
                             if self._on_recv is not None:
                                 self.io_loop.spawn_callback(self._on_recv, header, body)
@@ -1068,6 +1104,7 @@ class SaltMessageClient(object):
                     for future in six.itervalues(self.send_future_map):
                         future.set_exception(e)
                     self.send_future_map = {}
+                    self._release_all()
                     if self._closing:
                         return
                     if self.disconnect_callback:
@@ -1088,6 +1125,7 @@ class SaltMessageClient(object):
                     for future in six.itervalues(self.send_future_map):
                         future.set_exception(e)
                     self.send_future_map = {}
+                    self._release_all()
                     if self._closing:
                         return
                     if self.disconnect_callback:
@@ -1105,6 +1143,14 @@ class SaltMessageClient(object):
             yield self._connecting_future
         while self.send_queue:
             message_id, item = self.send_queue[0]
+            if self.window:
+                while len(self.in_flight) >= self.window and not self._closing:
+                    yield self._window_open.wait()
+                if message_id not in self.send_future_map:
+                    # The message timed out while waiting for its turn
+                    del self.send_queue[0]
+                    continue
+                self.in_flight.add(message_id)
             try:
                 yield self._stream.write(item)
                 del self.send_queue[0]
@@ -1114,6 +1160,7 @@ class SaltMessageClient(object):
                 if message_id in self.send_future_map:
                     self.send_future_map.pop(message_id).set_exception(e)
                 self.remove_message_timeout(message_id)
+                self._release(message_id)
                 del self.send_queue[0]
                 if self._closing:
                     return
@@ -1124,6 +1171,23 @@ class SaltMessageClient(object):
                     self._connecting_future = self.connect()
                 yield self._connecting_future
 
+    def _release(self, message_id):
+        '''
+        Let the next message in the send queue go out once a message is no
+        longer waiting for its reply
+        '''
+        if message_id in self.in_flight:
+            self.in_flight.discard(message_id)
+            self._window_open.notify()
+
+    def _release_all(self):
+        '''
+        Let the messages in the send queue go out once the messages waiting
+        for their reply failed
+        '''
+        self.in_flight.clear()
+        self._window_open.notify_all()
+
     def _message_id(self):
         wrap = False
         while self._mid in self.send_future_map:
@@ -1163,6 +1227,7 @@ class SaltMessageClient(object):
             self.send_future_map.pop(message_id).set_exception(
                 SaltReqTimeoutError('Message timed out')
             )
+        self._release(message_id)
 
     def send(self, msg, timeout=None, callback=None, raw=False):
         '''
@@ -1236,6 +1301,7 @@ class PubServer(tornado.tcpserver.TCPServer, object):
         self.clients = set()
         self.aes_funcs = salt.master.AESFuncs(self.opts)
         self.present = {}
+        self.stats = None
         self.presence_events = False
         if self.opts.get('presence_events', False):
             tcp_only = True
@@ -1349,6 +1415,18 @@ class PubServer(tornado.tcpserver.TCPServer, object):
                 log.error('Exception parsing response from %s', client.address, exc_info=True)
                 continue
 
+    def post_stats(self):
+        '''
+        Fire the subscriber connections and the number of bytes waiting to be
+        written to them on the master event bus, if it's time
+        '''
+        self.stats.connections = len(self.clients)
+        self.stats.queue_depth = sum(
+            getattr(client.stream, '_write_buffer_size', 0)
+            for client in self.clients)
+        self.stats.post()
+        self.io_loop.call_later(self.stats.timeout(), self.post_stats)
+
     def handle_stream(self, stream, address):
         log.trace('Subscriber at %s connected', address)
         client = Subscriber(stream, address)
@@ -1359,7 +1437,10 @@ class PubServer(tornado.tcpserver.TCPServer, object):
     @tornado.gen.coroutine
     def publish_payload(self, package, _):
         log.debug('TCP PubServer sending payload: %s', package)
-        payload = salt.transport.frame.frame_msg(package['payload'])
+        # The payload was framed by the publishing process
+        payload = package['payload']
+        if self.stats is not None:
+            self.stats.payloads += 1
 
         to_remove = []
         if 'topic_lst' in package:
@@ -1433,22 +1514,27 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         if self.io_loop is None:
             self.io_loop = tornado.ioloop.IOLoop.current()
 
+        # The publisher shard to run
+        shard = kwargs.get('shard', 0)
+
         # Spin up the publisher
         pub_server = PubServer(self.opts, io_loop=self.io_loop)
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         _set_tcp_keepalive(sock, self.opts)
         sock.setblocking(0)
-        sock.bind((self.opts['interface'], int(self.opts['publish_port'])))
+        sock.bind((self.opts['interface'],
+                   salt.transport.publish_shard_port(self.opts, shard)))
         sock.listen(self.backlog)
         # pub_server will take ownership of the socket
         pub_server.add_socket(sock)
 
+        if self.opts['master_stats']:
+            pub_server.stats = salt.transport.server.PublishStats(self.opts, shard)
+            self.io_loop.call_later(pub_server.stats.timeout(), pub_server.post_stats)
+
         # Set up Salt IPC server
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            pull_uri = int(self.opts.get('tcp_master_publish_pull', 4514))
-        else:
-            pull_uri = os.path.join(self.opts['sock_dir'], 'publish_pull.ipc')
+        pull_uri = salt.transport.publish_pull_path(self.opts, shard)
 
         pull_sock = salt.transport.ipc.IPCMessageServer(
             self.opts,
@@ -1474,34 +1560,25 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         primarily be used to create IPC channels and create our daemon process to
         do the actual publishing
         '''
-        process_manager.add_process(self._publish_daemon, kwargs=kwargs)
+        for shard in range(salt.transport.publish_shard_count(self.opts)):
+            shard_kwargs = dict(kwargs or {}, shard=shard)
+            process_manager.add_process(self._publish_daemon, kwargs=shard_kwargs)
 
-    def publish(self, load):
+    def publish(self, load, minions=None):  # pylint: disable=unused-argument
         '''
         Publish "load" to minions
         '''
         payload = {'enc': 'aes'}
 
-        crypticle = salt.crypt.Crypticle(self.opts, salt.master.SMaster.secrets['aes']['secret'].value)
-        payload['load'] = crypticle.dumps(load)
+        payload['load'] = self.crypticle.dumps(load)
         if self.opts['sign_pub_messages']:
             master_pem_path = os.path.join(self.opts['pki_dir'], 'master.pem')
             log.debug("Signing data packet")
             payload['sig'] = salt.crypt.sign_message(master_pem_path, payload['load'])
-        # Use the Salt IPC server
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            pull_uri = int(self.opts.get('tcp_master_publish_pull', 4514))
-        else:
-            pull_uri = os.path.join(self.opts['sock_dir'], 'publish_pull.ipc')
-        # TODO: switch to the actual asynchronous interface
-        #pub_sock = salt.transport.ipc.IPCMessageClient(self.opts, io_loop=self.io_loop)
-        pub_sock = salt.utils.asynchronous.SyncWrapper(
-            salt.transport.ipc.IPCMessageClient,
-            (pull_uri,)
-        )
-        pub_sock.connect()
 
-        int_payload = {'payload': self.serial.dumps(payload)}
+        # Frame the payload once here, the publisher writes it as is to every
+        # subscriber
+        int_payload = {'payload': salt.transport.frame.frame_msg(self.serial.dumps(payload))}
 
         # add some targeting stuff for lists only (for now)
         if load['tgt_type'] == 'list':
@@ -1516,5 +1593,15 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
                 int_payload['topic_lst'] = match_ids
             else:
                 int_payload['topic_lst'] = load['tgt']
-        # Send it over IPC!
-        pub_sock.send(int_payload)
+        # Send it over IPC to every publisher shard, each one only sends it to
+        # the minions subscribed to it
+        for shard in range(salt.transport.publish_shard_count(self.opts)):
+            pull_uri = salt.transport.publish_pull_path(self.opts, shard)
+            # TODO: switch to the actual asynchronous interface
+            #pub_sock = salt.transport.ipc.IPCMessageClient(self.opts, io_loop=self.io_loop)
+            pub_sock = salt.utils.asynchronous.SyncWrapper(
+                salt.transport.ipc.IPCMessageClient,
+                (pull_uri,)
+            )
+            pub_sock.connect()
+            pub_sock.send(int_payload)
@@ -34,7 +34,9 @@ import salt.transport.client
 import salt.transport.server
 import salt.transport.mixins.auth
 from salt.ext import six
+from salt.ext.six.moves import range
 from salt.exceptions import SaltReqTimeoutError
+from salt.defaults import DEFAULT_TARGET_DELIM
 from salt._compat import ipaddress
 
 from salt.utils.zeromq import zmq, ZMQDefaultLoop, install_zmq, ZMQ_VERSION_INFO, LIBZMQ_VERSION_INFO
@@ -508,6 +510,8 @@ class AsyncZeroMQPubChannel(salt.transport.mixins.auth.AESPubClientMixin, salt.t
         # else take the relayed publish_port master reports
         else:
             self.publish_port = self.auth.creds['publish_port']
+        # Keep the port for status.master, it can be the port of a shard
+        self.opts['master_publish_port'] = int(self.publish_port)
 
         log.debug('Connecting the Minion to the Master publish port, using the URI: %s', self.master_pub)
         self._socket.connect(self.master_pub)
@@ -799,6 +803,17 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
         sys.exit(salt.defaults.exitcodes.EX_OK)
 
 
+def _get_publish_pull_uri(opts, shard=0):
+    '''
+    Return the zmq URI of the socket the given publisher shard pulls the loads
+    to publish from
+    '''
+    pull_path = salt.transport.publish_pull_path(opts, shard)
+    if opts.get('ipc_mode', '') == 'tcp':
+        return 'tcp://127.0.0.1:{0}'.format(pull_path)
+    return 'ipc://{0}'.format(pull_path)
+
+
 def _set_tcp_keepalive(zmq_socket, opts):
     '''
     Ensure that TCP keepalives are set as specified in "opts".
@@ -846,9 +861,12 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
     def connect(self):
         return tornado.gen.sleep(5)
 
-    def _publish_daemon(self, log_queue=None):
+    def _publish_daemon(self, log_queue=None, shard=0):
         '''
         Bind to the interface specified in the configuration file
+
+        :param int shard: The publisher shard to run, see
+            :py:func:`salt.transport.publish_shard_port`
         '''
         salt.utils.process.appendproctitle(self.__class__.__name__)
         if log_queue:
@@ -874,19 +892,14 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
             pub_sock.setsockopt(zmq.IPV4ONLY, 0)
         pub_sock.setsockopt(zmq.BACKLOG, self.opts.get('zmq_backlog', 1000))
         pub_sock.setsockopt(zmq.LINGER, -1)
-        pub_uri = 'tcp://{interface}:{publish_port}'.format(**self.opts)
+        pub_uri = 'tcp://{0}:{1}'.format(
+            self.opts['interface'],
+            salt.transport.publish_shard_port(self.opts, shard))
         # Prepare minion pull socket
         pull_sock = context.socket(zmq.PULL)
         pull_sock.setsockopt(zmq.LINGER, -1)
 
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            pull_uri = 'tcp://127.0.0.1:{0}'.format(
-                self.opts.get('tcp_master_publish_pull', 4514)
-                )
-        else:
-            pull_uri = 'ipc://{0}'.format(
-                os.path.join(self.opts['sock_dir'], 'publish_pull.ipc')
-                )
+        pull_uri = _get_publish_pull_uri(self.opts, shard)
         salt.utils.zeromq.check_ipc_path_max_len(pull_uri)
 
         # Start the minion command publisher
@@ -898,49 +911,31 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         with salt.utils.files.set_umask(0o177):
             pull_sock.bind(pull_uri)
 
+        stats = None
+        monitor = None
+        if self.opts['master_stats']:
+            stats = salt.transport.server.PublishStats(self.opts, shard)
+            poller = zmq.Poller()
+            poller.register(pull_sock, zmq.POLLIN)
+            if HAS_ZMQ_MONITOR:
+                # Count the subscriber connections from the socket events
+                monitor = pub_sock.get_monitor_socket(
+                    zmq.EVENT_ACCEPTED | zmq.EVENT_DISCONNECTED)
+                poller.register(monitor, zmq.POLLIN)
+
         try:
             while True:
                 # Catch and handle EINTR from when this process is sent
                 # SIGUSR1 gracefully so we don't choke and die horribly
                 try:
-                    log.debug('Publish daemon getting data from puller %s', pull_uri)
-                    package = pull_sock.recv()
-                    log.debug('Publish daemon received payload. size=%d', len(package))
-
-                    unpacked_package = salt.payload.unpackage(package)
-                    if six.PY3:
-                        unpacked_package = salt.transport.frame.decode_embedded_strs(unpacked_package)
-                    payload = unpacked_package['payload']
-                    log.trace('Accepted unpacked package from puller')
-                    if self.opts['zmq_filtering']:
-                        # if you have a specific topic list, use that
-                        if 'topic_lst' in unpacked_package:
-                            for topic in unpacked_package['topic_lst']:
-                                log.trace('Sending filtered data over publisher %s', pub_uri)
-                                # zmq filters are substring match, hash the topic
-                                # to avoid collisions
-                                htopic = salt.utils.stringutils.to_bytes(hashlib.sha1(topic).hexdigest())
-                                pub_sock.send(htopic, flags=zmq.SNDMORE)
-                                pub_sock.send(payload)
-                                log.trace('Filtered data has been sent')
-
-                            # Syndic broadcast
-                            if self.opts.get('order_masters'):
-                                log.trace('Sending filtered data to syndic')
-                                pub_sock.send(b'syndic', flags=zmq.SNDMORE)
-                                pub_sock.send(payload)
-                                log.trace('Filtered data has been sent to syndic')
-                        # otherwise its a broadcast
-                        else:
-                            # TODO: constants file for "broadcast"
-                            log.trace('Sending broadcasted data over publisher %s', pub_uri)
-                            pub_sock.send(b'broadcast', flags=zmq.SNDMORE)
-                            pub_sock.send(payload)
-                            log.trace('Broadcasted data has been sent')
+                    if stats is None:
+                        log.debug('Publish daemon getting data from puller %s', pull_uri)
+                        packages = [pull_sock.recv_multipart(copy=False)]
                     else:
-                        log.trace('Sending ZMQ-unfiltered data over publisher %s', pub_uri)
-                        pub_sock.send(payload)
-                        log.trace('Unfiltered data has been sent')
+                        packages = self._poll_publish_daemon(
+                            poller, pull_sock, monitor, stats)
+                    for package in packages:
+                        self._publish_package(pub_sock, pub_uri, package)
                 except zmq.ZMQError as exc:
                     if exc.errno == errno.EINTR:
                         continue
@@ -949,6 +944,9 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         except KeyboardInterrupt:
             log.trace('Publish daemon caught Keyboard interupt, tearing down')
         # Cleanly close the sockets if we're shutting down
+        if monitor is not None:
+            pub_sock.disable_monitor()
+            monitor.close()
         if pub_sock.closed is False:
             pub_sock.close()
         if pull_sock.closed is False:
@@ -956,6 +954,82 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         if context.closed is False:
             context.term()
 
+    @staticmethod
+    def _poll_publish_daemon(poller, pull_sock, monitor, stats):
+        '''
+        Wait for the loads to publish until the next stats event is due,
+        keeping track of the subscriber connections and of the number of loads
+        waiting in the puller
+        '''
+        socks = dict(poller.poll(stats.timeout() * 1000))
+        if monitor is not None and monitor in socks:
+            while True:
+                try:
+                    evt = zmq.utils.monitor.recv_monitor_message(monitor, zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+                if evt['event'] == zmq.EVENT_ACCEPTED:
+                    stats.connections += 1
+                elif evt['event'] == zmq.EVENT_DISCONNECTED:
+                    stats.connections = max(stats.connections - 1, 0)
+        packages = []
+        if pull_sock in socks:
+            while True:
+                try:
+                    packages.append(pull_sock.recv_multipart(zmq.NOBLOCK, copy=False))
+                except zmq.Again:
+                    break
+            stats.queue_depth = max(stats.queue_depth, len(packages))
+            stats.payloads += len(packages)
+        stats.post()
+        return packages
+
+    def _publish_package(self, pub_sock, pub_uri, package):
+        '''
+        Send a load received from the puller to the subscribed minions
+
+        The package is made of two frames: the targeting data, and the
+        payload as it is sent to the minions. The payload frame is never
+        unpacked nor copied, the same frame is handed to zmq for every topic.
+        '''
+        header, payload = package
+        log.debug('Publish daemon received payload. size=%d', len(payload))
+
+        unpacked_package = salt.payload.unpackage(header.bytes)
+        if six.PY3:
+            unpacked_package = salt.transport.frame.decode_embedded_strs(unpacked_package)
+        log.trace('Accepted unpacked package from puller')
+        if self.opts['zmq_filtering']:
+            # if you have a specific topic list, use that
+            if 'topic_lst' in unpacked_package:
+                for topic in unpacked_package['topic_lst']:
+                    log.trace('Sending filtered data over publisher %s', pub_uri)
+                    # zmq filters are substring match, hash the topic
+                    # to avoid collisions
+                    htopic = salt.utils.stringutils.to_bytes(
+                        hashlib.sha1(salt.utils.stringutils.to_bytes(topic)).hexdigest())
+                    pub_sock.send(htopic, flags=zmq.SNDMORE)
+                    pub_sock.send(payload, copy=False)
+                    log.trace('Filtered data has been sent')
+
+                # Syndic broadcast
+                if self.opts.get('order_masters'):
+                    log.trace('Sending filtered data to syndic')
+                    pub_sock.send(b'syndic', flags=zmq.SNDMORE)
+                    pub_sock.send(payload, copy=False)
+                    log.trace('Filtered data has been sent to syndic')
+            # otherwise its a broadcast
+            else:
+                # TODO: constants file for "broadcast"
+                log.trace('Sending broadcasted data over publisher %s', pub_uri)
+                pub_sock.send(b'broadcast', flags=zmq.SNDMORE)
+                pub_sock.send(payload, copy=False)
+                log.trace('Broadcasted data has been sent')
+        else:
+            log.trace('Sending ZMQ-unfiltered data over publisher %s', pub_uri)
+            pub_sock.send(payload, copy=False)
+            log.trace('Unfiltered data has been sent')
+
     def pre_fork(self, process_manager, kwargs=None):
         '''
         Do anything necessary pre-fork. Since this is on the master side this will
@@ -964,7 +1038,9 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
 
         :param func process_manager: A ProcessManager, from salt.utils.process.ProcessManager
         '''
-        process_manager.add_process(self._publish_daemon, kwargs=kwargs)
+        for shard in range(salt.transport.publish_shard_count(self.opts)):
+            shard_kwargs = dict(kwargs or {}, shard=shard)
+            process_manager.add_process(self._publish_daemon, kwargs=shard_kwargs)
 
     @property
     def pub_sock(self):
@@ -978,27 +1054,39 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         except AttributeError:
             pass
 
+    @property
+    def pub_socks(self):
+        '''
+        This thread's zmq publisher sockets, one per publisher shard. The
+        first one is :attr:`pub_sock`.
+        '''
+        if not self.pub_sock:
+            return []
+        return [self.pub_sock] + getattr(self._sock_data, 'shard_socks', [])
+
     def pub_connect(self):
         '''
         Create and connect this thread's zmq socket. If a publisher socket
         already exists "pub_close" is called before creating and connecting a
         new socket.
+
+        When the master runs several publisher shards, a socket is connected
+        to each of them: a single PUSH socket would deal the loads out between
+        the shards instead of sending every load to all of them.
         '''
         if self.pub_sock:
             self.pub_close()
         ctx = zmq.Context.instance()
-        self._sock_data.sock = ctx.socket(zmq.PUSH)
-        self.pub_sock.setsockopt(zmq.LINGER, -1)
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            pull_uri = 'tcp://127.0.0.1:{0}'.format(
-                self.opts.get('tcp_master_publish_pull', 4514)
-                )
-        else:
-            pull_uri = 'ipc://{0}'.format(
-                os.path.join(self.opts['sock_dir'], 'publish_pull.ipc')
-                )
-        log.debug("Connecting to pub server: %s", pull_uri)
-        self.pub_sock.connect(pull_uri)
+        socks = []
+        for shard in range(salt.transport.publish_shard_count(self.opts)):
+            sock = ctx.socket(zmq.PUSH)
+            sock.setsockopt(zmq.LINGER, -1)
+            pull_uri = _get_publish_pull_uri(self.opts, shard)
+            log.debug("Connecting to pub server: %s", pull_uri)
+            sock.connect(pull_uri)
+            socks.append(sock)
+        self._sock_data.sock = socks[0]
+        self._sock_data.shard_socks = socks[1:]
         return self._sock_data.sock
 
     def pub_close(self):
@@ -1009,22 +1097,30 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         if hasattr(self._sock_data, 'sock'):
             self._sock_data.sock.close()
             delattr(self._sock_data, 'sock')
+        for sock in getattr(self._sock_data, 'shard_socks', []):
+            sock.close()
+        self._sock_data.shard_socks = []
 
-    def publish(self, load):
+    def publish(self, load, minions=None):
         '''
         Publish "load" to minions. This send the load to the publisher daemon
         process with does the actual sending to minions.
 
         :param dict load: A load to be sent across the wire to minions
+        :param list minions: The minions matched by the target of the load, if
+            already known. They are only used to route the load to the
+            targeted minions when :conf_master:`zmq_filtering` is enabled.
         '''
         payload = {'enc': 'aes'}
-        crypticle = salt.crypt.Crypticle(self.opts, salt.master.SMaster.secrets['aes']['secret'].value)
-        payload['load'] = crypticle.dumps(load)
+        payload['load'] = self.crypticle.dumps(load)
         if self.opts['sign_pub_messages']:
             master_pem_path = os.path.join(self.opts['pki_dir'], 'master.pem')
             log.debug("Signing data packet")
             payload['sig'] = salt.crypt.sign_message(master_pem_path, payload['load'])
-        int_payload = {'payload': self.serial.dumps(payload)}
+        # The payload is serialized once, and passed on untouched to the
+        # minions by the publish daemon
+        payload = self.serial.dumps(payload)
+        int_payload = {}
 
         # add some targeting stuff for lists only (for now)
         if load['tgt_type'] == 'list':
@@ -1033,22 +1129,44 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         # If zmq_filtering is enabled, target matching has to happen master side
         match_targets = ["pcre", "glob", "list"]
         if self.opts['zmq_filtering'] and load['tgt_type'] in match_targets:
-            # Fetch a list of minions that match
-            _res = self.ckminions.check_minions(load['tgt'],
-                                                tgt_type=load['tgt_type'])
-            match_ids = _res['minions']
+            if minions is None:
+                # Fetch a list of minions that match
+                minions = self.ckminions.check_minions(
+                    load['tgt'],
+                    tgt_type=load['tgt_type'])['minions']
+            match_ids = minions
 
             log.debug("Publish Side Match: %s", match_ids)
             # Send list of miions thru so zmq can target them
             int_payload['topic_lst'] = match_ids
-        payload = self.serial.dumps(int_payload)
+        elif self.opts['zmq_filtering'] and self.opts.get('zmq_filtering_all_targets'):
+            if minions is None:
+                # The match is greedy: the minions the master has no data
+                # about are always part of it
+                minions = self.ckminions.check_minions(
+                    load['tgt'],
+                    tgt_type=load['tgt_type'],
+                    delimiter=load.get('delimiter', DEFAULT_TARGET_DELIM))['minions']
+            if minions:
+                log.debug("Publish Side Match: %s", minions)
+                int_payload['topic_lst'] = minions
+            else:
+                # The target could not be resolved here, let the minions
+                # match it
+                log.debug('No publish side match for %s target %s, '
+                          'broadcasting', load['tgt_type'], load['tgt'])
+        header = self.serial.dumps(int_payload)
         log.debug(
             'Sending payload to publish daemon. jid=%s size=%d',
             load.get('jid', None), len(payload),
         )
         if not self.pub_sock:
             self.pub_connect()
-        self.pub_sock.send(payload)
+        # Every shard gets the load, each one only sends it to the minions
+        # subscribed to it
+        payload = zmq.Frame(payload)
+        for pub_sock in self.pub_socks:
+            pub_sock.send_multipart([header, payload], copy=False)
         log.debug('Sent payload to publish daemon.')
 
 
@@ -58,6 +58,7 @@ import time
 import fnmatch
 import hashlib
 import logging
+import re
 import datetime
 import sys
 
@@ -80,6 +81,7 @@ import salt.payload
 import salt.utils.asynchronous
 import salt.utils.cache
 import salt.utils.dicttrim
+import salt.utils.eventring
 import salt.utils.files
 import salt.utils.platform
 import salt.utils.process
@@ -227,6 +229,74 @@ def update_stats(stats, start_time, data):
     return stats
 
 
+class TagMatcher(object):
+    '''
+    Match event tags against many glob patterns at once, with the semantics of
+    ``fnmatch.fnmatch``.
+
+    The patterns are added with a value, ``match`` returns the values of all
+    the patterns matching a tag, in the order the patterns were added. The
+    patterns without wildcards are looked up in a dict. The others are kept in
+    a trie of the literal prefixes preceding their first wildcard, only the
+    patterns found along the path of the tag in the trie are checked with
+    their compiled regular expression.
+
+    .. code-block:: python
+
+        matcher = TagMatcher([('salt/minion/*/start', 'start.sls'),
+                              ('salt/auth', 'auth.sls')])
+        matcher.match('salt/minion/web1/start')  # ['start.sls']
+    '''
+    WILDCARDS = re.compile(r'[*?[]')
+
+    def __init__(self, patterns=()):
+        # A node of the trie is a list of its children by character and of the
+        # patterns with the prefix of the node
+        self._root = [{}, []]
+        self._exact = {}
+        self._count = 0
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, pattern, value):
+        '''
+        Add a glob pattern and the value returned when it matches a tag
+        '''
+        pattern = os.path.normcase(pattern)
+        entry = (self._count, value)
+        self._count += 1
+        wildcard = self.WILDCARDS.search(pattern)
+        if wildcard is None:
+            self._exact.setdefault(pattern, []).append(entry)
+            return
+        node = self._root
+        for char in pattern[:wildcard.start()]:
+            node = node[0].setdefault(char, [{}, []])
+        node[1].append((re.compile(fnmatch.translate(pattern)).match, entry))
+
+    def match(self, tag):
+        '''
+        Return the values of the patterns matching the tag
+        '''
+        tag = os.path.normcase(tag)
+        found = list(self._exact.get(tag, ()))
+        node = self._root
+        idx = 0
+        while node is not None:
+            for match, entry in node[1]:
+                if match(tag):
+                    found.append(entry)
+            if idx == len(tag):
+                break
+            node = node[0].get(tag[idx])
+            idx += 1
+        found.sort(key=lambda entry: entry[0])
+        return [value for _, value in found]
+
+
 class SaltEvent(object):
     '''
     Warning! Use the get_event function or the code will not be
@@ -1078,6 +1148,7 @@ class EventPublisher(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.opts = salt.config.DEFAULT_MASTER_OPTS.copy()
         self.opts.update(opts)
         self._closing = False
+        self.ring = None
 
     # __setstate__ and __getstate__ are only used on Windows.
     # We do this so that __init__ will be invoked on Windows in the child
@@ -1130,6 +1201,10 @@ class EventPublisher(salt.utils.process.SignalHandlingMultiprocessingProcess):
                 payload_handler=self.handle_publish,
             )
 
+            # Keep the events in the event ring for the subscribers reading
+            # them again after reconnecting
+            self.ring = salt.utils.eventring.get_event_ring(self.opts, writer=True)
+
             # Start the master event publisher
             with salt.utils.files.set_umask(0o177):
                 self.publisher.start()
@@ -1151,6 +1226,8 @@ class EventPublisher(salt.utils.process.SignalHandlingMultiprocessingProcess):
         Get something from epull, publish it out epub, and return the package (or None)
         '''
         try:
+            if self.ring is not None:
+                self.ring.append(package)
             self.publisher.publish(package)
             return package
         # Add an extra fallback in case a forked process leeks through
@@ -1167,6 +1244,8 @@ class EventPublisher(salt.utils.process.SignalHandlingMultiprocessingProcess):
             self.publisher.close()
         if hasattr(self, 'puller'):
             self.puller.close()
+        if getattr(self, 'ring', None) is not None:
+            self.ring.close()
         if hasattr(self, 'io_loop'):
             self.io_loop.close()
 
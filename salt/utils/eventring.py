@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+'''
+A ring buffer of the events published on the master event bus, kept on disk
+so that the subscribers can read again the events published while they were
+disconnected.
+
+.. versionadded:: Neon
+
+The ring is made of ``event_ring_segments`` memory mapped files of
+``event_ring_segment_size`` bytes in the ``event_ring`` directory of the
+``cachedir`` of the master. The master event publisher appends each event to
+the current segment with a sequence number, and reuses the oldest segment once
+the current one is full. The sequence numbers go on across the restarts of the
+master.
+
+A segment starts with the sequence number of its first event, 0 while the
+segment is being reused, followed by the events:
+
+.. code-block:: text
+
+    <seq: uint64> <length: uint32> <event package: length bytes>
+
+An event whose sequence number is not the one following the previous event
+ends the segment.
+
+A subscriber remembers the sequence number of the last event it processed and
+reads the events following it:
+
+.. code-block:: python
+
+    ring = salt.utils.eventring.EventRing(opts)
+    for seq, tag, data in ring.iter_events(since=last_seq):
+        ...
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import logging
+import mmap
+import os
+import struct
+import time
+
+# Import salt libs
+import salt.utils.event
+import salt.utils.files
+
+log = logging.getLogger(__name__)
+
+_BASE = struct.Struct(str('<Q'))
+_SEQ = struct.Struct(str('<Q'))
+_LENGTH = struct.Struct(str('<I'))
+_HEADER_SIZE = _SEQ.size + _LENGTH.size
+_END = b'\0' * _HEADER_SIZE
+
+
+class EventRing(object):
+    '''
+    The segments of the event ring of a master. The event publisher of the
+    master is the writer of the ring, the other processes only read it.
+    '''
+    def __init__(self, opts, writer=False):
+        self.opts = opts
+        self.path = os.path.join(opts['cachedir'], 'event_ring')
+        self.segments = opts['event_ring_segments']
+        self.segment_size = opts['event_ring_segment_size']
+        self.writer = writer
+        self.maps = []
+        self._inodes = []
+        # The positions following the last event written by the writer, and
+        # the last event read by the reader: the segment, its base, and the
+        # offset and sequence number of the next event
+        self.end = None
+        self.cursor = None
+        self._open()
+
+    def _segment_path(self, idx):
+        return os.path.join(self.path, 'segment.{0}'.format(idx))
+
+    def _open(self):
+        '''
+        Map the segments, created by the writer when they are missing or were
+        made with another size
+        '''
+        self.close()
+        if self.writer and not os.path.isdir(self.path):
+            os.makedirs(self.path, 0o700)
+        for idx in range(self.segments):
+            path = self._segment_path(idx)
+            if self.writer:
+                if os.path.exists(path) and os.path.getsize(path) != self.segment_size:
+                    # A new file, for the readers to map it again
+                    os.remove(path)
+                with salt.utils.files.fopen(path, 'a+b') as fp_:
+                    fp_.seek(0, os.SEEK_END)
+                    if fp_.tell() != self.segment_size:
+                        fp_.truncate(self.segment_size)
+                        if hasattr(os, 'posix_fallocate'):
+                            # Allocate the segment now, rather than failing
+                            # to write to the map once the disk is full
+                            os.posix_fallocate(fp_.fileno(), 0, self.segment_size)
+                    self.maps.append(mmap.mmap(fp_.fileno(), self.segment_size))
+                    self._inodes.append(os.fstat(fp_.fileno()).st_ino)
+            else:
+                with salt.utils.files.fopen(path, 'rb') as fp_:
+                    self.maps.append(mmap.mmap(fp_.fileno(), 0, access=mmap.ACCESS_READ))
+                    self._inodes.append(os.fstat(fp_.fileno()).st_ino)
+        if self.writer:
+            self.end = self._find_end()
+
+    def _changed(self):
+        '''
+        Check whether the writer made the segments again since they were mapped
+        '''
+        try:
+            return [os.stat(self._segment_path(idx)).st_ino
+                    for idx in range(self.segments)] != self._inodes
+        except OSError:
+            return True
+
+    def close(self):
+        for map_ in self.maps:
+            map_.close()
+        self.maps = []
+        self._inodes = []
+        self.end = None
+        self.cursor = None
+
+    def _base(self, idx):
+        return _BASE.unpack_from(self.maps[idx], 0)[0]
+
+    def _bases(self):
+        '''
+        Return the indexes and bases of the segments in use, oldest first
+        '''
+        return sorted((self._base(idx), idx) for idx in range(len(self.maps))
+                      if self._base(idx))
+
+    def _scan(self, idx, base, offset, seq, since=0, limit=None):
+        '''
+        Read the events of a segment from offset, seq being the sequence
+        number expected there. Return the events following since and the
+        position following them, or None when the segment was reused
+        meanwhile.
+        '''
+        map_ = self.maps[idx]
+        ret = []
+        while offset + _HEADER_SIZE <= len(map_):
+            if limit is not None and len(ret) >= limit:
+                break
+            if _SEQ.unpack_from(map_, offset)[0] != seq:
+                break
+            length = _LENGTH.unpack_from(map_, offset + _SEQ.size)[0]
+            start = offset + _HEADER_SIZE
+            package = map_[start:start + length] if seq > since else None
+            if self._base(idx) != base:
+                return None
+            if package is not None:
+                ret.append((seq, package))
+            offset = start + length
+            seq += 1
+        return ret, (idx, base, offset, seq)
+
+    def _find_end(self):
+        '''
+        Return the position following the last event of the ring
+        '''
+        bases = self._bases()
+        if not bases:
+            if self.writer:
+                _BASE.pack_into(self.maps[0], 0, 1)
+                return (0, 1, _BASE.size, 1)
+            return None
+        base, idx = bases[-1]
+        scanned = self._scan(idx, base, _BASE.size, base, since=float('inf'))
+        if scanned is None:
+            return self._find_end()
+        return scanned[1]
+
+    def append(self, package):
+        '''
+        Append an event package to the ring and return its sequence number,
+        or None when the event does not fit in a segment
+        '''
+        size = _HEADER_SIZE + len(package)
+        if _BASE.size + size + _HEADER_SIZE > self.segment_size:
+            log.warning(
+                'The event of %s bytes is larger than the event_ring_segment_size, '
+                'it is not kept in the event ring', len(package)
+            )
+            return None
+        idx, base, offset, seq = self.end
+        if offset + size + _HEADER_SIZE > self.segment_size:
+            # Reuse the oldest segment, the readers tell it apart by its base
+            idx = (idx + 1) % self.segments
+            base, offset = seq, _BASE.size
+            map_ = self.maps[idx]
+            _BASE.pack_into(map_, 0, 0)
+            map_[offset:offset + _HEADER_SIZE] = _END
+            _BASE.pack_into(map_, 0, base)
+        map_ = self.maps[idx]
+        start = offset + _HEADER_SIZE
+        map_[start:start + len(package)] = package
+        map_[start + len(package):start + len(package) + _HEADER_SIZE] = _END
+        # The sequence number is written last, the readers only read the event
+        # once it is complete
+        _LENGTH.pack_into(map_, offset + _SEQ.size, len(package))
+        _SEQ.pack_into(map_, offset, seq)
+        self.end = (idx, base, start + len(package), seq + 1)
+        return seq
+
+    def last_seq(self):
+        '''
+        Return the sequence number of the last event of the ring, 0 when it is
+        empty
+        '''
+        end = self._find_end()
+        return end[3] - 1 if end else 0
+
+    def _locate(self, since):
+        '''
+        Return the position of the segment holding the event following since,
+        or of the oldest segment when it was overwritten
+        '''
+        bases = self._bases()
+        if not bases:
+            return None
+        starting = [item for item in bases if item[0] <= since + 1]
+        base, idx = starting[-1] if starting else bases[0]
+        return (idx, base, _BASE.size, base)
+
+    def read(self, since=0, limit=1000):
+        '''
+        Return up to limit ``(seq, package)`` tuples of the events following
+        the sequence number since. The events already overwritten are
+        skipped, the first event returned then follows since by more than
+        one.
+        '''
+        ret = []
+        position = self.cursor
+        if position is None or position[3] != since + 1 or self._base(position[0]) != position[1]:
+            position = self._locate(since)
+        while position is not None and len(ret) < limit:
+            scanned = self._scan(*position, since=since, limit=limit - len(ret))
+            if scanned is None:
+                # The segment was reused while reading it
+                position = self._locate(ret[-1][0] if ret else since)
+                continue
+            events, self.cursor = scanned
+            ret.extend(events)
+            if events:
+                since = events[-1][0]
+            seq = self.cursor[3]
+            # The segment following an empty one would be the same
+            following = [idx for base, idx in self._bases()
+                         if base == seq and base != self.cursor[1]]
+            position = (following[0], seq, _BASE.size, seq) if following else None
+        if not ret:
+            if not self.writer and self._changed():
+                # The master made the ring again, with another size
+                self._open()
+            elif self.cursor is not None and self.cursor[3] <= since:
+                # The ring was made again, its sequence numbers started over
+                log.warning('The event ring ends before event %s, reading it from the start', since)
+                return self.read(0, limit)
+        return ret
+
+    def iter_events(self, since=None, wait=5, event=None):
+        '''
+        Yield the ``(seq, tag, data)`` tuples of the events following the
+        sequence number since, or the events published from now on when since
+        is None. When there are no new events, wait for the next event
+        published on the event bus, or poll the ring every ``wait`` seconds
+        when no event listener is passed. The events the listener received
+        meanwhile are discarded before each read of the ring, which holds them
+        too, so that they do not pile up on the event bus.
+        '''
+        if since is None:
+            since = self.last_seq()
+        while True:
+            if event is not None:
+                for _ in range(1000):
+                    if event.get_event(full=True, no_block=True, auto_reconnect=True) is None:
+                        break
+            events = self.read(since)
+            for seq, package in events:
+                tag, data = salt.utils.event.SaltEvent.unpack(package)
+                yield seq, tag, data
+                since = seq
+            if not events:
+                if event is not None:
+                    event.get_event(wait=wait, full=True, auto_reconnect=True)
+                else:
+                    time.sleep(wait)
+
+
+def get_event_ring(opts, writer=False):
+    '''
+    Return the event ring of the master, or None when it is disabled or
+    cannot be used
+    '''
+    if not opts.get('event_ring_segments'):
+        return None
+    try:
+        return EventRing(opts, writer=writer)
+    except (IOError, OSError, ValueError) as exc:
+        log.error('Unable to use the event ring in %s: %s', opts['cachedir'], exc)
+        return None
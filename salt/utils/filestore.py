@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+'''
+A content-addressed store for the files cached by the minion.
+
+Every stored file is kept once under the hash of its content, and the cached
+paths (one per saltenv and path) are symlinks pointing into the store. When a
+size limit is set, the least recently used files are evicted from the store,
+which leaves the symlinks pointing to them dangling so that the next request
+for them fetches the file again.
+'''
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import python libs
+import errno
+import logging
+import os
+import random
+import shutil
+
+# Import salt libs
+import salt.utils.hashutils
+import salt.utils.path
+
+log = logging.getLogger(__name__)
+
+
+class FileStore(object):
+    '''
+    Store files by their hash, under ``root/<hash_type>/<hsum[:2]>/<hsum>``
+
+    :param str root: The directory the files are stored in
+    :param int max_size: The maximum number of bytes to keep in the store, the
+        least recently used files are evicted past this size. ``0`` disables
+        the limit.
+    '''
+    def __init__(self, root, max_size=0):
+        self.root = root
+        self.max_size = max_size
+        self._size = None
+
+    def path(self, hsum, hash_type):
+        '''
+        Return the location of the file with the given hash in the store
+        '''
+        return os.path.join(self.root, hash_type, hsum[:2], hsum)
+
+    def _owns(self, path):
+        '''
+        Return the path of the stored file ``path`` links to, or ``None`` if
+        it is not a link into the store
+        '''
+        if not os.path.islink(path):
+            return None
+        target = os.path.realpath(path)
+        if not target.startswith(os.path.realpath(self.root) + os.sep):
+            return None
+        return target
+
+    def touch(self, path):
+        '''
+        Mark the stored file ``path`` links to as recently used
+        '''
+        target = self._owns(path)
+        if target is None:
+            return
+        try:
+            os.utime(target, None)
+        except OSError:
+            pass
+
+    def link(self, hsum, hash_type, dest):
+        '''
+        Replace ``dest`` with a link to the stored file with the given hash.
+        Returns ``False`` if no such file is in the store.
+        '''
+        src = self.path(hsum, hash_type)
+        if not os.path.isfile(src):
+            return False
+        try:
+            os.utime(src, None)
+            # Build the link next to dest and rename it over dest, so that
+            # dest is never missing or pointing elsewhere
+            tmp = os.path.join(
+                os.path.dirname(dest),
+                '.___link{0:08x}'.format(random.getrandbits(32)))
+            os.symlink(src, tmp)
+            try:
+                os.rename(tmp, dest)
+            except OSError:
+                os.remove(tmp)
+                raise
+        except OSError as exc:
+            log.debug('Failed to link %s to %s: %s', dest, src, exc)
+            return False
+        log.debug('Linked %s to the stored copy %s', dest, src)
+        return True
+
+    def add(self, path, hsum, hash_type):
+        '''
+        Move the file at ``path`` into the store and replace it with a link to
+        the stored copy. The file is only stored if its content matches
+        ``hsum``. Returns ``True`` if ``path`` now links into the store.
+        '''
+        if self._owns(path) is not None:
+            self.touch(path)
+            return True
+        try:
+            if salt.utils.hashutils.get_hash(path, hash_type) != hsum:
+                log.debug('Not storing %s, it does not match hash %s',
+                          path, hsum)
+                return False
+        except (IOError, OSError, ValueError) as exc:
+            log.debug('Not storing %s: %s', path, exc)
+            return False
+
+        obj = self.path(hsum, hash_type)
+        try:
+            os.makedirs(os.path.dirname(obj))
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                log.debug('Unable to create %s: %s', os.path.dirname(obj), exc)
+                return False
+
+        if not os.path.isfile(obj):
+            try:
+                size = os.stat(path).st_size
+                shutil.move(path, obj)
+            except (IOError, OSError) as exc:
+                log.debug('Failed to store %s: %s', path, exc)
+                return False
+            if self._size is not None:
+                self._size += size
+        if not self.link(hsum, hash_type, path):
+            return False
+        self.evict()
+        return True
+
+    def size(self):
+        '''
+        Return the number of bytes used by the files in the store
+        '''
+        return sum(x[2] for x in self._objects())
+
+    def _objects(self):
+        '''
+        Return a list of ``(mtime, path, size)`` for every stored file
+        '''
+        ret = []
+        for root, _, files in salt.utils.path.os_walk(self.root):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                ret.append((stat.st_mtime, path, stat.st_size))
+        return ret
+
+    def evict(self):
+        '''
+        Remove the least recently used files from the store until it fits in
+        ``max_size``
+        '''
+        if not self.max_size:
+            return
+        if self._size is not None and self._size <= self.max_size:
+            return
+        # Other processes share the store, so get the real size before
+        # evicting anything
+        objects = self._objects()
+        self._size = sum(x[2] for x in objects)
+        if self._size <= self.max_size:
+            return
+        for _, path, size in sorted(objects):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            log.debug('Evicted %s from the file store', path)
+            self._size -= size
+            if self._size <= self.max_size:
+                break
@@ -171,6 +171,22 @@ def get_hash(path, form='sha256', chunk_size=65536):
         return hash_obj.hexdigest()
 
 
+def get_block_hashes(path, block_size, form='sha256'):
+    '''
+    Get the hash sum of every ``block_size`` chunk of a file, in file order.
+
+    The last block may be shorter than ``block_size``. An empty file has no
+    blocks.
+    '''
+    hash_type = hasattr(hashlib, form) and getattr(hashlib, form) or None
+    if hash_type is None:
+        raise ValueError('Invalid hash type: {0}'.format(form))
+
+    with salt.utils.files.fopen(path, 'rb') as ifile:
+        return [hash_type(chunk).hexdigest()
+                for chunk in iter(lambda: ifile.read(block_size), b'')]
+
+
 class DigestCollector(object):
     '''
     Class to collect digest of the file tree.
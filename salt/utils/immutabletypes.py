@@ -113,3 +113,18 @@ def freeze(obj):
     if isinstance(obj, set):
         return ImmutableSet(obj)
     return obj
+
+
+def thaw(obj):
+    '''
+    Return the object wrapped by an immutable structure, without copying it.
+    The returned object must not be modified, use the ``copy`` method of the
+    immutable structure to get a modifiable copy.
+    '''
+    if isinstance(obj, ImmutableDict):
+        return obj._ImmutableDict__obj  # pylint: disable=protected-access
+    if isinstance(obj, ImmutableList):
+        return obj._ImmutableList__obj  # pylint: disable=protected-access
+    if isinstance(obj, ImmutableSet):
+        return obj._ImmutableSet__obj  # pylint: disable=protected-access
+    return obj
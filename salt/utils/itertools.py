@@ -66,6 +66,14 @@ def read_file(fh_, chunk_size=1048576):
             pass
 
 
+def chunks(seq, size):
+    '''
+    Generator that yields the slices of size items of a sequence
+    '''
+    for idx in range(0, len(seq), size):
+        yield seq[idx:idx + size]
+
+
 def fnmatch_multiple(candidates, pattern):
     '''
     Convenience function which runs fnmatch.fnmatch() on each element of passed
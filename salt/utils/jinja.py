@@ -18,8 +18,10 @@ from xml.etree.ElementTree import Element, SubElement, tostring
 
 # Import third party libs
 import jinja2
+import jinja2.meta
 from salt.ext import six
 from jinja2 import BaseLoader, Markup, TemplateNotFound, nodes
+from jinja2.bccache import FileSystemBytecodeCache
 from jinja2.environment import TemplateModule
 from jinja2.exceptions import TemplateRuntimeError
 from jinja2.ext import Extension
@@ -27,19 +29,24 @@ from jinja2.ext import Extension
 # Import salt libs
 from salt.exceptions import TemplateError
 import salt.fileclient
+import salt.utils.atomicfile
 import salt.utils.data
 import salt.utils.files
+import salt.utils.hashutils
 import salt.utils.json
 import salt.utils.stringutils
 import salt.utils.url
 import salt.utils.yaml
+import salt.version
 from salt.utils.decorators.jinja import jinja_filter, jinja_test, jinja_global
 from salt.utils.odict import OrderedDict
 
 log = logging.getLogger(__name__)
 
 __all__ = [
+    'SaltBytecodeCache',
     'SaltCacheLoader',
+    'SaltTemplate',
     'SerializerExtension'
 ]
 
@@ -171,6 +178,131 @@ class SaltCacheLoader(BaseLoader):
         raise TemplateNotFound(template)
 
 
+class SaltBytecodeCache(FileSystemBytecodeCache):
+    '''
+    A persistent cache of the compiled Jinja templates, stored in the salt
+    cachedir.
+
+    Jinja already checks the hash of the template source before using cached
+    bytecode. The bytecode also depends on the Salt and Jinja versions and on
+    the environment options (extensions, block delimiters, whitespace
+    handling), so each combination of those gets its own cache directory.
+    '''
+    def __init__(self, opts, env_args):
+        options = sorted(
+            (key, repr(val)) for key, val in six.iteritems(env_args)
+            if key != 'loader'
+        )
+        env_key = salt.utils.hashutils.sha1_digest(repr((
+            salt.version.__version__,
+            jinja2.__version__,
+            options,
+        )))
+        directory = os.path.join(opts['cachedir'], 'jinja', env_key)
+        if not os.path.isdir(directory):
+            try:
+                with salt.utils.files.set_umask(0o077):
+                    os.makedirs(directory)
+            except OSError:
+                # Possibly created by another process in the meantime, any
+                # other error will show when dumping the bytecode
+                pass
+        super(SaltBytecodeCache, self).__init__(directory, '%s.cache')
+
+    def load_bytecode(self, bucket):
+        try:
+            super(SaltBytecodeCache, self).load_bytecode(bucket)
+        except Exception as exc:  # pylint: disable=broad-except
+            # A truncated or otherwise unreadable cache file, the template
+            # will be compiled again
+            log.debug('Unable to load Jinja bytecode for %s: %s',
+                      bucket.key, exc)
+            bucket.reset()
+
+    def dump_bytecode(self, bucket):
+        try:
+            with salt.utils.atomicfile.atomic_open(
+                    self._get_cache_filename(bucket), 'wb') as ofile:
+                bucket.write_bytecode(ofile)
+        except (IOError, OSError) as exc:
+            log.debug('Unable to cache Jinja bytecode for %s: %s',
+                      bucket.key, exc)
+
+
+class SaltTemplate(jinja2.Template):
+    '''
+    A Jinja template whose module, as used by ``{% import %}`` and
+    ``{% from ... import ... %}`` without context, can be shared by all the
+    renders of a session.
+
+    Sharing is enabled by setting an ``import_cache`` dict on the
+    environment. The module of a template is then only executed again when
+    one of the variables the template reads from its globals (``salt``,
+    ``grains``, ``pillar``, ``sls``...) differs from the previous executions.
+    The least recently executed modules are dropped past
+    ``import_cache_size`` modules.
+    '''
+    import_cache_size = 256
+
+    def _get_default_module(self, *args, **kwargs):
+        cache = getattr(self.environment, 'import_cache', None)
+        names = None
+        if cache is not None and self._module is None and self.filename:
+            names = self._undeclared_variables()
+        if names is None:
+            return super(SaltTemplate, self)._get_default_module(*args, **kwargs)
+
+        values = tuple(self.globals.get(name) for name in names)
+        # Strings and numbers are compared by value, anything else must be
+        # the very same object, or wrap the very same object as the
+        # AliasedLoader made around salt for every render. The cache keeps a
+        # reference to the values, so their ids cannot be reused while the
+        # entry exists.
+        inputs = tuple(
+            val if isinstance(val, (six.string_types, six.integer_types,
+                                    float, bool, type(None)))
+            else id(getattr(val, 'wrapped', val))
+            for val in values
+        )
+        key = (self.filename, names, inputs)
+        if key in cache:
+            log.trace('Reusing the module of template %s', self.name)
+            entry = cache.pop(key)
+            self._module = entry[1]
+            cache[key] = entry
+        else:
+            module = super(SaltTemplate, self)._get_default_module(*args, **kwargs)
+            cache[key] = (values, module)
+            while len(cache) > self.import_cache_size:
+                cache.popitem(last=False)
+        return self._module
+
+    def _undeclared_variables(self):
+        '''
+        Return the sorted names of the variables the template reads from its
+        globals, or ``None`` if the source cannot be parsed
+        '''
+        try:
+            mtime = os.path.getmtime(self.filename)
+        except OSError:
+            return None
+        names = getattr(self.environment, 'import_variables', None)
+        if names is None:
+            names = self.environment.import_variables = {}
+        if (self.filename, mtime) not in names:
+            try:
+                with salt.utils.files.fopen(self.filename, 'rb') as ifile:
+                    source = salt.utils.stringutils.to_unicode(ifile.read())
+                ast = self.environment.parse(source)
+            except Exception as exc:  # pylint: disable=broad-except
+                log.debug('Unable to parse %s: %s', self.filename, exc)
+                names[(self.filename, mtime)] = None
+            else:
+                names[(self.filename, mtime)] = tuple(
+                    sorted(jinja2.meta.find_undeclared_variables(ast)))
+        return names[(self.filename, mtime)]
+
+
 class PrintableDict(OrderedDict):
     '''
     Ensures that dict str() and repr() are YAML friendly.
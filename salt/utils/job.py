@@ -12,6 +12,7 @@ import salt.minion
 import salt.utils.jid
 import salt.utils.event
 import salt.utils.verify
+from salt.ext import six
 
 log = logging.getLogger(__name__)
 
@@ -31,6 +32,8 @@ def store_job(opts, load, event=None, mminion=None):
         mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
 
     job_cache = opts['master_job_cache']
+    if load.get('stream'):
+        _merge_partial(opts, load, mminion)
     if load['jid'] == 'req':
         # The minion is returning a standalone job, request a jobid
         load['arg'] = load.get('arg', load.get('fun_args', []))
@@ -116,6 +119,66 @@ def store_job(opts, load, event=None, mminion=None):
         mminion.returners[updateetfstr](load['jid'], endtime)
 
 
+def _merge_partial(opts, load, mminion):
+    '''
+    Put the state results a minion sent while its job was running back into
+    its final return
+    '''
+    stream = load.pop('stream')
+    getfstr = '{0}.get_partial_returns'.format(opts['master_job_cache'])
+    if getfstr not in mminion.returners or not isinstance(load['return'], dict):
+        return
+    partial = mminion.returners[getfstr](load['jid'], load['id'])
+    if len(partial) != stream.get('states'):
+        log.warning(
+            'Job %s: expected %s streamed state results from %s, found %s',
+            load['jid'], stream.get('states'), load['id'], len(partial)
+        )
+    partial.update(load['return'])
+    load['return'] = partial
+
+
+def store_partial(opts, load, event=None, mminion=None):
+    '''
+    Store a batch of results sent by a minion while its job is running, using
+    the configured master_job_cache. The batches are merged back into the
+    final return of the minion by store_job.
+
+    Returns False if the job cache cannot store the batch, the minion then
+    sends the results with its final return.
+    '''
+    if not opts['job_cache'] or opts.get('ext_job_cache'):
+        return False
+    if not salt.utils.jid.is_jid(load['jid']):
+        return False
+    if not salt.utils.verify.valid_id(opts, load['id']):
+        return False
+    if not isinstance(load['return'], dict):
+        return False
+    if mminion is None:
+        mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
+
+    savefstr = '{0}.save_partial_return'.format(opts['master_job_cache'])
+    if savefstr not in mminion.returners:
+        return False
+    if not mminion.returners[savefstr](
+            load['jid'], load['id'], load['seq'], load['return']):
+        return False
+
+    if event:
+        log.debug('Got partial return %s from %s for job %s',
+                  load['seq'], load['id'], load['jid'])
+        event.fire_event(
+            {'id': load['id'],
+             'jid': load['jid'],
+             'seq': load['seq'],
+             'ret': load['return']},
+            salt.utils.event.tagify(
+                [load['jid'], 'partial', load['id'], six.text_type(load['seq'])],
+                'job'))
+    return True
+
+
 def store_minions(opts, jid, minions, mminion=None, syndic_id=None):
     '''
     Store additional minions matched on lower-level masters using the configured
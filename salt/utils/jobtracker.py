@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+'''
+Track the minions still running the jobs published by the master, from the
+events of the master event bus.
+
+.. versionadded:: Neon
+
+The minions with :conf_minion:`job_heartbeat_interval` set fire a
+``salt/job/heartbeat/<minion id>`` event listing the jobs they are running.
+The job tracker of the master, enabled with :conf_master:`job_tracker`, keeps
+for each job published the targeted minions which did not return yet, and
+fires:
+
+``salt/job/<jid>/running``
+    Every ``gather_job_timeout / 2`` seconds while some minions are still
+    running the job, with the number of these minions.
+
+``salt/job/<jid>/complete``
+    Once all the targeted minions returned, or the minions which did not
+    return did not list the job in their heartbeats for
+    :conf_master:`job_tracker_timeout` seconds. ``unresponsive`` lists the
+    minions which stopped listing the job in their heartbeats, and
+    ``unknown`` the minions which never listed it, such as the minions
+    without heartbeats.
+
+The ``LocalClient`` waits for these events instead of publishing
+``saltutil.find_job`` to the minions which did not return yet. It only asks
+the ``unknown`` minions with ``saltutil.find_job`` whether they are still
+running the job.
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import logging
+import time
+
+# Import salt libs
+import salt.utils.event
+import salt.utils.process
+from salt.utils.event import tagify
+
+# Import 3rd-party libs
+from salt.ext import six
+
+log = logging.getLogger(__name__)
+
+
+class JobTracker(salt.utils.process.SignalHandlingMultiprocessingProcess):
+    '''
+    Listen to the job events of the master and tell the clients when the
+    minions are done with a job
+    '''
+    def __init__(self, opts, **kwargs):
+        super(JobTracker, self).__init__(**kwargs)
+        self.opts = opts
+        self.timeout = opts['job_tracker_timeout']
+        self.interval = max(opts['gather_job_timeout'] / 2.0, 1)
+        # {jid: {'pending': set, 'returned': int, 'start': float,
+        #        'heard': {minion id: float}, 'notified': float}}
+        self.jobs = {}
+        self.event = None
+
+    # __setstate__ and __getstate__ are only used on Windows.
+    def __setstate__(self, state):
+        self._is_child = True
+        JobTracker.__init__(
+            self,
+            state['opts'],
+            log_queue=state['log_queue'],
+            log_queue_level=state['log_queue_level']
+        )
+
+    def __getstate__(self):
+        return {
+            'opts': self.opts,
+            'log_queue': self.log_queue,
+            'log_queue_level': self.log_queue_level
+        }
+
+    def _fire(self, jid, status, data):
+        data['jid'] = jid
+        self.event.fire_event(data, tagify([jid, status], 'job'))
+
+    def _complete(self, jid, unresponsive=(), unknown=()):
+        job = self.jobs.pop(jid)
+        log.debug('Job %s is complete, unresponsive minions: %s, minions '
+                  'which never sent a heartbeat: %s', jid, unresponsive, unknown)
+        self._fire(jid, 'complete', {'returned': job['returned'],
+                                     'unresponsive': sorted(unresponsive),
+                                     'unknown': sorted(unknown)})
+
+    def handle_event(self, tag, data, now=None):
+        '''
+        Update the jobs with an event of the master event bus
+        '''
+        if now is None:
+            now = time.time()
+        parts = tag.split('/')
+        if len(parts) < 4 or parts[0] != 'salt' or parts[1] != 'job':
+            return
+        if parts[2] == 'heartbeat':
+            for jid in data.get('data', {}).get('jids', ()):
+                job = self.jobs.get(jid)
+                if job is not None and data.get('id') in job['pending']:
+                    job['heard'][data['id']] = now
+        elif parts[3] == 'new' and len(parts) == 4:
+            minions = data.get('minions')
+            if minions and parts[2] not in self.jobs:
+                self.jobs[parts[2]] = {'pending': set(minions),
+                                       'returned': 0,
+                                       'start': now,
+                                       'heard': {},
+                                       'notified': now}
+        elif parts[3] == 'ret' and len(parts) == 5:
+            job = self.jobs.get(parts[2])
+            if job is not None and parts[4] in job['pending']:
+                job['pending'].discard(parts[4])
+                job['heard'].pop(parts[4], None)
+                job['returned'] += 1
+                if not job['pending']:
+                    self._complete(parts[2])
+
+    def check(self, now=None):
+        '''
+        Complete the jobs whose remaining minions stopped sending heartbeats,
+        and tell the clients about the jobs still running. The minions which
+        never sent a heartbeat for the job are reported apart, the tracker does
+        not know whether they are running it.
+        '''
+        if now is None:
+            now = time.time()
+        for jid, job in list(six.iteritems(self.jobs)):
+            running = [minion for minion in job['pending']
+                       if now - job['heard'].get(minion, job['start']) < self.timeout]
+            if not running:
+                unknown = job['pending'].difference(job['heard'])
+                self._complete(jid, job['pending'].difference(unknown), unknown)
+            elif now - job['notified'] >= self.interval:
+                job['notified'] = now
+                self._fire(jid, 'running', {'running': len(running)})
+
+    def run(self):
+        '''
+        Follow the master event bus
+        '''
+        salt.utils.process.appendproctitle(self.__class__.__name__)
+        self.event = salt.utils.event.get_event(
+            'master',
+            opts=self.opts,
+            listen=True)
+        last_check = time.time()
+        while True:
+            data = self.event.get_event(wait=1, full=True, auto_reconnect=True)
+            now = time.time()
+            if data is not None:
+                try:
+                    self.handle_event(data['tag'], data['data'], now)
+                except Exception:
+                    log.exception('Unable to track the jobs with the event %s', data['tag'])
+            if now - last_check >= 1:
+                self.check(now)
+                last_check = now
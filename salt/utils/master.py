@@ -21,6 +21,7 @@ import salt.client
 import salt.pillar
 import salt.utils.atomicfile
 import salt.utils.files
+import salt.utils.itertools
 import salt.utils.minions
 import salt.utils.platform
 import salt.utils.stringutils
@@ -201,10 +202,12 @@ class MasterPillarUtil(object):
             return mine_data
         if not minion_ids:
             minion_ids = self.cache.list('minions')
+        minion_ids = [minion_id for minion_id in minion_ids
+                      if salt.utils.verify.valid_id(self.opts, minion_id)]
+        cdata = self.cache.fetch_many(
+            ['minions/{0}'.format(minion_id) for minion_id in minion_ids], 'mine')
         for minion_id in minion_ids:
-            if not salt.utils.verify.valid_id(self.opts, minion_id):
-                continue
-            mdata = self.cache.fetch('minions/{0}'.format(minion_id), 'mine')
+            mdata = cdata.get('minions/{0}'.format(minion_id))
             if isinstance(mdata, dict):
                 mine_data[minion_id] = mdata
         return mine_data
@@ -220,21 +223,24 @@ class MasterPillarUtil(object):
             return grains, pillars
         if not minion_ids:
             minion_ids = self.cache.list('minions')
-        for minion_id in minion_ids:
-            if not salt.utils.verify.valid_id(self.opts, minion_id):
-                continue
-            mdata = self.cache.fetch('minions/{0}'.format(minion_id), 'data')
-            if not isinstance(mdata, dict):
-                log.warning(
-                    'cache.fetch should always return a dict. ReturnedType: %s, MinionId: %s',
-                    type(mdata).__name__,
-                    minion_id
-                )
-                continue
-            if 'grains' in mdata:
-                grains[minion_id] = mdata['grains']
-            if 'pillar' in mdata:
-                pillars[minion_id] = mdata['pillar']
+        minion_ids = [minion_id for minion_id in minion_ids
+                      if salt.utils.verify.valid_id(self.opts, minion_id)]
+        for chunk in salt.utils.itertools.chunks(minion_ids, salt.cache.FETCH_MANY_CHUNK_SIZE):
+            cdata = self.cache.fetch_many(
+                ['minions/{0}'.format(minion_id) for minion_id in chunk], 'data')
+            for minion_id in chunk:
+                mdata = cdata.get('minions/{0}'.format(minion_id))
+                if not isinstance(mdata, dict):
+                    log.warning(
+                        'cache.fetch should always return a dict. ReturnedType: %s, MinionId: %s',
+                        type(mdata).__name__,
+                        minion_id
+                    )
+                    continue
+                if 'grains' in mdata:
+                    grains[minion_id] = mdata['grains']
+                if 'pillar' in mdata:
+                    pillars[minion_id] = mdata['pillar']
         return grains, pillars
 
     def _get_live_minion_grains(self, minion_ids):
@@ -444,6 +450,8 @@ class MasterPillarUtil(object):
             grains, pillars = self._get_cached_minion_data(*minion_ids)
         try:
             c_minions = self.cache.list('minions')
+            # The data left to the minions is stored all at once
+            minion_data = {}
             for minion_id in minion_ids:
                 if not salt.utils.verify.valid_id(self.opts, minion_id):
                     continue
@@ -459,10 +467,11 @@ class MasterPillarUtil(object):
                     (clear_grains and not minion_pillar)):
                     # Not saving pillar or grains, so just delete the cache file
                     self.cache.flush(bank, 'data')
+                    self.cache.flush(bank, 'target')
                 elif clear_pillar and minion_grains:
-                    self.cache.store(bank, 'data', {'grains': minion_grains})
+                    minion_data[bank] = {'grains': minion_grains}
                 elif clear_grains and minion_pillar:
-                    self.cache.store(bank, 'data', {'pillar': minion_pillar})
+                    minion_data[bank] = {'pillar': minion_pillar}
                 if clear_mine:
                     # Delete the whole mine file
                     self.cache.flush(bank, 'mine')
@@ -472,6 +481,12 @@ class MasterPillarUtil(object):
                     if isinstance(mine_data, dict):
                         if mine_data.pop(clear_mine_func, False):
                             self.cache.store(bank, 'mine', mine_data)
+            self.cache.store_many(minion_data, 'data')
+            if any(six.itervalues(salt.utils.minions.target_keys(self.opts))):
+                self.cache.store_many(
+                    dict((bank, salt.utils.minions.target_snapshot(self.opts, data))
+                         for bank, data in six.iteritems(minion_data)),
+                    'target')
         except (OSError, IOError):
             return True
         return True
@@ -14,8 +14,10 @@ import logging
 # Import salt libs
 import salt.payload
 import salt.roster
+import salt.transport
 import salt.utils.data
 import salt.utils.files
+import salt.utils.itertools
 import salt.utils.network
 import salt.utils.stringutils
 import salt.utils.versions
@@ -24,6 +26,7 @@ from salt.exceptions import CommandExecutionError, SaltCacheError
 import salt.auth.ldap
 import salt.cache
 from salt.ext import six
+from salt.ext.six.moves import range  # pylint: disable=import-error,redefined-builtin
 
 # Import 3rd-party libs
 from salt._compat import ipaddress
@@ -88,6 +91,67 @@ def get_minion_data(minion, opts):
     return minion if minion else None, grains, pillar
 
 
+def target_keys(opts):
+    '''
+    Return the grains and pillar keys the targeting snapshots of the minions
+    hold, as lists of key paths
+    '''
+    keys = opts.get('minion_data_cache_target_keys') or {}
+    return dict((search_type, sorted(set(keys.get(search_type) or [])))
+                for search_type in ('grains', 'pillar'))
+
+
+def _project(data, paths):
+    '''
+    Return the part of the data dict holding the key paths. The walk along a
+    path stops at the first value which is not a dict, and keeps it whole.
+    '''
+    ret = {}
+    if not isinstance(data, dict):
+        return ret
+    for path in paths:
+        src, dst = data, ret
+        parts = path.split(DEFAULT_TARGET_DELIM)
+        for idx, part in enumerate(parts):
+            if part not in src:
+                break
+            if idx == len(parts) - 1 or not isinstance(src[part], dict):
+                dst[part] = src[part]
+                break
+            src = src[part]
+            if not isinstance(dst.get(part), dict):
+                dst[part] = {}
+            dst = dst[part]
+    return ret
+
+
+def target_snapshot(opts, data):
+    '''
+    Return the targeting snapshot of the cached data of a minion, holding
+    only the grains and pillar keys listed in the
+    ``minion_data_cache_target_keys`` option, or None when no key is listed
+    '''
+    keys = target_keys(opts)
+    if not keys['grains'] and not keys['pillar']:
+        return None
+    ret = {'keys': keys}
+    for search_type in ('grains', 'pillar'):
+        ret[search_type] = _project(data.get(search_type), keys[search_type])
+    return ret
+
+
+def store_minion_data(cache, opts, minion_id, data):
+    '''
+    Store the grains and pillar of a minion in the minion data cache, along
+    with its targeting snapshot
+    '''
+    bank = 'minions/{0}'.format(minion_id)
+    cache.store(bank, 'data', data)
+    snapshot = target_snapshot(opts, data)
+    if snapshot is not None:
+        cache.store(bank, 'target', snapshot)
+
+
 def nodegroup_comp(nodegroup, nodegroups, skip=None, first_call=True):
     '''
     Recursively expand ``nodegroup`` from ``nodegroups``; ignore nodegroups in ``skip``
@@ -263,6 +327,28 @@ class CkMinions(object):
             )
             return minions
 
+    def _fetch_target_data(self, minions, expr, delimiter, search_type):
+        '''
+        Return the cached data to match expr against, by the bank of each of
+        the minions. The targeting snapshot of a minion is used instead of its
+        whole data when it holds the key expr targets.
+        '''
+        banks = ['minions/{0}'.format(id_) for id_ in minions]
+        keys = target_keys(self.opts)
+        if not any(expr.startswith(delimiter.join(path.split(DEFAULT_TARGET_DELIM)) + delimiter)
+                   for path in keys[search_type]):
+            return self.cache.fetch_many(banks, 'data')
+        ret = {}
+        missing = []
+        for bank, snapshot in six.iteritems(self.cache.fetch_many(banks, 'target')):
+            if isinstance(snapshot, dict) and snapshot.get('keys') == keys:
+                ret[bank] = snapshot
+            else:
+                # Cached before the keys were set or changed
+                missing.append(bank)
+        ret.update(self.cache.fetch_many(missing, 'data'))
+        return ret
+
     def _check_cache_minions(self,
                              expr,
                              delimiter,
@@ -300,21 +386,23 @@ class CkMinions(object):
                 return {'minions': minions,
                         'missing': []}
             minions = set(minions)
-            for id_ in cminions:
-                if greedy and id_ not in minions:
-                    continue
-                mdata = self.cache.fetch('minions/{0}'.format(id_), 'data')
-                if mdata is None:
-                    if not greedy:
+            if greedy:
+                cminions = [id_ for id_ in cminions if id_ in minions]
+            for chunk in salt.utils.itertools.chunks(list(cminions), salt.cache.FETCH_MANY_CHUNK_SIZE):
+                cdata = self._fetch_target_data(chunk, expr, delimiter, search_type)
+                for id_ in chunk:
+                    mdata = cdata.get('minions/{0}'.format(id_))
+                    if mdata is None:
+                        if not greedy:
+                            minions.remove(id_)
+                        continue
+                    search_results = mdata.get(search_type)
+                    if not salt.utils.data.subdict_match(search_results,
+                                                         expr,
+                                                         delimiter=delimiter,
+                                                         regex_match=regex_match,
+                                                         exact_match=exact_match):
                         minions.remove(id_)
-                    continue
-                search_results = mdata.get(search_type)
-                if not salt.utils.data.subdict_match(search_results,
-                                                     expr,
-                                                     delimiter=delimiter,
-                                                     regex_match=regex_match,
-                                                     exact_match=exact_match):
-                    minions.remove(id_)
             minions = list(minions)
         return {'minions': minions,
                 'missing': []}
@@ -399,8 +487,10 @@ class CkMinions(object):
             proto = 'ipv{0}'.format(tgt.version)
 
             minions = set(minions)
+            cdata = self._fetch_target_data(
+                cminions, proto + DEFAULT_TARGET_DELIM, DEFAULT_TARGET_DELIM, 'grains')
             for id_ in cminions:
-                mdata = self.cache.fetch('minions/{0}'.format(id_), 'data')
+                mdata = cdata.get('minions/{0}'.format(id_))
                 if mdata is None:
                     if not greedy:
                         minions.remove(id_)
@@ -640,7 +730,11 @@ class CkMinions(object):
             search = self.cache.list('minions')
             if search is None:
                 return minions
-            addrs = salt.utils.network.local_port_tcp(int(self.opts['publish_port']))
+            addrs = set()
+            # The minions are connected to the port of their publisher shard
+            for shard in range(salt.transport.publish_shard_count(self.opts)):
+                addrs.update(salt.utils.network.local_port_tcp(
+                    salt.transport.publish_shard_port(self.opts, shard)))
             if '127.0.0.1' in addrs:
                 # Add in the address of a possible locally-connected minion.
                 addrs.discard('127.0.0.1')
@@ -1149,8 +1243,9 @@ def mine_get(tgt, fun, tgt_type='glob', opts=None):
     else:
         return {}
 
+    cdata = cache.fetch_many(['minions/{0}'.format(minion) for minion in minions], 'mine')
     for minion in minions:
-        mdata = cache.fetch('minions/{0}'.format(minion), 'mine')
+        mdata = cdata.get('minions/{0}'.format(minion))
 
         if not isinstance(mdata, dict):
             continue
@@ -2086,6 +2086,23 @@ class SaltCMDOptionParser(six.with_metaclass(OptionParserMeta,
             help=('Wait the specified time in seconds after each job is done '
                   'before freeing the slot in the batch for the next one.')
         )
+        self.add_option(
+            '--batch-adaptive',
+            default=False,
+            dest='batch_adaptive',
+            action='store_true',
+            help=('Grow the batch while the minions return in time, and '
+                  'shrink it when they fail, time out or return slowly, or '
+                  'when the master is slow to publish the job.')
+        )
+        self.add_option(
+            '--batch-order-by-duration',
+            default=False,
+            dest='batch_order_by_duration',
+            action='store_true',
+            help=('Run the job first on the minions whose past batch runs '
+                  'of the function were the longest.')
+        )
         self.add_option(
             '--batch-safe-limit',
             default=0,
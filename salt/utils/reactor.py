@@ -7,9 +7,10 @@ Functions which implement running reactor jobs
 # Import python libs
 from __future__ import absolute_import, print_function, unicode_literals
 import collections
-import fnmatch
 import glob
 import logging
+import os
+import threading
 import time
 
 # Import salt libs
@@ -59,12 +60,26 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
         super(Reactor, self).__init__(**kwargs)
         local_minion_opts = opts.copy()
         local_minion_opts['file_client'] = 'local'
+        self.local_minion_opts = local_minion_opts
         self.minion = salt.minion.MasterMinion(local_minion_opts)
+        # The master minion and renderers of each render thread
+        self.thread_local = threading.local()
         salt.state.Compiler.__init__(self, opts, self.minion.rend)
         self.event = salt.utils.event.get_master_event(opts, opts['sock_dir'], listen=False)
         self.stats = collections.defaultdict(lambda: {'mean': 0, 'latency': 0, 'runs': 0})
         self.stat_clock = time.time()
         self.is_leader = True
+        # The events waiting for their reactions in the render threads, by tag
+        # when the reactions of a tag are run in order
+        self.pool = None
+        self.pending = {}
+        self.queue_lock = threading.Lock()
+        self.queue_stats = {'depth': 0, 'max_depth': 0, 'dropped': 0}
+        # The reactor config compiled for matching the tags, and the files the
+        # reactor SLS refs resolve to
+        self.matcher = None
+        self.matcher_key = None
+        self.reactor_files = salt.utils.cache.CacheDict(opts['reactor_refresh_interval'])
 
     # We need __setstate__ and __getstate__ to avoid pickling errors since
     # 'self.rend' (from salt.state.Compiler) contains a function reference
@@ -93,10 +108,42 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
         end_time = time.time()
         if end_time - self.stat_clock > self.opts['master_stats_event_iter']:
             # Fire the event with the stats and wipe the tracker
-            self.event.fire_event({'time': end_time - self.stat_clock, 'worker': self.name, 'stats': stats}, tagify(self.name, 'stats'))
-            self.stats = collections.defaultdict(lambda: {'mean': 0, 'latency': 0, 'runs': 0})
+            with self.queue_lock:
+                queue = dict(self.queue_stats)
+                self.queue_stats['max_depth'] = self.queue_stats['depth']
+                self.queue_stats['dropped'] = 0
+                self.stats = collections.defaultdict(lambda: {'mean': 0, 'latency': 0, 'runs': 0})
+            self.event.fire_event({'time': end_time - self.stat_clock,
+                                   'worker': self.name,
+                                   'stats': stats,
+                                   'queue': queue},
+                                  tagify(self.name, 'stats'))
             self.stat_clock = end_time
 
+    def get_minion(self):
+        '''
+        Return the master minion rendering the reactions in the current thread.
+        Its loaders and file client are not thread safe, so each render thread
+        gets its own master minion.
+        '''
+        if self.pool is None:
+            return self.minion
+        minion = getattr(self.thread_local, 'minion', None)
+        if minion is None:
+            minion = salt.minion.MasterMinion(self.local_minion_opts)
+            self.thread_local.minion = minion
+            self.thread_local.compiler = salt.state.Compiler(self.opts, minion.rend)
+        return minion
+
+    def render_template(self, template, **kwargs):
+        '''
+        Render the template with the renderers of the master minion of the
+        current thread
+        '''
+        if self.get_minion() is self.minion:
+            return super(Reactor, self).render_template(template, **kwargs)
+        return self.thread_local.compiler.render_template(template, **kwargs)
+
     def render_reaction(self, glob_ref, tag, data):
         '''
         Execute the render system against a single reaction file and return
@@ -104,11 +151,17 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
         '''
         react = {}
 
-        if glob_ref.startswith('salt://'):
-            glob_ref = self.minion.functions['cp.cache_file'](glob_ref) or ''
-        globbed_ref = glob.glob(glob_ref)
-        if not globbed_ref:
-            log.error('Can not render SLS %s for tag %s. File missing or not found.', glob_ref, tag)
+        try:
+            globbed_ref = self.reactor_files[glob_ref]
+        except KeyError:
+            path = glob_ref
+            if path.startswith('salt://'):
+                path = self.get_minion().functions['cp.cache_file'](path) or ''
+            globbed_ref = glob.glob(path)
+            if not globbed_ref:
+                log.error('Can not render SLS %s for tag %s. File missing or not found.', path, tag)
+                return react
+            self.reactor_files[glob_ref] = globbed_ref
         for fn_ in globbed_ref:
             try:
                 res = self.render_template(
@@ -133,6 +186,30 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
         '''
         log.debug('Gathering reactors for tag %s', tag)
         reactors = []
+        for val in self.get_matcher().match(tag):
+            if isinstance(val, six.string_types):
+                reactors.append(val)
+            elif isinstance(val, list):
+                reactors.extend(val)
+        return reactors
+
+    def get_matcher(self):
+        '''
+        Return the reactor config compiled into a
+        :py:class:`~salt.utils.event.TagMatcher`, compiled again when the
+        reactor config file changed
+        '''
+        if isinstance(self.opts['reactor'], six.string_types):
+            try:
+                map_key = (self.opts['reactor'], os.path.getmtime(self.opts['reactor']))
+            except OSError:
+                map_key = None
+        else:
+            map_key = id(self.opts['reactor'])
+        matcher = self.matcher
+        if matcher is not None and map_key is not None and map_key == self.matcher_key:
+            return matcher
+        react_map = []
         if isinstance(self.opts['reactor'], six.string_types):
             try:
                 with salt.utils.files.fopen(self.opts['reactor']) as fp_:
@@ -143,19 +220,16 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
                 log.error('Failed to parse YAML in reactor map: "%s"', self.opts['reactor'])
         else:
             react_map = self.opts['reactor']
-        for ropt in react_map:
+        matcher = salt.utils.event.TagMatcher()
+        for ropt in react_map or []:
             if not isinstance(ropt, dict):
                 continue
             if len(ropt) != 1:
                 continue
             key = next(six.iterkeys(ropt))
-            val = ropt[key]
-            if fnmatch.fnmatch(tag, key):
-                if isinstance(val, six.string_types):
-                    reactors.append(val)
-                elif isinstance(val, list):
-                    reactors.extend(val)
-        return reactors
+            matcher.add(key, ropt[key])
+        self.matcher, self.matcher_key = matcher, map_key
+        return matcher
 
     def list_all(self):
         '''
@@ -189,6 +263,7 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
                 return {'status': False, 'comment': 'Reactor already exists.'}
 
         self.minion.opts['reactor'].append({tag: reaction})
+        self.matcher = None
         return {'status': True, 'comment': 'Reactor added.'}
 
     def delete_reactor(self, tag):
@@ -200,6 +275,7 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
             _tag = next(six.iterkeys(reactor))
             if _tag == tag:
                 self.minion.opts['reactor'].remove(reactor)
+                self.matcher = None
                 return {'status': True, 'comment': 'Reactor deleted.'}
 
         return {'status': False, 'comment': 'Reactor does not exists.'}
@@ -247,6 +323,81 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
         for chunk in chunks:
             self.wrap.run(chunk)
 
+    def run_reactions(self, tag, data, received):
+        '''
+        Match the event against the reactor config, then render and execute
+        its reactions. ``received`` is the time the event was read from the
+        event bus, the wait until now is recorded as the latency of the
+        reactor files in the stats.
+        '''
+        reactors = self.list_reactors(tag)
+        if not reactors:
+            return
+        start = time.time()
+        chunks = self.reactions(tag, data, reactors)
+        if chunks:
+            try:
+                self.call_reactions(chunks)
+            except SystemExit:
+                log.warning('Exit ignored by reactor')
+        if self.opts['master_stats']:
+            duration = time.time() - start
+            with self.queue_lock:
+                for fn_ in reactors:
+                    stat = self.stats[fn_]
+                    stat['runs'] += 1
+                    stat['latency'] += (start - received - stat['latency']) / stat['runs']
+                    stat['mean'] += (duration - stat['mean']) / stat['runs']
+
+    def queue_reactions(self, tag, data):
+        '''
+        Hand the event over to the render threads. The events with the same
+        tag are processed one after the other, in the order they were
+        received, when ``reactor_tag_ordering`` is set. Returns ``False`` when
+        the event is dropped because ``reactor_worker_hwm`` events are already
+        waiting.
+        '''
+        item = (tag, data, time.time())
+        with self.queue_lock:
+            hwm = self.opts['reactor_worker_hwm']
+            if hwm and self.queue_stats['depth'] >= hwm:
+                self.queue_stats['dropped'] += 1
+                log.error(
+                    'Reactor dropped the event %s: %s events are waiting to '
+                    'be processed. Consider tuning reactor_render_threads '
+                    'and/or reactor_worker_hwm', tag, self.queue_stats['depth']
+                )
+                return False
+            self.queue_stats['depth'] += 1
+            self.queue_stats['max_depth'] = max(self.queue_stats['max_depth'],
+                                                self.queue_stats['depth'])
+            if self.opts['reactor_tag_ordering']:
+                if tag in self.pending:
+                    self.pending[tag].append(item)
+                    return True
+                self.pending[tag] = collections.deque()
+        return self.pool.fire_async(self._process_queued, args=(item,))
+
+    def _process_queued(self, item):
+        '''
+        Run the reactions of an event in a render thread, followed by those of
+        the events of the same tag queued meanwhile
+        '''
+        tag = item[0]
+        while item is not None:
+            try:
+                self.run_reactions(*item)
+            except Exception:
+                log.exception('Exception encountered while running reactions for %s', tag)
+            with self.queue_lock:
+                self.queue_stats['depth'] -= 1
+                item = None
+                if self.opts['reactor_tag_ordering']:
+                    if self.pending[tag]:
+                        item = self.pending[tag].popleft()
+                    else:
+                        del self.pending[tag]
+
     def run(self):
         '''
         Enter into the server loop
@@ -261,6 +412,9 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
                 opts=self.opts,
                 listen=True)
         self.wrap = ReactWrap(self.opts)
+        if self.opts['reactor_render_threads'] > 0:
+            # The events are only bounded by reactor_worker_hwm
+            self.pool = salt.utils.process.ThreadPool(self.opts['reactor_render_threads'])
 
         for data in self.event.iter_events(full=True):
             # skip all events fired by ourselves
@@ -306,23 +460,12 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
             # do not handle any reactions if not leader in cluster
             if not self.is_leader:
                 continue
+            elif self.pool is not None:
+                self.queue_reactions(data['tag'], data['data'])
             else:
-                reactors = self.list_reactors(data['tag'])
-                if not reactors:
-                    continue
-                chunks = self.reactions(data['tag'], data['data'], reactors)
-                if chunks:
-                    if self.opts['master_stats']:
-                        _data = data['data']
-                        start = time.time()
-                    try:
-                        self.call_reactions(chunks)
-                    except SystemExit:
-                        log.warning('Exit ignored by reactor')
-
-                    if self.opts['master_stats']:
-                        stats = salt.utils.event.update_stats(self.stats, start, _data)
-                        self._post_stats(stats)
+                self.run_reactions(data['tag'], data['data'], time.time())
+            if self.opts['master_stats']:
+                self._post_stats(self.stats)
 
 
 class ReactWrap(object):
@@ -344,6 +487,8 @@ class ReactWrap(object):
         self.opts = opts
         if ReactWrap.client_cache is None:
             ReactWrap.client_cache = salt.utils.cache.CacheDict(opts['reactor_refresh_interval'])
+        # The clients are shared by the render threads of the reactor
+        self.client_lock = threading.RLock()
 
         self.pool = salt.utils.process.ThreadPool(
             self.opts['reactor_worker_threads'],  # number of workers for runner/wheel
@@ -355,25 +500,26 @@ class ReactWrap(object):
         Populate the client cache with an instance of the specified type
         '''
         reaction_type = low['state']
-        if reaction_type not in self.client_cache:
-            log.debug('Reactor is populating %s client cache', reaction_type)
-            if reaction_type in ('runner', 'wheel'):
-                # Reaction types that run locally on the master want the full
-                # opts passed.
-                self.client_cache[reaction_type] = \
-                    self.reaction_class[reaction_type](self.opts)
-                # The len() function will cause the module functions to load if
-                # they aren't already loaded. We want to load them so that the
-                # spawned threads don't need to load them. Loading in the
-                # spawned threads creates race conditions such as sometimes not
-                # finding the required function because another thread is in
-                # the middle of loading the functions.
-                len(self.client_cache[reaction_type].functions)
-            else:
-                # Reactions which use remote pubs only need the conf file when
-                # instantiating a client instance.
-                self.client_cache[reaction_type] = \
-                    self.reaction_class[reaction_type](self.opts['conf_file'])
+        with self.client_lock:
+            if reaction_type not in self.client_cache:
+                log.debug('Reactor is populating %s client cache', reaction_type)
+                if reaction_type in ('runner', 'wheel'):
+                    # Reaction types that run locally on the master want the full
+                    # opts passed.
+                    self.client_cache[reaction_type] = \
+                        self.reaction_class[reaction_type](self.opts)
+                    # The len() function will cause the module functions to load if
+                    # they aren't already loaded. We want to load them so that the
+                    # spawned threads don't need to load them. Loading in the
+                    # spawned threads creates race conditions such as sometimes not
+                    # finding the required function because another thread is in
+                    # the middle of loading the functions.
+                    len(self.client_cache[reaction_type].functions)
+                else:
+                    # Reactions which use remote pubs only need the conf file when
+                    # instantiating a client instance.
+                    self.client_cache[reaction_type] = \
+                        self.reaction_class[reaction_type](self.opts['conf_file'])
 
     def run(self, low):
         '''
@@ -505,10 +651,12 @@ class ReactWrap(object):
         '''
         Wrap LocalClient for running :ref:`execution modules <all-salt.modules>`
         '''
-        self.client_cache['local'].cmd_async(tgt, fun, **kwargs)
+        with self.client_lock:
+            self.client_cache['local'].cmd_async(tgt, fun, **kwargs)
 
     def caller(self, fun, **kwargs):
         '''
         Wrap LocalCaller to execute remote exec functions locally on the Minion
         '''
-        self.client_cache['caller'].cmd(fun, *kwargs['arg'], **kwargs['kwarg'])
+        with self.client_lock:
+            self.client_cache['caller'].cmd(fun, *kwargs['arg'], **kwargs['kwarg'])
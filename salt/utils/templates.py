@@ -290,6 +290,9 @@ def _get_jinja_error(trace, context=None):
 def render_jinja_tmpl(tmplstr, context, tmplpath=None):
     opts = context['opts']
     saltenv = context['saltenv']
+    # A dict shared by the renders of a session (i.e. a highstate or a pillar
+    # compilation), used to reuse the Jinja environment between renders.
+    env_cache = context.pop('_jinja_env_cache', None)
     loader = None
     newline = False
 
@@ -300,13 +303,7 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
     if tmplstr.endswith(os.linesep):
         newline = True
 
-    if not saltenv:
-        if tmplpath:
-            loader = jinja2.FileSystemLoader(os.path.dirname(tmplpath))
-    else:
-        loader = salt.utils.jinja.SaltCacheLoader(opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
-
-    env_args = {'extensions': [], 'loader': loader}
+    env_args = {'extensions': []}
 
     if hasattr(jinja2.ext, 'with_'):
         env_args['extensions'].append('jinja2.ext.with_')
@@ -351,25 +348,62 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
     else:
         opt_jinja_env_helper(opt_jinja_env, 'jinja_env')
 
-    if opts.get('allow_undefined', False):
-        jinja_env = jinja2.Environment(**env_args)
+    if not saltenv:
+        loader_key = ('file', os.path.dirname(tmplpath) if tmplpath else None)
     else:
-        jinja_env = jinja2.Environment(undefined=jinja2.StrictUndefined,
-                                       **env_args)
-
-    tojson_filter = jinja_env.filters.get('tojson')
-    jinja_env.tests.update(JinjaTest.salt_jinja_tests)
-    jinja_env.filters.update(JinjaFilter.salt_jinja_filters)
-    if tojson_filter is not None:
-        # Use the existing tojson filter, if present (jinja2 >= 2.9)
-        jinja_env.filters['tojson'] = tojson_filter
-    jinja_env.globals.update(JinjaGlobal.salt_jinja_globals)
+        loader_key = ('salt', saltenv, context.get('_pillar_rend', False))
+    env_key = (
+        loader_key,
+        opts.get('allow_undefined', False),
+        repr(sorted((key, repr(val)) for key, val in six.iteritems(env_args))),
+    )
+
+    if isinstance(env_cache, dict) and env_key in env_cache:
+        jinja_env, env_globals = env_cache[env_key]
+        # Start from a clean slate, the previous renders have added their
+        # context to the globals and filled the template cache
+        jinja_env.globals.clear()
+        jinja_env.globals.update(env_globals)
+        jinja_env.cache.clear()
+    else:
+        if not saltenv:
+            if tmplpath:
+                loader = jinja2.FileSystemLoader(os.path.dirname(tmplpath))
+        else:
+            loader = salt.utils.jinja.SaltCacheLoader(opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
+        env_args['loader'] = loader
 
-    # globals
-    jinja_env.globals['odict'] = OrderedDict
-    jinja_env.globals['show_full_context'] = salt.utils.jinja.show_full_context
+        if opts.get('jinja_bytecode_cache', True) and 'cachedir' in opts:
+            env_args['bytecode_cache'] = salt.utils.jinja.SaltBytecodeCache(
+                opts, env_args)
 
-    jinja_env.tests['list'] = salt.utils.data.is_list
+        if opts.get('allow_undefined', False):
+            jinja_env = jinja2.Environment(**env_args)
+        else:
+            jinja_env = jinja2.Environment(undefined=jinja2.StrictUndefined,
+                                           **env_args)
+
+        tojson_filter = jinja_env.filters.get('tojson')
+        jinja_env.tests.update(JinjaTest.salt_jinja_tests)
+        jinja_env.filters.update(JinjaFilter.salt_jinja_filters)
+        if tojson_filter is not None:
+            # Use the existing tojson filter, if present (jinja2 >= 2.9)
+            jinja_env.filters['tojson'] = tojson_filter
+        jinja_env.globals.update(JinjaGlobal.salt_jinja_globals)
+
+        # globals
+        jinja_env.globals['odict'] = OrderedDict
+        jinja_env.globals['show_full_context'] = salt.utils.jinja.show_full_context
+
+        jinja_env.tests['list'] = salt.utils.data.is_list
+
+        if isinstance(env_cache, dict):
+            if opts.get('jinja_import_cache', False):
+                # Execute the templates imported without context only once
+                # for the whole session
+                jinja_env.template_class = salt.utils.jinja.SaltTemplate
+                jinja_env.import_cache = OrderedDict()
+            env_cache[env_key] = (jinja_env, dict(jinja_env.globals))
 
     decoded_context = {}
     for key, value in six.iteritems(context):
@@ -387,7 +421,17 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
             decoded_context[key] = salt.utils.data.decode(value)
 
     try:
-        template = jinja_env.from_string(tmplstr)
+        if jinja_env.bytecode_cache is not None and tmplpath:
+            # Templates rendered from a string are not cached by Jinja itself
+            bucket = jinja_env.bytecode_cache.get_bucket(
+                jinja_env, tmplpath, tmplpath, tmplstr)
+            if bucket.code is None:
+                bucket.code = jinja_env.compile(tmplstr)
+                jinja_env.bytecode_cache.set_bucket(bucket)
+            template = jinja_env.template_class.from_code(
+                jinja_env, bucket.code, jinja_env.make_globals(None))
+        else:
+            template = jinja_env.from_string(tmplstr)
         template.globals.update(decoded_context)
         output = template.render(**decoded_context)
     except jinja2.exceptions.UndefinedError as exc:
@@ -0,0 +1,524 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark the throughput of a master against simulated minions
+
+A local master is started with the chosen transport, then a number of
+processes simulate the minions. Every simulated minion authenticates, connects
+to the publisher and returns ``True`` to the ``test.ping`` jobs it receives,
+through the same transport channels a real minion uses, but without running a
+minion process of its own. This makes tens of thousands of minions possible on
+a single box, the number of open files allowed being the limit: every
+simulated minion holds two connections to the master.
+
+The benchmark reports the authentications per second, the time taken to
+deliver the publishes to every minion, the returns per second and the CPU time
+used by the master processes. The CPU time of the MWorker processes is only
+told apart from the other master processes when setproctitle is installed.
+'''
+# pylint: disable=resource-leakage
+# Import Python Libs
+from __future__ import absolute_import, print_function
+import getpass
+import multiprocessing
+import optparse
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+# Import salt libs
+import salt.client
+import salt.config
+import salt.crypt
+import salt.transport.client
+import salt.utils.files
+import salt.utils.yaml
+import salt.utils.zeromq
+
+# Import third party libs
+import tornado.gen
+import tornado.ioloop
+import tornado.iostream
+import tornado.tcpserver
+from salt.ext.six.moves import queue, range  # pylint: disable=import-error,redefined-builtin
+import tests.support.helpers
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+SALT_MASTER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'scripts',
+    'salt-master')
+
+
+def parse():
+    '''
+    Parse the cli options
+    '''
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-t',
+        '--transport',
+        dest='transport',
+        default='zeromq',
+        help='The transport to benchmark, zeromq or tcp')
+    parser.add_option(
+        '-m',
+        '--minions',
+        dest='minions',
+        default=1000,
+        type='int',
+        help='The number of minions to simulate')
+    parser.add_option(
+        '-p',
+        '--processes',
+        dest='processes',
+        default=multiprocessing.cpu_count(),
+        type='int',
+        help='The number of processes simulating the minions')
+    parser.add_option(
+        '-j',
+        '--jobs',
+        dest='jobs',
+        default=5,
+        type='int',
+        help='The number of test.ping jobs to publish to all the minions')
+    parser.add_option(
+        '-w',
+        '--worker-threads',
+        dest='worker_threads',
+        default=5,
+        type='int',
+        help='The worker_threads of the master')
+    parser.add_option(
+        '--master-opt',
+        dest='master_opts',
+        default=[],
+        action='append',
+        help=('Set a master option, as option=yaml_value, e.g. '
+              'auth_workers=2. Can be used more than once.'))
+    parser.add_option(
+        '--timeout',
+        dest='timeout',
+        default=300,
+        type='int',
+        help='The time to wait for the minions to authenticate, and for each job')
+    parser.add_option(
+        '--no-clean',
+        dest='no_clean',
+        default=False,
+        action='store_true',
+        help='Keep the temporary directory holding the configuration and logs')
+    options, _ = parser.parse_args()
+    return options
+
+
+def percentile(values, pct):
+    '''
+    Return the pct percentile of the sorted values
+    '''
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * pct / 100.0))]
+
+
+def raise_open_files_limit():
+    '''
+    Allow as many open files as the hard limit does, every simulated minion
+    holding a couple of connections to the master
+    '''
+    if not HAS_RESOURCE:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY:
+        hard = 1024 * 1024
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def master_cpu_times(pid):
+    '''
+    Return the CPU time used by the processes of the master, in seconds, by
+    kind of process
+    '''
+    ret = {}
+    if not HAS_PSUTIL:
+        return ret
+    try:
+        master = psutil.Process(pid)
+        procs = [master] + master.children(recursive=True)
+    except psutil.Error:
+        return ret
+    for proc in procs:
+        try:
+            times = proc.cpu_times()
+            kind = 'MWorker' if 'MWorker' in ' '.join(proc.cmdline()) else 'other'
+        except psutil.Error:
+            # The process exited
+            continue
+        ret[kind] = ret.get(kind, 0) + times.user + times.system
+    return ret
+
+
+def cpu_report(before, after):
+    '''
+    Return the CPU time used by the master between two master_cpu_times
+    '''
+    if not HAS_PSUTIL:
+        return 'master CPU not measured, psutil is not installed'
+    used = dict((kind, after.get(kind, 0) - before.get(kind, 0)) for kind in after)
+    if 'MWorker' in used:
+        return 'MWorker CPU {0:.2f}s, other master processes {1:.2f}s'.format(
+            used['MWorker'], used.get('other', 0))
+    return 'master CPU {0:.2f}s'.format(sum(used.values()))
+
+
+class EventSink(multiprocessing.Process):
+    '''
+    Discard the events the minions fire on their local event bus, which the
+    simulated minions do not run
+    '''
+    def __init__(self, port):
+        super(EventSink, self).__init__()
+        self.daemon = True
+        self.port = port
+
+    def run(self):
+        raise_open_files_limit()
+
+        class Sink(tornado.tcpserver.TCPServer):
+            @tornado.gen.coroutine
+            def handle_stream(self, stream, address):
+                try:
+                    while True:
+                        yield stream.read_bytes(65536, partial=True)
+                except tornado.iostream.StreamClosedError:
+                    pass
+
+        io_loop = tornado.ioloop.IOLoop()
+        io_loop.make_current()
+        Sink().listen(self.port, address='127.0.0.1')
+        io_loop.start()
+
+
+class VirtualMinions(multiprocessing.Process):
+    '''
+    Simulate minions in a single process: authenticate them, connect them to
+    the publisher and return the test.ping jobs they receive
+    '''
+    def __init__(self, opts, minion_ids, results, timeout):
+        super(VirtualMinions, self).__init__()
+        self.daemon = True
+        self.opts = opts
+        self.minion_ids = minion_ids
+        self.results = results
+        self.timeout = timeout
+        self.io_loop = None
+        self.connected = 0
+        # The time each minion received a job and got its return acknowledged
+        # by the master, by jid
+        self.received = {}
+        self.returned = {}
+        self.failed = {}
+
+    def run(self):
+        raise_open_files_limit()
+        salt.utils.zeromq.install_zmq()
+        self.io_loop = salt.utils.zeromq.ZMQDefaultLoop()
+        self.io_loop.make_current()
+        self.io_loop.add_callback(self._start)
+        self.io_loop.start()
+
+    @tornado.gen.coroutine
+    def _start(self):
+        start = time.time()
+        rets = yield [self._start_minion(minion_id) for minion_id in self.minion_ids]
+        self.connected = len([ret for ret in rets if ret])
+        self.results.put(('auth', start, time.time(), self.connected))
+
+    @tornado.gen.coroutine
+    def _start_minion(self, minion_id):
+        '''
+        Authenticate a minion and connect it to the publisher
+        '''
+        opts = dict(self.opts, id=minion_id)
+        try:
+            yield salt.crypt.AsyncAuth(opts, io_loop=self.io_loop).authenticate()
+            pub_channel = salt.transport.client.AsyncPubChannel.factory(
+                opts, io_loop=self.io_loop)
+            yield pub_channel.connect()
+        except Exception as exc:  # pylint: disable=broad-except
+            print('Minion {0} failed to connect: {1}'.format(minion_id, exc))
+            raise tornado.gen.Return(False)
+        req_channel = salt.transport.client.AsyncReqChannel.factory(
+            opts, io_loop=self.io_loop)
+        pub_channel.on_recv(
+            lambda payload: self._handle_publish(minion_id, req_channel, payload))
+        raise tornado.gen.Return(True)
+
+    def _handle_publish(self, minion_id, req_channel, payload):
+        load = payload['load']
+        if load.get('fun') != 'test.ping':
+            return
+        self.received.setdefault(load['jid'], []).append(time.time())
+        self.io_loop.spawn_callback(self._return, minion_id, req_channel, load)
+
+    @tornado.gen.coroutine
+    def _return(self, minion_id, req_channel, load):
+        '''
+        Return the job to the master
+        '''
+        jid = load['jid']
+        ret = {'cmd': '_return',
+               'id': minion_id,
+               'jid': jid,
+               'fun': load['fun'],
+               'fun_args': load.get('arg', []),
+               'return': True,
+               'retcode': 0,
+               'success': True}
+        try:
+            yield req_channel.send(ret, timeout=self.timeout)
+            self.returned.setdefault(jid, []).append(time.time())
+        except Exception:  # pylint: disable=broad-except
+            self.failed[jid] = self.failed.get(jid, 0) + 1
+        if len(self.returned.get(jid, [])) + self.failed.get(jid, 0) == self.connected:
+            self.results.put(('job',
+                              jid,
+                              self.received.pop(jid, []),
+                              self.returned.pop(jid, []),
+                              self.failed.pop(jid, 0)))
+
+
+class MasterBench(object):
+    '''
+    Run a master and the simulated minions
+    '''
+    def __init__(self, options):
+        self.options = options
+        self.tmpdir = tempfile.mkdtemp(prefix='masterbench')
+        self.conf_dir = os.path.join(self.tmpdir, 'conf')
+        self.minion_ids = ['bench-{0:06d}'.format(idx) for idx in range(options.minions)]
+        self.master = None
+        self.master_opts = None
+        self.processes = []
+        self.event_sink = None
+        self.results = multiprocessing.Queue()
+
+    def _write_master_config(self):
+        '''
+        Write the config of the master, and accept the key of every minion
+        '''
+        publish_port = tests.support.helpers.get_unused_localhost_port()
+        ret_port = tests.support.helpers.get_unused_localhost_port()
+        conf = {'root_dir': self.tmpdir,
+                'pki_dir': os.path.join(self.tmpdir, 'pki', 'master'),
+                'cachedir': os.path.join(self.tmpdir, 'cache', 'master'),
+                'sock_dir': os.path.join(self.tmpdir, 'sock', 'master'),
+                'log_file': os.path.join(self.tmpdir, 'master.log'),
+                'pidfile': os.path.join(self.tmpdir, 'master.pid'),
+                'user': getpass.getuser(),
+                'transport': self.options.transport,
+                'interface': '127.0.0.1',
+                'publish_port': publish_port,
+                'ret_port': ret_port,
+                'worker_threads': self.options.worker_threads}
+        max_open_files = raise_open_files_limit()
+        if max_open_files:
+            conf['max_open_files'] = max_open_files
+        for opt in self.options.master_opts:
+            key, value = opt.split('=', 1)
+            conf[key] = salt.utils.yaml.safe_load(value)
+        os.makedirs(self.conf_dir)
+        with salt.utils.files.fopen(os.path.join(self.conf_dir, 'master'), 'w') as fp_:
+            salt.utils.yaml.safe_dump(conf, fp_, default_flow_style=False)
+
+        # The simulated minions all share the same key
+        minion_pki = os.path.join(self.tmpdir, 'pki', 'minion')
+        os.makedirs(minion_pki)
+        salt.crypt.gen_keys(minion_pki, 'minion', 2048)
+        with salt.utils.files.fopen(os.path.join(minion_pki, 'minion.pub')) as fp_:
+            pub = fp_.read()
+        accepted = os.path.join(conf['pki_dir'], 'minions')
+        os.makedirs(accepted)
+        for minion_id in self.minion_ids:
+            with salt.utils.files.fopen(os.path.join(accepted, minion_id), 'w') as fp_:
+                fp_.write(pub)
+
+        minion_opts = salt.config.minion_config(None)
+        minion_opts.update({'transport': self.options.transport,
+                            'master': '127.0.0.1',
+                            'master_ip': '127.0.0.1',
+                            'master_port': ret_port,
+                            'publish_port': publish_port,
+                            'master_uri': 'tcp://127.0.0.1:{0}'.format(ret_port),
+                            'pki_dir': minion_pki,
+                            'cachedir': os.path.join(self.tmpdir, 'cache', 'minion'),
+                            'sock_dir': os.path.join(self.tmpdir, 'sock', 'minion'),
+                            'acceptance_wait_time': 1,
+                            'ipc_mode': 'tcp',
+                            'tcp_pub_port': tests.support.helpers.get_unused_localhost_port(),
+                            'tcp_pull_port': tests.support.helpers.get_unused_localhost_port(),
+                            'auth_timeout': self.options.timeout})
+        return ret_port, minion_opts
+
+    def _start_master(self, ret_port):
+        '''
+        Start the master and wait for it to serve requests
+        '''
+        with salt.utils.files.fopen(os.path.join(self.tmpdir, 'master.out'), 'w') as out:
+            self.master = subprocess.Popen(
+                [sys.executable, SALT_MASTER, '-c', self.conf_dir, '-l', 'quiet'],
+                stdout=out,
+                stderr=subprocess.STDOUT,
+                preexec_fn=os.setsid)
+        deadline = time.time() + 120
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', ret_port)).close()
+                break
+            except socket.error:
+                if time.time() > deadline or self.master.poll() is not None:
+                    raise RuntimeError('The master failed to start, see {0}'.format(
+                        os.path.join(self.tmpdir, 'master.log')))
+                time.sleep(0.5)
+        if HAS_PSUTIL:
+            # The workers load their modules once the ports are bound, wait
+            # for the master to be idle before measuring it
+            used = master_cpu_times(self.master.pid)
+            while time.time() < deadline:
+                time.sleep(1)
+                before, used = used, master_cpu_times(self.master.pid)
+                if sum(used.values()) - sum(before.values()) < 0.05:
+                    break
+        else:
+            time.sleep(10)
+        self.master_opts = salt.config.master_config(os.path.join(self.conf_dir, 'master'))
+
+    def _wait(self, kind, count):
+        '''
+        Return count results of the given kind from the simulated minions
+        '''
+        ret = []
+        deadline = time.time() + self.options.timeout
+        while len(ret) < count:
+            try:
+                result = self.results.get(timeout=max(deadline - time.time(), 0.1))
+            except queue.Empty:
+                break
+            if result[0] == kind:
+                ret.append(result[1:])
+        return ret
+
+    def run(self):
+        '''
+        Run the benchmark
+        '''
+        options = self.options
+        ret_port, minion_opts = self._write_master_config()
+        self._start_master(ret_port)
+        print('Simulating {0} minions in {1} processes against a {2} master '
+              'with {3} worker threads'.format(options.minions, options.processes,
+                                               options.transport,
+                                               options.worker_threads))
+
+        self.event_sink = EventSink(minion_opts['tcp_pull_port'])
+        self.event_sink.start()
+        cpu_start = master_cpu_times(self.master.pid)
+        for idx in range(options.processes):
+            proc = VirtualMinions(minion_opts,
+                                  self.minion_ids[idx::options.processes],
+                                  self.results,
+                                  options.timeout)
+            proc.start()
+            self.processes.append(proc)
+        auths = self._wait('auth', len(self.processes))
+        cpu_auth = master_cpu_times(self.master.pid)
+        connected = sum(auth[2] for auth in auths)
+        if not connected:
+            print('No minion could connect to the master')
+            return
+        duration = max(auth[1] for auth in auths) - min(auth[0] for auth in auths)
+        print('Authenticated and connected {0} minions in {1:.2f}s: {2:.1f} '
+              'auths/sec ({3} failed), {4}'.format(
+                  connected, duration, connected / duration,
+                  options.minions - connected, cpu_report(cpu_start, cpu_auth)))
+
+        client = salt.client.LocalClient(mopts=self.master_opts)
+        latencies = []
+        total_returns = 0
+        total_duration = 0
+        for job in range(options.jobs):
+            cpu_before = master_cpu_times(self.master.pid)
+            start = time.time()
+            pub = client.run_job('*', 'test.ping', timeout=options.timeout)
+            jobs = self._wait('job', len(self.processes))
+            cpu_after = master_cpu_times(self.master.pid)
+            received = sorted(recv - start for job_ret in jobs for recv in job_ret[1])
+            returned = sorted(ret - start for job_ret in jobs for ret in job_ret[2])
+            failed = sum(job_ret[3] for job_ret in jobs)
+            latencies.extend(received)
+            if returned:
+                total_returns += len(returned)
+                total_duration += returned[-1]
+            print('Job {0} ({1}): published to {2} minions in {3:.2f}s '
+                  '(p50 {4:.2f}s, p95 {5:.2f}s), {6} returns in {7:.2f}s: {8:.1f} '
+                  'returns/sec ({9} failed), {10}'.format(
+                      job + 1, pub.get('jid') if pub else None, len(received),
+                      received[-1] if received else float('nan'),
+                      percentile(received, 50), percentile(received, 95),
+                      len(returned), returned[-1] if returned else float('nan'),
+                      len(returned) / returned[-1] if returned else 0,
+                      failed + connected - len(received),
+                      cpu_report(cpu_before, cpu_after)))
+        if options.jobs:
+            latencies.sort()
+            print('Publish fan-out latency: p50 {0:.3f}s, p95 {1:.3f}s, max {2:.3f}s'.format(
+                percentile(latencies, 50), percentile(latencies, 95),
+                latencies[-1] if latencies else float('nan')))
+            print('Returns: {0:.1f} returns/sec overall'.format(
+                total_returns / total_duration if total_duration else 0))
+
+    def shutdown(self):
+        '''
+        Stop the master and the simulated minions
+        '''
+        for proc in self.processes + [self.event_sink]:
+            if proc is not None:
+                proc.terminate()
+        if self.master is not None and self.master.poll() is None:
+            os.killpg(self.master.pid, signal.SIGTERM)
+            deadline = time.time() + 30
+            while self.master.poll() is None and time.time() < deadline:
+                time.sleep(0.5)
+            if self.master.poll() is None:
+                os.killpg(self.master.pid, signal.SIGKILL)
+        if self.options.no_clean:
+            print('The configuration and logs are kept in {0}'.format(self.tmpdir))
+        else:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    BENCH = MasterBench(parse())
+    try:
+        BENCH.run()
+    finally:
+        BENCH.shutdown()
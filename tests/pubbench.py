@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark the publish path of the master: start the publisher of the chosen
+transport, connect a number of subscribers to it and publish ``state.sls``
+jobs carrying a large pillar override, then report the publishes per second
+'''
+# pylint: disable=resource-leakage
+# Import Python Libs
+from __future__ import absolute_import, print_function
+import binascii
+import ctypes
+import multiprocessing
+import optparse
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+# Import salt libs
+import salt.config
+import salt.crypt
+import salt.master
+import salt.transport
+import salt.transport.server
+import salt.utils.process
+import salt.utils.stringutils
+
+# Import third party libs
+import msgpack
+import zmq
+from salt.ext.six.moves import range  # pylint: disable=import-error,redefined-builtin
+import tests.support.helpers
+
+
+def parse():
+    '''
+    Parse the cli options
+    '''
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-t',
+        '--transport',
+        dest='transport',
+        default='zeromq',
+        help='The transport to benchmark, zeromq or tcp')
+    parser.add_option(
+        '-c',
+        '--count',
+        dest='count',
+        default=200,
+        type='int',
+        help='The number of jobs to publish')
+    parser.add_option(
+        '-p',
+        '--pillar-size',
+        dest='pillar_size',
+        default=256,
+        type='int',
+        help='The size of the pillar override of the jobs, in KiB')
+    parser.add_option(
+        '-s',
+        '--subscribers',
+        dest='subscribers',
+        default=10,
+        type='int',
+        help='The number of subscribers to publish to')
+    parser.add_option(
+        '--shards',
+        dest='shards',
+        default=1,
+        type='int',
+        help='The number of publisher shards to run')
+    options, _ = parser.parse_args()
+    return options
+
+
+class Subscriber(threading.Thread):
+    '''
+    Count the payloads of at least ``size`` bytes received from the publisher
+    '''
+    def __init__(self, transport, port, size):
+        super(Subscriber, self).__init__()
+        self.daemon = True
+        self.transport = transport
+        self.port = port
+        self.size = size
+        self.received = 0
+        self.ready = threading.Event()
+
+    def _count(self, payload):
+        self.ready.set()
+        if len(payload) >= self.size:
+            self.received += 1
+
+    def run(self):
+        if self.transport == 'tcp':
+            self._run_tcp()
+        else:
+            self._run_zeromq()
+
+    def _run_zeromq(self):
+        context = zmq.Context()
+        sock = context.socket(zmq.SUB)
+        sock.setsockopt(zmq.SUBSCRIBE, b'')
+        sock.connect('tcp://127.0.0.1:{0}'.format(self.port))
+        while True:
+            self._count(sock.recv_multipart()[-1])
+
+    def _run_tcp(self):
+        deadline = time.time() + 120
+        while True:
+            try:
+                sock = socket.create_connection(('127.0.0.1', self.port))
+                break
+            except socket.error:
+                # The publisher is still starting
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.5)
+        unpacker = msgpack.Unpacker()
+        while True:
+            data = sock.recv(1024 * 1024)
+            if not data:
+                return
+            unpacker.feed(data)
+            for framed_msg in unpacker:
+                self._count(framed_msg[b'body'])
+
+
+def make_load(pillar_size, jid):
+    '''
+    Return a ``state.sls`` job carrying a pillar override of about
+    ``pillar_size`` KiB
+    '''
+    pillar = {}
+    for idx in range(pillar_size):
+        pillar['key{0}'.format(idx)] = salt.utils.stringutils.to_str(
+            binascii.hexlify(os.urandom(512)))
+    return {'fun': 'state.sls',
+            'arg': ['bench', {'pillar': pillar, '__kwarg__': True}],
+            'tgt': '*',
+            'tgt_type': 'glob',
+            'jid': jid,
+            'ret': '',
+            'user': 'root'}
+
+
+def run(options):
+    '''
+    Run the benchmark
+    '''
+    tmpdir = tempfile.mkdtemp(prefix='pubbench')
+    opts = salt.config.master_config(None)
+    opts.update({
+        'transport': options.transport,
+        'interface': '127.0.0.1',
+        'publish_port': tests.support.helpers.get_unused_localhost_port(),
+        'publish_shards': options.shards,
+        'sign_pub_messages': False,
+        'sock_dir': os.path.join(tmpdir, 'sock'),
+        'pki_dir': os.path.join(tmpdir, 'pki'),
+        'cachedir': os.path.join(tmpdir, 'cache'),
+    })
+    for dir_ in (opts['sock_dir'], opts['pki_dir'], opts['cachedir']):
+        os.makedirs(dir_)
+    salt.master.SMaster.secrets['aes'] = {
+        'secret': multiprocessing.Array(
+            ctypes.c_char,
+            salt.utils.stringutils.to_bytes(salt.crypt.Crypticle.generate_key_string()),
+        ),
+    }
+    process_manager = salt.utils.process.ProcessManager(name='PubBench')
+    channel = salt.transport.server.PubServerChannel.factory(opts)
+    channel.pre_fork(process_manager)
+    try:
+        size = options.pillar_size * 1024
+        shards = salt.transport.publish_shard_count(opts)
+        subscribers = [
+            Subscriber(options.transport,
+                       salt.transport.publish_shard_port(opts, idx % shards),
+                       size)
+            for idx in range(options.subscribers)]
+        for subscriber in subscribers:
+            subscriber.start()
+
+        # Wait for every subscriber to be connected
+        ping = {'fun': 'test.ping', 'arg': [], 'tgt': '*', 'tgt_type': 'glob',
+                'jid': '1', 'ret': '', 'user': 'root'}
+        while not all(subscriber.ready.is_set() for subscriber in subscribers):
+            try:
+                channel.publish(ping)
+            except Exception:  # pylint: disable=broad-except
+                # The publisher is still starting
+                pass
+            time.sleep(0.2)
+
+        load = make_load(options.pillar_size, '2')
+        print('Publishing {0} jobs of {1} KiB to {2} subscribers over {3} '
+              '({4} shards)'.format(options.count, options.pillar_size,
+                                    options.subscribers, options.transport,
+                                    shards))
+        start = time.time()
+        for _ in range(options.count):
+            channel.publish(load)
+        published = time.time() - start
+        while any(subscriber.received < options.count for subscriber in subscribers):
+            time.sleep(0.01)
+        delivered = time.time() - start
+        print('Published: {0:.2f} publishes/sec'.format(options.count / published))
+        print('Delivered to every subscriber: {0:.2f} publishes/sec'.format(
+            options.count / delivered))
+    finally:
+        process_manager.kill_children()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(parse())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark the msgpack serialization of job returns with salt.payload.Serial,
+against a plain msgpack.packb call with a default hook built for every call,
+as Serial.dumps used to do
+
+The job returns are either read from the job cache of a master, or generated
+to look like the returns of ``test.ping``, ``state.highstate``,
+``pkg.list_pkgs`` and ``grains.items``.
+'''
+# pylint: disable=resource-leakage
+# Import Python Libs
+from __future__ import absolute_import, print_function
+import datetime
+import glob
+import optparse
+import os
+import time
+from collections import OrderedDict
+
+# Import salt libs
+import salt.payload
+import salt.utils.files
+import salt.utils.immutabletypes as immutabletypes
+import salt.utils.msgpack
+import salt.utils.stringutils
+from salt.utils.data import CaseInsensitiveDict
+
+# Import third party libs
+import msgpack
+from salt.ext import six
+from salt.ext.six.moves import range  # pylint: disable=import-error,redefined-builtin
+
+
+def parse():
+    '''
+    Parse the cli options
+    '''
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-j',
+        '--job-cache',
+        dest='job_cache',
+        default=None,
+        help=('The jobs directory of a master job cache to read the returns '
+              'from, e.g. /var/cache/salt/master/jobs. Returns looking like '
+              'common jobs are generated when not set.'))
+    parser.add_option(
+        '-n',
+        '--iterations',
+        dest='iterations',
+        default=200,
+        type='int',
+        help='The number of times to serialize every return')
+    options, _ = parser.parse_args()
+    return options
+
+
+def legacy_dumps(msg, use_bin_type=False):
+    '''
+    Serialize msg the way Serial.dumps did before it kept a Packer per thread
+    '''
+    def ext_type_encoder(obj):
+        if isinstance(obj, six.integer_types):
+            return six.text_type(obj)
+        elif isinstance(obj, (datetime.datetime, datetime.date)):
+            return msgpack.ExtType(78, salt.utils.stringutils.to_bytes(
+                obj.strftime('%Y%m%dT%H:%M:%S.%f')))
+        elif isinstance(obj, immutabletypes.ImmutableDict):
+            return dict(obj)
+        elif isinstance(obj, immutabletypes.ImmutableList):
+            return list(obj)
+        elif isinstance(obj, (set, immutabletypes.ImmutableSet)):
+            return tuple(obj)
+        elif isinstance(obj, CaseInsensitiveDict):
+            return dict(obj)
+        return obj
+    return salt.utils.msgpack.dumps(msg, default=ext_type_encoder,
+                                    use_bin_type=use_bin_type,
+                                    _msgpack_module=msgpack)
+
+
+def generated_returns():
+    '''
+    Return job returns looking like the returns of common jobs, by function
+    '''
+    now = datetime.datetime.now()
+    highstate = OrderedDict()
+    for idx in range(500):
+        highstate['file_|-conf{0}_|-/etc/app/conf{0}_|-managed'.format(idx)] = {
+            'name': '/etc/app/conf{0}'.format(idx),
+            'changes': {'diff': '--- \n+++ \n@@ -1 +1 @@\n-old\n+new\n'} if idx % 10 == 0 else {},
+            'result': True,
+            'comment': 'File /etc/app/conf{0} is in the correct state'.format(idx),
+            '__sls__': 'app.config',
+            '__run_num__': idx,
+            'start_time': '10:12:{0:02d}.123456'.format(idx % 60),
+            'duration': 1.234,
+            '__id__': 'conf{0}'.format(idx),
+        }
+    pkgs = dict(('package-{0}'.format(idx), '{0}.{1}.{2}-1.el7'.format(idx % 7, idx % 13, idx))
+                for idx in range(1500))
+    grains = immutabletypes.freeze({
+        'id': 'minion1.example.com',
+        'os': 'CentOS',
+        'os_family': 'RedHat',
+        'osrelease': '7.6.1810',
+        'kernelrelease': '3.10.0-957.el7.x86_64',
+        'ipv4': ['10.0.0.{0}'.format(idx) for idx in range(8)],
+        'ip_interfaces': dict(('eth{0}'.format(idx), ['10.0.0.{0}'.format(idx)]) for idx in range(8)),
+        'cpu_flags': ['flag{0}'.format(idx) for idx in range(80)],
+        'mem_total': 15885,
+        'num_cpus': 8,
+        'saltversion': '3000',
+    })
+    ret = []
+    for fun, data in (('test.ping', True),
+                      ('state.highstate', highstate),
+                      ('pkg.list_pkgs', pkgs),
+                      ('grains.items', grains)):
+        ret.append((fun, {'cmd': '_return',
+                    'id': 'minion1.example.com',
+                    'jid': '20190101000000000000',
+                    'fun': fun,
+                    'fun_args': [],
+                    'retcode': 0,
+                    'success': True,
+                    'return': data,
+                    '_stamp': now}))
+    return ret
+
+
+def cached_returns(job_cache):
+    '''
+    Return the job returns stored in the local_cache job cache directory, by
+    function
+    '''
+    serial = salt.payload.Serial('msgpack')
+    ret = {}
+    for path in glob.glob(os.path.join(job_cache, '*', '*', '*', 'return.p')):
+        with salt.utils.files.fopen(path, 'rb') as fp_:
+            load = serial.load(fp_)
+        ret.setdefault(load.get('fun', 'unknown'), []).append(load)
+    return sorted(ret.items())
+
+
+def bench(func, returns, iterations):
+    '''
+    Return the number of returns per second serialized by func
+    '''
+    start = time.time()
+    for _ in range(iterations):
+        for ret in returns:
+            func(ret)
+    return iterations * len(returns) / (time.time() - start)
+
+
+def run(options):
+    '''
+    Run the benchmark
+    '''
+    if options.job_cache:
+        returns = cached_returns(options.job_cache)
+    else:
+        returns = [(fun, [ret]) for fun, ret in generated_returns()]
+    if not returns:
+        print('No job returns found')
+        return
+    serial = salt.payload.Serial('msgpack')
+    print('Serializing every return {0} times, in returns/sec'.format(options.iterations))
+    print('{0:<24} {1:>10} {2:>12} {3:>12} {4:>8}'.format(
+        'function', 'size', 'packb', 'Serial', 'speedup'))
+    for fun, fun_returns in returns:
+        size = sum(len(serial.dumps(ret)) for ret in fun_returns) // len(fun_returns)
+        for use_bin_type in (False, True):
+            legacy = bench(lambda ret: legacy_dumps(ret, use_bin_type=use_bin_type),
+                           fun_returns, options.iterations)
+            current = bench(lambda ret: serial.dumps(ret, use_bin_type=use_bin_type),
+                            fun_returns, options.iterations)
+            print('{0:<24} {1:>10} {2:>12.0f} {3:>12.0f} {4:>7.2f}x'.format(
+                fun + (' (bin)' if use_bin_type else ''), size, legacy,
+                current, current / legacy))
+
+
+if __name__ == '__main__':
+    run(parse())
@@ -5,13 +5,18 @@ unit tests for salt.cache
 
 # Import Python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import os
+import shutil
+import tempfile
 
 # Import Salt Testing libs
 # import integration
+from tests.support.runtests import RUNTIME_VARS
 from tests.support.unit import skipIf, TestCase
 from tests.support.mock import (
     NO_MOCK,
     NO_MOCK_REASON,
+    MagicMock,
     patch,
 )
 
@@ -41,6 +46,47 @@ class CacheFunctionsTest(TestCase):
         self.assertIsInstance(ret, salt.cache.MemCache)
 
 
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class CacheTest(TestCase):
+    '''
+    Validate the bulk functions of the Cache class
+    '''
+    def setUp(self):
+        self.cache = salt.cache.Cache({'cache': 'fake_driver'})
+        self.modules = {'fake_driver.fetch': MagicMock(side_effect=lambda bank, key: bank + key),
+                        'fake_driver.store': MagicMock()}
+        self.cache._modules = self.modules
+        self.cache._kwargs = {}
+
+    def tearDown(self):
+        del self.cache
+        del self.modules
+
+    def test_fetch_many(self):
+        # Without fetch_many, the driver fetches the banks one by one
+        self.assertEqual(self.cache.fetch_many(iter(['bank1', 'bank2']), 'key'),
+                         {'bank1': 'bank1key', 'bank2': 'bank2key'})
+        self.assertEqual(self.modules['fake_driver.fetch'].call_count, 2)
+
+        self.modules['fake_driver.fetch_many'] = MagicMock(return_value={'bank1': 'data'})
+        self.assertEqual(self.cache.fetch_many(['bank1'], 'key'), {'bank1': 'data'})
+        self.modules['fake_driver.fetch_many'].assert_called_once_with(['bank1'], 'key')
+        self.assertEqual(self.cache.fetch_many([], 'key'), {})
+        self.assertEqual(self.modules['fake_driver.fetch_many'].call_count, 1)
+        self.assertEqual(self.modules['fake_driver.fetch'].call_count, 2)
+
+    def test_store_many(self):
+        self.cache.store_many({'bank1': 'data1', 'bank2': 'data2'}, 'key')
+        self.assertEqual(
+            sorted(call[0] for call in self.modules['fake_driver.store'].call_args_list),
+            [('bank1', 'key', 'data1'), ('bank2', 'key', 'data2')])
+
+        self.modules['fake_driver.store_many'] = MagicMock()
+        self.cache.store_many({'bank1': 'data1'}, 'key')
+        self.modules['fake_driver.store_many'].assert_called_once_with({'bank1': 'data1'}, 'key')
+        self.assertEqual(self.modules['fake_driver.store'].call_count, 2)
+
+
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 class MemCacheTest(TestCase):
     '''
@@ -91,6 +137,40 @@ class MemCacheTest(TestCase):
         cache_fetch_mock.assert_called_once_with('bank', 'key')
         cache_fetch_mock.reset_mock()
 
+    @patch('salt.cache.Cache.store')
+    @patch('salt.cache.Cache.fetch_many', side_effect=lambda banks, key: dict((bank, 'fake_' + bank) for bank in banks))
+    @patch('salt.loader.cache', return_value={})
+    def test_fetch_many(self, loader_mock, cache_fetch_many_mock, cache_store_mock):
+        with patch('time.time', return_value=0):
+            self.cache.store('bank1', 'key', 'data1')
+        # Only the banks missing from the memory cache are fetched
+        with patch('time.time', return_value=1):
+            ret = self.cache.fetch_many(['bank1', 'bank2'], 'key')
+        self.assertEqual(ret, {'bank1': 'data1', 'bank2': 'fake_bank2'})
+        cache_fetch_many_mock.assert_called_once_with(['bank2'], 'key')
+        self.assertDictEqual(salt.cache.MemCache.data, {
+            'fake_driver': {
+                ('bank1', 'key'): [1, 'data1'],
+                ('bank2', 'key'): [1, 'fake_bank2'],
+                }})
+        # Fetch after expire
+        with patch('time.time', return_value=12):
+            ret = self.cache.fetch_many(['bank2'], 'key')
+        self.assertEqual(ret, {'bank2': 'fake_bank2'})
+        cache_fetch_many_mock.assert_called_with(['bank2'], 'key')
+
+    @patch('salt.cache.Cache.store_many')
+    @patch('salt.loader.cache', return_value={})
+    def test_store_many(self, loader_mock, cache_store_many_mock):
+        with patch('time.time', return_value=0):
+            self.cache.store_many({'bank1': 'data1', 'bank2': 'data2'}, 'key')
+        cache_store_many_mock.assert_called_once_with({'bank1': 'data1', 'bank2': 'data2'}, 'key')
+        self.assertDictEqual(salt.cache.MemCache.data, {
+            'fake_driver': {
+                ('bank1', 'key'): [0, 'data1'],
+                ('bank2', 'key'): [0, 'data2'],
+                }})
+
     @patch('salt.cache.Cache.store')
     @patch('salt.loader.cache', return_value={})
     def test_store(self, loader_mock, cache_store_mock):
@@ -217,3 +297,94 @@ class MemCacheTest(TestCase):
         # Check debug data
         self.assertEqual(self.cache.call, 6)
         self.assertEqual(self.cache.hit, 3)
+
+    @patch('salt.cache.Cache.fetch', return_value='fake_data')
+    @patch('salt.loader.cache', return_value={})
+    def test_stats(self, loader_mock, cache_fetch_mock):
+        salt.cache.MemCache.stats = {}
+        with patch('time.time', return_value=0):
+            self.cache.fetch('minions/alpha', 'data')
+            self.cache.fetch('minions/alpha', 'data')
+            self.cache.fetch('minions/beta', 'data')
+            self.cache.fetch('cloud/active', 'data')
+        self.assertEqual(salt.cache.MemCache.pop_stats(), {
+            'minions': {'hits': 1, 'misses': 2, 'invalidated': 0, 'rate': 1.0 / 3},
+            'cloud': {'hits': 0, 'misses': 1, 'invalidated': 0, 'rate': 0.0},
+            })
+        self.assertEqual(salt.cache.MemCache.stats, {})
+
+    @patch('salt.cache.Cache.store')
+    @patch('salt.cache.Cache.flush')
+    @patch('salt.loader.cache', return_value={})
+    def test_flush_bank(self, loader_mock, cache_flush_mock, cache_store_mock):
+        self.cache.store('minions/alpha', 'data', 'fake_data')
+        self.cache.store('minions/alpha/sub', 'data', 'fake_data')
+        self.cache.store('minions/alphabet', 'data', 'fake_data')
+        self.cache.flush('minions/alpha')
+        self.assertEqual(list(salt.cache.MemCache.data['fake_driver']),
+                         [('minions/alphabet', 'data')])
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class MemCacheInvalidationTest(TestCase):
+    '''
+    Validate the invalidation of the memcache values changed by other processes
+    '''
+    def setUp(self):
+        salt.cache.MemCache.data = {}
+        salt.cache.MemCache.stats = {}
+        self.cachedir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.opts = {'cache': 'fake_driver',
+                     'memcache_expire_seconds': 10,
+                     'memcache_max_items': 3,
+                     'memcache_invalidation': True}
+        patcher = patch('salt.loader.cache', return_value={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.dict(salt.cache._GENERATIONS, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = salt.cache.factory(self.opts, cachedir=self.cachedir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+        del self.cache
+        del self.cachedir
+        del self.opts
+
+    def test_generations(self):
+        generations = salt.cache._get_generations(self.cachedir)
+        self.assertIs(self.cache.generations, generations)
+        other = salt.cache._Generations(os.path.join(self.cachedir, '.memcache_generations'))
+        before = generations.get('minions/alpha', 'data')
+        other.bump('minions/alpha', 'data')
+        self.assertNotEqual(generations.get('minions/alpha', 'data'), before)
+        before = generations.get('minions/beta', 'mine')
+        other.bump('minions')
+        self.assertNotEqual(generations.get('minions/beta', 'mine'), before)
+
+    @patch('salt.cache.Cache.fetch', return_value='fake_data')
+    @patch('salt.cache.Cache.store')
+    @patch('salt.cache.Cache.flush')
+    def test_invalidation(self, cache_flush_mock, cache_store_mock, cache_fetch_mock):
+        other = salt.cache.factory(self.opts, cachedir=self.cachedir)
+        self.cache.fetch('minions/alpha', 'data')
+        self.cache.fetch('minions/alpha', 'data')
+        self.assertEqual(cache_fetch_mock.call_count, 1)
+
+        # Another process stores the key
+        with patch.object(salt.cache.MemCache, 'data', {}):
+            other.store('minions/alpha', 'data', 'new_data')
+        # The value stored is fetched again
+        self.cache.fetch('minions/alpha', 'data')
+        self.assertEqual(cache_fetch_mock.call_count, 2)
+        self.cache.fetch('minions/alpha', 'data')
+        self.assertEqual(cache_fetch_mock.call_count, 2)
+
+        # Another process flushes a bank
+        with patch.object(salt.cache.MemCache, 'data', {}):
+            other.flush('minions')
+        self.cache.fetch('minions/alpha', 'data')
+        self.assertEqual(cache_fetch_mock.call_count, 3)
+        self.assertEqual(salt.cache.MemCache.pop_stats()['minions'],
+                         {'hits': 2, 'misses': 3, 'invalidated': 2, 'rate': 0.4})
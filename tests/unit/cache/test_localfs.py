@@ -140,6 +140,30 @@ class LocalFSTest(TestCase, LoaderModuleMockMixin):
             with patch.dict(localfs.__context__, {'serial': serializer}):
                 self.assertIn('payload data', localfs.fetch(bank='bank', key='key', cachedir=tmp_dir))
 
+    # 'fetch_many' function tests: 2
+
+    def test_fetch_many_success(self):
+        '''
+        Tests that the fetch_many function reads the cache files of the banks, and
+        returns an empty dict for the banks without the key.
+        '''
+        tmp_dir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        serializer = salt.payload.Serial(self)
+        self._create_tmp_cache_file(tmp_dir, serializer)
+
+        with patch.dict(localfs.__context__, {'serial': serializer}):
+            self.assertEqual(localfs.fetch_many(banks=['bank', 'missing'], key='key', cachedir=tmp_dir),
+                             {'bank': 'payload data', 'missing': {}})
+
+    def test_fetch_many_error_reading_cache(self):
+        '''
+        Tests that a SaltCacheError is raised when there is a problem reading a cache
+        file.
+        '''
+        with patch.dict(localfs.__context__, {'serial': salt.payload.Serial(self)}), \
+                patch('salt.utils.files.fopen', MagicMock(side_effect=IOError(errno.EACCES, 'Denied'))):
+            self.assertRaises(SaltCacheError, localfs.fetch_many, banks=['bank'], key='', cachedir='')
+
     # 'updated' function tests: 3
 
     def test_updated_return_when_cache_file_does_not_exist(self):
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+'''
+unit tests for the sqlite cache
+'''
+
+# Import Python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from tests.support.runtests import RUNTIME_VARS
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.unit import TestCase
+from tests.support.mock import patch
+
+# Import Salt libs
+import salt.payload
+import salt.cache.sqlite_cache as sqlite_cache
+from salt.exceptions import SaltCacheError
+
+
+class SQLiteCacheTest(TestCase, LoaderModuleMockMixin):
+    '''
+    Validate the functions in the sqlite cache
+    '''
+
+    def setup_loader_modules(self):
+        return {sqlite_cache: {'__context__': {'serial': salt.payload.Serial('msgpack')}}}
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        # Connections are kept by database path and thread
+        patcher = patch.object(sqlite_cache, '_local', sqlite_cache.threading.local())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for conn in sqlite_cache._local.conns.values():
+            conn.close()
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+        del self.cachedir
+
+    def test_store_fetch(self):
+        self.assertEqual(sqlite_cache.fetch('minions/alpha', 'data', cachedir=self.cachedir), {})
+        self.assertIsNone(sqlite_cache.updated('minions/alpha', 'data', cachedir=self.cachedir))
+        with patch('time.time', return_value=1000.5):
+            sqlite_cache.store('minions/alpha', 'data', {'grains': {'os': 'Linux'}},
+                               cachedir=self.cachedir)
+        self.assertEqual(sqlite_cache.fetch('minions/alpha', 'data', cachedir=self.cachedir),
+                         {'grains': {'os': 'Linux'}})
+        self.assertEqual(sqlite_cache.updated('minions/alpha', 'data', cachedir=self.cachedir), 1000)
+        self.assertTrue(os.path.isfile(os.path.join(self.cachedir, 'cache.sqlite')))
+        with patch.dict(sqlite_cache.__opts__, {'cache.sqlite.path': os.path.join(self.cachedir, 'other.db')}):
+            self.assertEqual(sqlite_cache.fetch('minions/alpha', 'data', cachedir=self.cachedir), {})
+
+    def test_store_many_fetch_many(self):
+        sqlite_cache.store_many(dict(('minions/{0}'.format(idx), idx) for idx in range(1200)),
+                                'data', cachedir=self.cachedir)
+        ret = sqlite_cache.fetch_many(['minions/{0}'.format(idx) for idx in range(1201)],
+                                      'data', cachedir=self.cachedir)
+        self.assertEqual(len(ret), 1201)
+        self.assertEqual(ret['minions/1199'], 1199)
+        self.assertEqual(ret['minions/1200'], {})
+        self.assertEqual(sqlite_cache.fetch_many(['minions/1'], 'mine', cachedir=self.cachedir),
+                         {'minions/1': {}})
+
+    def test_list_contains_flush(self):
+        for bank, key in (('minions/alpha', 'data'), ('minions/alpha', 'mine'),
+                          ('minions/beta', 'data'), ('minions/beta/sub', 'data'),
+                          ('minions0', 'data'), ('minions', 'key')):
+            sqlite_cache.store(bank, key, True, cachedir=self.cachedir)
+        self.assertEqual(sorted(sqlite_cache.list_('minions', cachedir=self.cachedir)),
+                         ['alpha', 'beta', 'key'])
+        self.assertEqual(sorted(sqlite_cache.list_('minions/alpha', cachedir=self.cachedir)),
+                         ['data', 'mine'])
+        self.assertEqual(sqlite_cache.list_('missing', cachedir=self.cachedir), [])
+        self.assertTrue(sqlite_cache.contains('minions/beta', None, cachedir=self.cachedir))
+        self.assertTrue(sqlite_cache.contains('minions/beta', 'data', cachedir=self.cachedir))
+        self.assertFalse(sqlite_cache.contains('minions/beta', 'mine', cachedir=self.cachedir))
+
+        self.assertTrue(sqlite_cache.flush('minions/alpha', 'mine', cachedir=self.cachedir))
+        self.assertFalse(sqlite_cache.flush('minions/alpha', 'mine', cachedir=self.cachedir))
+        self.assertEqual(sqlite_cache.list_('minions/alpha', cachedir=self.cachedir), ['data'])
+        # The sub-banks are flushed along with the bank
+        self.assertTrue(sqlite_cache.flush('minions/beta', cachedir=self.cachedir))
+        self.assertFalse(sqlite_cache.contains('minions/beta', None, cachedir=self.cachedir))
+        self.assertEqual(sorted(sqlite_cache.list_('minions', cachedir=self.cachedir)),
+                         ['alpha', 'key'])
+        self.assertTrue(sqlite_cache.contains('minions0', 'data', cachedir=self.cachedir))
+
+    def test_open_error(self):
+        with patch.dict(sqlite_cache.__opts__, {'cache.sqlite.path': os.path.join(self.cachedir, 'missing', '')}):
+            self.assertRaises(SaltCacheError, sqlite_cache.fetch, 'bank', 'key', cachedir=self.cachedir)
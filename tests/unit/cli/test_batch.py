@@ -7,7 +7,7 @@
 from __future__ import absolute_import, print_function, unicode_literals
 
 # Import Salt Libs
-from salt.cli.batch import Batch
+from salt.cli.batch import Batch, BatchSizer, order_by_duration, failed_return
 
 # Import Salt Testing Libs
 from tests.support.unit import skipIf, TestCase
@@ -65,3 +65,71 @@ class BatchTestCase(TestCase):
         '''
         ret = Batch.get_bnum(self.batch)
         self.assertEqual(ret, None)
+
+    # adaptive batch tests
+
+    def test_batch_sizer_increase(self):
+        '''
+        Tests growing the batch by one minion per batch of returns
+        '''
+        sizer = BatchSizer({'batch_adaptive_max': 4}, 2)
+        sizer.returned(0, 10)
+        sizer.returned(0, 12)
+        self.assertEqual(sizer.bnum, 2)
+        sizer.returned(0, 10)
+        self.assertEqual(sizer.bnum, 3)
+        for _ in range(10):
+            sizer.returned(0, 10)
+        self.assertEqual(sizer.bnum, 4)
+
+    def test_batch_sizer_decrease(self):
+        '''
+        Tests halving the batch on failures, slow returns and slow publishes
+        '''
+        sizer = BatchSizer({}, 8)
+        sizer.returned(0, 10)
+        sizer.returned(5, 100)
+        self.assertEqual(sizer.bnum, 4)
+        # The minions started before the decrease do not decrease it again
+        sizer.returned(1, 101, failed=True)
+        self.assertEqual(sizer.bnum, 4)
+        sizer.returned(100, 110, failed=True)
+        self.assertEqual(sizer.bnum, 2)
+        sizer.published(120, 125)
+        self.assertEqual(sizer.bnum, 1)
+        sizer.published(130, 135)
+        self.assertEqual(sizer.bnum, 1)
+
+    def test_batch_sizer_latency(self):
+        '''
+        Tests the configured return and publish latencies
+        '''
+        sizer = BatchSizer({'batch_adaptive_latency': 60,
+                            'batch_adaptive_publish_latency': 0,
+                            'batch_adaptive_min': 2}, 4)
+        sizer.published(0, 30)
+        sizer.returned(0, 1)
+        sizer.returned(0, 50)
+        self.assertEqual(sizer.bnum, 4)
+        sizer.returned(0, 70)
+        self.assertEqual(sizer.bnum, 2)
+        sizer.returned(70, 200)
+        self.assertEqual(sizer.bnum, 2)
+
+    def test_order_by_duration(self):
+        '''
+        Tests starting the longest minions first
+        '''
+        self.assertEqual(order_by_duration(['a', 'b', 'c', 'd'], {'a': 1, 'b': 30, 'c': 10, 'e': 100}),
+                         ['b', 'd', 'c', 'a'])
+        self.assertEqual(order_by_duration(['b', 'a'], {}), ['a', 'b'])
+
+    def test_failed_return(self):
+        '''
+        Tests telling apart the failed returns
+        '''
+        self.assertFalse(failed_return({'ret': True, 'retcode': 0}))
+        self.assertTrue(failed_return({'ret': False, 'retcode': 1}))
+        self.assertTrue(failed_return({'ret': {}}))
+        self.assertFalse(failed_return({'data': {'return': True, 'retcode': 0, 'success': True}}))
+        self.assertTrue(failed_return({'data': {'return': True, 'retcode': 0, 'success': False}}))
@@ -169,6 +169,22 @@ class AsyncBatchTestCase(AsyncTestCase, TestCase):
         self.batch.batch_size = 3
         self.assertEqual(self.batch._get_next(), {'foo', 'bar'})
 
+    def test_next_batch_adaptive(self):
+        self.batch.minions = set(['foo', 'bar', 'baz'])
+        self.batch.batch_size = 3
+        self.batch.sizer = MagicMock(bnum=1)
+        self.batch.active = set(['foo'])
+        self.assertEqual(self.batch._get_next(), set())
+        self.batch.sizer.bnum = 2
+        self.assertEqual(len(self.batch._get_next()), 1)
+
+    def test_next_batch_order_by_duration(self):
+        self.batch.opts['batch_order_by_duration'] = True
+        self.batch.minions = set(['foo', 'bar', 'baz'])
+        self.batch.batch_size = 2
+        self.batch.past_durations = {'foo': 1, 'bar': 10}
+        self.assertEqual(self.batch._get_next(), set(['bar', 'baz']))
+
     def test_next_batch_all_done(self):
         self.batch.minions = {'foo', 'bar'}
         self.batch.done_minions = {'foo', 'bar'}
@@ -563,6 +563,9 @@ class FakeCache(object):
     def fetch(self, bank, key):
         return self.data[bank, key]
 
+    def fetch_many(self, banks, key):
+        return dict((bank, self.data.get((bank, key), {})) for bank in banks)
+
 
 class RemoteFuncsTestCase(TestCase):
     '''
@@ -658,3 +661,31 @@ class RemoteFuncsTestCase(TestCase):
                 }
             )
         self.assertDictEqual(ret, dict(ip_addr=dict(webserver='2001:db8::1:3'), ip4_addr=dict(webserver='127.0.0.1')))
+
+    def test_mine_get_cache(self):
+        '''
+        Asserts that the results of ``mine_get`` are kept until the mine of
+        one of their minions changes
+        '''
+        self.funcs.cache.store('minions/webserver', 'mine', dict(ip_addr='2001:db8::1:3'))
+        self.funcs.cache.store('minions/dbserver', 'mine', dict(ip_addr='2001:db8::1:4'))
+        load = {'id': 'requester_minion', 'tgt': 'G@roles:web', 'fun': 'ip_addr', 'tgt_type': 'compound'}
+        check = MagicMock(return_value=dict(minions=['webserver'], missing=[]))
+        with patch.dict(self.funcs.opts, {'mine_get_cache_ttl': 60, 'memcache_invalidation': True}), \
+                patch.object(masterapi.RemoteFuncs, 'mine_get_results', masterapi.OrderedDict()), \
+                patch('salt.utils.minions.CkMinions._check_compound_minions', check):
+            self.assertDictEqual(self.funcs._mine_get(dict(load)), dict(webserver='2001:db8::1:3'))
+            self.assertDictEqual(self.funcs._mine_get(dict(load, id='other_minion')),
+                                 dict(webserver='2001:db8::1:3'))
+            self.assertEqual(check.call_count, 1)
+            # The mine of a minion which is not matched does not drop the result
+            self.funcs._mine({'id': 'dbserver', 'data': dict(ip_addr='2001:db8::1:5')})
+            self.funcs._mine_get(dict(load))
+            self.assertEqual(check.call_count, 1)
+            # Other functions are another result
+            self.funcs._mine_get(dict(load, fun='ip_addr,ip4_addr'))
+            self.assertEqual(check.call_count, 2)
+
+            self.funcs._mine({'id': 'webserver', 'data': dict(ip_addr='2001:db8::1:6')})
+            self.assertDictEqual(self.funcs._mine_get(dict(load)), dict(webserver='2001:db8::1:6'))
+            self.assertEqual(check.call_count, 3)
@@ -329,3 +329,16 @@ class StatusTestCase(TestCase, LoaderModuleMockMixin):
                 with patch.dict(status.__salt__, {'cmd.run': MagicMock(return_value=w_output)}):
                     ret = status.w()
                     self.assertListEqual(ret, m.ret)
+
+    def test_master_publish_shard(self):
+        '''
+        status.master checks the port the minion subscribes to
+        '''
+        remote_port_tcp = MagicMock(return_value={'10.0.0.1'})
+        config_get = MagicMock(return_value=4505)
+        with patch('salt.utils.network.host_to_ips', MagicMock(return_value=['10.0.0.1'])), \
+                patch('salt.utils.network.remote_port_tcp', remote_port_tcp), \
+                patch.dict(status.__salt__, {'config.get': config_get}), \
+                patch.dict(status.__opts__, {'master_publish_port': 4531}):
+            self.assertTrue(status.master('salt', connected=True))
+        remote_port_tcp.assert_called_once_with(4531)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+# Import Python Libs
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import Salt Testing libs
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.unit import TestCase
+from tests.support.mock import MagicMock, patch
+
+# Import Salt libs
+import salt.renderers.jinja as jinja
+
+
+class JinjaRendererTestCase(TestCase, LoaderModuleMockMixin):
+
+    def setup_loader_modules(self):
+        return {jinja: {'__salt__': {'test.echo': lambda text: text},
+                        '__grains__': {},
+                        '__opts__': {},
+                        '__pillar__': {},
+                        '__proxy__': {},
+                        '__context__': {},
+                        '__salt_system_encoding__': 'utf-8'}}
+
+    def _render_kwargs(self):
+        mock = MagicMock(return_value={'result': True, 'data': ''})
+        with patch('salt.utils.templates.JINJA', mock):
+            jinja.render('template.sls')
+        return mock.call_args[1]
+
+    def test_env_cache_session(self):
+        '''
+        The environment is only reused for the sessions of a state run or a
+        pillar compilation
+        '''
+        self.assertNotIn('_jinja_env_cache', self._render_kwargs())
+        self.assertEqual(jinja.__context__, {})
+
+        env_cache = {}
+        with patch.dict(jinja.__context__, {'jinja_env_cache': env_cache}):
+            self.assertIs(self._render_kwargs()['_jinja_env_cache'], env_cache)
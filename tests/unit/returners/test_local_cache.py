@@ -353,3 +353,100 @@ class Local_CacheTest(TestCase, AdaptedConfigurationTestCaseMixin, LoaderModuleM
         self._check_dir_files('new_jid_dir was not removed',
                               self.EMPTY_JID_DIR,
                               status='removed')
+
+
+class LocalCachePartialReturnTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the partial returns of the local_cache returner
+    '''
+    def setup_loader_modules(self):
+        self.tmp_cache_dir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_cache_dir, ignore_errors=True)
+        return {local_cache: {'__opts__': {'cachedir': self.tmp_cache_dir,
+                                           'hash_type': 'sha256',
+                                           'keep_jobs': 24}}}
+
+    def test_partial_returns(self):
+        '''
+        Test that the partial returns are merged in order, and removed once
+        the minion returns
+        '''
+        jid = '20191010101010101010'
+        self.assertFalse(local_cache.save_partial_return(jid, 'minion', 0, {'a': 1}))
+
+        local_cache.prep_jid(passed_jid=jid)
+        self.assertTrue(local_cache.save_partial_return(jid, 'minion', 1, {'b': 2, 'c': 3}))
+        self.assertTrue(local_cache.save_partial_return(jid, 'minion', 0, {'a': 1, 'c': 0}))
+        self.assertEqual(local_cache.get_partial_returns(jid, 'minion'),
+                         {'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(local_cache.get_partial_returns(jid, 'other'), {})
+        # The partial returns are not listed as a minion return
+        self.assertEqual(local_cache.get_jid(jid), {})
+
+        local_cache.returner({'jid': jid, 'id': 'minion',
+                              'return': {'a': 1, 'b': 2, 'c': 3, 'd': 4}})
+        self.assertEqual(local_cache.get_partial_returns(jid, 'minion'), {})
+        self.assertFalse(local_cache.save_partial_return(jid, 'minion', 2, {'e': 5}))
+        self.assertEqual(local_cache.get_jid(jid),
+                         {'minion': {'return': {'a': 1, 'b': 2, 'c': 3, 'd': 4}}})
+
+    def test_store_job_merges_partial_returns(self):
+        '''
+        Test that the results a minion streamed are merged back into its
+        final return by the master
+        '''
+        jid = '20191010101010101010'
+        opts = {'master_job_cache': 'local_cache', 'job_cache': True,
+                'ext_job_cache': '', 'pki_dir': self.tmp_cache_dir,
+                'unique_jid': False}
+        mminion = MagicMock()
+        mminion.returners = dict(
+            ('local_cache.{0}'.format(fun), getattr(local_cache, fun))
+            for fun in ('prep_jid', 'save_load', 'get_load', 'returner',
+                        'save_partial_return', 'get_partial_returns'))
+        event = MagicMock()
+        local_cache.prep_jid(passed_jid=jid)
+
+        load = {'id': 'minion', 'jid': jid, 'seq': 0, 'return': {'a': 1}}
+        self.assertTrue(salt.utils.job.store_partial(opts, load, event=event, mminion=mminion))
+        self.assertEqual(event.fire_event.call_args[0][1],
+                         'salt/job/{0}/partial/minion/0'.format(jid))
+
+        load = {'id': 'minion', 'jid': jid, 'fun': 'state.apply',
+                'return': {'b': 2}, 'stream': {'batches': 1, 'states': 1}}
+        salt.utils.job.store_job(opts, load, event=event, mminion=mminion)
+        self.assertNotIn('stream', load)
+        self.assertEqual(event.fire_event.call_args[0][0]['return'], {'a': 1, 'b': 2})
+        self.assertEqual(local_cache.get_jid(jid),
+                         {'minion': {'return': {'a': 1, 'b': 2}}})
+
+    def test_get_jid_iter(self):
+        '''
+        Test that the returns are yielded one minion at a time
+        '''
+        jid = '20191010101010101010'
+        self.assertEqual(list(local_cache.get_jid_iter(jid)), [])
+        local_cache.prep_jid(passed_jid=jid)
+        for idx in range(3):
+            local_cache.returner({'jid': jid, 'id': 'minion{0}'.format(idx),
+                                  'return': {'idx': idx}, 'out': 'nested'})
+        returns = local_cache.get_jid_iter(jid)
+        self.assertEqual(next(returns)[1]['out'], 'nested')
+        self.assertEqual(sorted(local_cache.get_jid_iter(jid)),
+                         [('minion{0}'.format(idx), {'return': {'idx': idx}, 'out': 'nested'})
+                          for idx in range(3)])
+        self.assertEqual(local_cache.get_jid(jid), dict(local_cache.get_jid_iter(jid)))
+
+    def test_get_jid_iter_empty(self):
+        '''
+        Test that an empty return is loaded as None, instead of being read
+        again and again
+        '''
+        jid = '20191010101010101010'
+        local_cache.prep_jid(passed_jid=jid)
+        local_cache.returner({'jid': jid, 'id': 'minion', 'return': True})
+        retp = os.path.join(salt.utils.jid.jid_dir(jid, local_cache._job_dir(), 'sha256'),
+                            'minion', local_cache.RETURN_P)
+        with salt.utils.files.fopen(retp, 'wb'):
+            pass
+        self.assertEqual(local_cache.get_jid(jid), {'minion': {'return': None}})
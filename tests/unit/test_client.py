@@ -9,7 +9,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 # Import Salt Testing libs
 import tests.integration as integration
 from tests.support.unit import TestCase, skipIf
-from tests.support.mock import patch, NO_MOCK, NO_MOCK_REASON
+from tests.support.mock import MagicMock, patch, NO_MOCK, NO_MOCK_REASON
 
 # Import Salt libs
 from salt import client
@@ -47,6 +47,69 @@ class LocalClientTestCase(TestCase,
 
         self.assertDictEqual(valid_pub_data, self.client._check_pub_data(valid_pub_data))
 
+    def test_get_cache_returns_iter(self):
+        returns = {'m1': {'return': True, 'out': 'nested'}, 'm2': {'return': False}}
+        expected = [{'m1': {'ret': True, 'out': 'nested'}}, {'m2': {'ret': False}}]
+        opts = dict(self.client.opts, master_job_cache='local_cache')
+        with patch.object(self.client, 'opts', opts), \
+                patch.object(self.client, 'returners',
+                             {'local_cache.get_jid_iter': lambda jid: iter(sorted(returns.items()))}):
+            self.assertEqual(list(self.client.get_cache_returns_iter('1234')), expected)
+            self.assertEqual(self.client.get_cache_returns('1234'),
+                             {'m1': {'ret': True, 'out': 'nested'}, 'm2': {'ret': False}})
+
+        # Job caches without get_jid_iter are read at once
+        with patch.object(self.client, 'opts', opts), \
+                patch.object(self.client, 'returners',
+                             {'local_cache.get_jid': lambda jid: returns}):
+            self.assertEqual(sorted(self.client.get_cache_returns_iter('1234'),
+                                    key=lambda ret: list(ret)),
+                             expected)
+
+    def test_get_cache_returns_error(self):
+        def get_jid_iter(jid):
+            raise IOError('broken')
+            yield  # pylint: disable=unreachable
+        opts = dict(self.client.opts, master_job_cache='local_cache')
+        with patch.object(self.client, 'opts', opts), \
+                patch.object(self.client, 'returners',
+                             {'local_cache.get_jid_iter': get_jid_iter}):
+            self.assertRaises(SaltClientError, self.client.get_cache_returns, '1234')
+
+    def test_get_iter_returns_job_tracker(self):
+        events = [{'tag': 'salt/job/1234/new', 'data': {'jid': '1234', 'minions': ['m1', 'm2']}},
+                  {'tag': 'salt/job/1234/ret/m1', 'data': {'id': 'm1', 'return': True}},
+                  None,
+                  {'tag': 'salt/job/1234/running', 'data': {'jid': '1234', 'running': 1}},
+                  {'tag': 'salt/job/1234/complete',
+                   'data': {'jid': '1234', 'returned': 1, 'unresponsive': ['m2'], 'unknown': []}}]
+        opts = dict(self.client.opts, job_tracker=True, master_job_cache='local_cache')
+        with patch.object(self.client, 'opts', opts), \
+                patch.object(self.client, 'returners', {'local_cache.get_load': lambda jid: {'jid': jid}}), \
+                patch.object(self.client, 'get_returns_no_block',
+                             MagicMock(side_effect=lambda *args: iter(events + [None] * 1000))), \
+                patch.object(self.client, 'gather_job_info', MagicMock()) as gather_job_info:
+            rets = list(self.client.get_iter_returns('1234', ['m1', 'm2'], timeout=0, expect_minions=True))
+        self.assertEqual(rets, [{'m1': {'ret': True}}, {'m2': {'failed': True}}])
+        # The minions are not pinged with find_job
+        gather_job_info.assert_not_called()
+
+    def test_get_iter_returns_job_tracker_unknown(self):
+        events = [{'tag': 'salt/job/1234/new', 'data': {'jid': '1234', 'minions': ['m1', 'm2']}},
+                  {'tag': 'salt/job/1234/ret/m1', 'data': {'id': 'm1', 'return': True}},
+                  {'tag': 'salt/job/1234/complete',
+                   'data': {'jid': '1234', 'returned': 1, 'unresponsive': [], 'unknown': ['m2']}}]
+        opts = dict(self.client.opts, job_tracker=True, master_job_cache='local_cache')
+        with patch.object(self.client, 'opts', opts), \
+                patch.object(self.client, 'returners', {'local_cache.get_load': lambda jid: {'jid': jid}}), \
+                patch.object(self.client, 'get_returns_no_block',
+                             MagicMock(side_effect=lambda *args: iter(events + [None] * 1000))), \
+                patch.object(self.client, 'gather_job_info', MagicMock(return_value={})) as gather_job_info:
+            rets = list(self.client.get_iter_returns('1234', ['m1', 'm2'], timeout=0, expect_minions=True))
+        self.assertEqual(rets, [{'m1': {'ret': True}}, {'m2': {'failed': True}}])
+        # The minion the job tracker never heard from is pinged with find_job
+        self.assertEqual(gather_job_info.call_args[0][1], ['m2'])
+
     def test_cmd_subset(self):
         with patch('salt.client.LocalClient.cmd', return_value={'minion1': ['first.func', 'second.func'],
                                                                 'minion2': ['first.func', 'second.func']}):
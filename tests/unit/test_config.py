@@ -1563,6 +1563,30 @@ class ConfigTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
             self.assertNotIn('environment', ret)
             self.assertEqual(ret['saltenv'], 'foo')
 
+    def test_publish_shard_ports(self):
+        '''
+        The ports of the publisher shards must not overlap the other ports of
+        the master
+        '''
+        defaults = salt.config.DEFAULT_MASTER_OPTS.copy()
+        ret = salt.config.apply_master_config(
+            {'publish_shards': 4, 'ipc_mode': 'tcp'}, defaults)
+        self.assertEqual(ret['publish_shards'], 4)
+        # The shards would listen on the ret_port
+        self.assertRaises(
+            SaltConfigurationError,
+            salt.config.apply_master_config,
+            {'publish_shards': 4, 'publish_shard_port': 4506}, defaults)
+        # The shards would pull the loads on the tcp_master_pull_port
+        self.assertRaises(
+            SaltConfigurationError,
+            salt.config.apply_master_config,
+            {'publish_shards': 4, 'ipc_mode': 'tcp',
+             'tcp_master_publish_pull_shard': 4513}, defaults)
+        # Without ipc_mode tcp the pull ports are not used
+        salt.config.apply_master_config(
+            {'publish_shards': 4, 'tcp_master_publish_pull_shard': 4513}, defaults)
+
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 class APIConfigTestCase(DefaultConfigsBase, TestCase):
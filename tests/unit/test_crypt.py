@@ -5,6 +5,7 @@ from __future__ import absolute_import
 import os
 import tempfile
 import shutil
+import zlib
 
 # salt testing libs
 from tests.support.unit import TestCase, skipIf
@@ -19,6 +20,7 @@ from tests.support.mock import (
 
 # salt libs
 from salt.ext import six
+import salt.transport.frame
 import salt.utils.files
 from salt import crypt
 
@@ -313,3 +315,57 @@ class TestM2CryptoRegression47124(TestCase):
         with patch('salt.crypt.get_rsa_key', return_value=key):
             signature = salt.crypt.sign_message('/keydir/keyname.pem', message, passphrase='password')
         self.assertEqual(signature, self.SIGNATURE)
+
+
+class CrypticleCompressionTestCase(TestCase):
+    '''
+    Test the compression of the Crypticle payloads
+    '''
+    def setUp(self):
+        self.key = crypt.Crypticle.generate_key_string()
+        self.data = {'ret': ['pkg-{0}'.format(idx) for idx in range(1000)]}
+
+    def test_compressed(self):
+        '''
+        Payloads over the threshold are compressed, and any Crypticle loads
+        them
+        '''
+        plain = crypt.Crypticle({}, self.key).dumps(self.data)
+        compressed = crypt.Crypticle(
+            {'transport_compression': 'zlib'}, self.key).dumps(self.data)
+        self.assertLess(len(compressed), len(plain))
+        self.assertEqual(crypt.Crypticle({}, self.key).loads(compressed), self.data)
+
+    def test_threshold(self):
+        '''
+        Payloads under the threshold are not compressed
+        '''
+        crypticle = crypt.Crypticle(
+            {'transport_compression': 'zlib',
+             'transport_compression_threshold': 100000},
+            self.key)
+        data = crypticle.decrypt(crypticle.dumps(self.data))
+        self.assertTrue(data.startswith(crypt.Crypticle.PICKLE_PAD))
+
+    def test_decompression_max(self):
+        '''
+        Payloads decompressing to more than transport_decompression_max bytes
+        are dropped
+        '''
+        crypticle = crypt.Crypticle(
+            {'transport_decompression_max': 1024 * 1024}, self.key)
+        bomb = crypticle.encrypt(b'zlib::' + zlib.compress(b'\0' * (1024 * 1024 + 1)))
+        self.assertEqual(crypticle.loads(bomb), {})
+        compressed = crypt.Crypticle(
+            {'transport_compression': 'zlib'}, self.key).dumps(self.data)
+        self.assertEqual(crypticle.loads(compressed), self.data)
+
+    def test_unavailable(self):
+        '''
+        Payloads compressed with an algorithm that is not available are
+        dropped
+        '''
+        crypticle = crypt.Crypticle({}, self.key)
+        data = crypticle.encrypt(b'lz4::' + b'garbage')
+        with patch.dict(salt.transport.frame.COMPRESSORS, clear=True):
+            self.assertEqual(crypticle.loads(data), {})
@@ -19,6 +19,7 @@ from tests.support.unit import TestCase, skipIf
 
 # Import Salt libs
 import salt.utils.files
+import salt.utils.platform
 from salt.ext.six.moves import range
 from salt import fileclient
 from salt.ext import six
@@ -411,3 +412,129 @@ class FileclientCacheTest(TestCase, AdaptedConfigurationTestCaseMixin, LoaderMod
                 log.debug('cache_loc = %s', cache_loc)
                 log.debug('content = %s', content)
                 self.assertTrue(saltenv in content)
+
+    def test_cache_file_delta_transfer(self):
+        '''
+        Ensure that only the changed blocks of a file are fetched again when
+        file_delta_transfer is enabled and a copy of the file is cached
+        '''
+        patched_opts = dict((x, y) for x, y in six.iteritems(self.minion_opts))
+        patched_opts.update(self.MOCKED_OPTS)
+        patched_opts['file_delta_transfer'] = True
+        patched_opts['file_buffer_size'] = 16
+        blocks = [six.text_type(x) * 16 for x in range(8)]
+        path = os.path.join(self.FS_ROOT, 'base', 'delta.txt')
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write(''.join(blocks))
+
+        with patch.dict(fileclient.__opts__, patched_opts):
+            client = fileclient.get_file_client(fileclient.__opts__, pillar=False)
+            cache_loc = client.cache_file('salt://delta.txt', 'base')
+            blocks[3] = 'x' * 16
+            with salt.utils.files.fopen(path, 'w') as fp_:
+                fp_.write(''.join(blocks))
+            os.utime(path, (1, 1))
+
+            send = client.channel.send
+            with patch.object(client.channel, 'send',
+                              MagicMock(side_effect=send)) as send_mock:
+                self.assertEqual(
+                    client.cache_file('salt://delta.txt', 'base'), cache_loc)
+            served = [x for x in send_mock.call_args_list
+                      if x[0][0]['cmd'] == '_serve_file']
+            self.assertEqual(len(served), 1)
+            self.assertEqual(served[0][0][0]['loc'], 48)
+            with salt.utils.files.fopen(cache_loc) as fp_:
+                self.assertEqual(fp_.read(), ''.join(blocks))
+
+    def test_cache_files_prefetch_hashes(self):
+        '''
+        Ensure that the hashes of the files are requested at once from a
+        channel able to send several requests at once
+        '''
+        patched_opts = dict((x, y) for x, y in six.iteritems(self.minion_opts))
+        patched_opts.update(self.MOCKED_OPTS)
+
+        with patch.dict(fileclient.__opts__, patched_opts):
+            client = fileclient.get_file_client(fileclient.__opts__, pillar=False)
+            send = client.channel.send
+            client.channel.send_many = MagicMock(
+                side_effect=lambda loads: [send(load) for load in loads])
+            with patch.object(client.channel, 'send',
+                              MagicMock(side_effect=send)) as send_mock:
+                ret = client.cache_files(
+                    ['salt://foo.txt', 'salt://subdir/bar.txt'], 'base')
+            self.assertEqual(len(ret), 2)
+            self.assertTrue(all(ret))
+            loads = client.channel.send_many.call_args[0][0]
+            self.assertEqual(
+                [(x['cmd'], x['path']) for x in loads],
+                [('_file_hash', 'foo.txt'), ('_file_find', 'foo.txt'),
+                 ('_file_hash', 'subdir/bar.txt'),
+                 ('_file_find', 'subdir/bar.txt')])
+            # The prefetched hashes are used instead of asking again
+            self.assertFalse(
+                [x for x in send_mock.call_args_list
+                 if x[0][0]['cmd'] in ('_file_hash', '_file_find')])
+            self.assertEqual(client._prefetched, {})
+
+    @skipIf(salt.utils.platform.is_windows(), 'The file store uses symlinks')
+    def test_cache_file_dedup(self):
+        '''
+        Ensure that a file with the same content in another saltenv is not
+        fetched again when file_cache_dedup is enabled
+        '''
+        patched_opts = dict((x, y) for x, y in six.iteritems(self.minion_opts))
+        patched_opts.update(self.MOCKED_OPTS)
+        patched_opts['file_cache_dedup'] = True
+        for saltenv in SALTENVS:
+            path = os.path.join(self.FS_ROOT, saltenv, 'same.txt')
+            with salt.utils.files.fopen(path, 'w') as fp_:
+                fp_.write('The same content in every saltenv')
+
+        with patch.dict(fileclient.__opts__, patched_opts):
+            client = fileclient.get_file_client(fileclient.__opts__, pillar=False)
+            base_loc = client.cache_file('salt://same.txt', 'base')
+
+            send = client.channel.send
+            with patch.object(client.channel, 'send',
+                              MagicMock(side_effect=send)) as send_mock:
+                dev_loc = client.cache_file('salt://same.txt', 'dev')
+            self.assertFalse(
+                [x for x in send_mock.call_args_list
+                 if x[0][0]['cmd'] == '_serve_file'])
+            self.assertEqual(
+                dev_loc,
+                os.path.join(fileclient.__opts__['cachedir'],
+                             'files', 'dev', 'same.txt'))
+            self.assertEqual(os.path.realpath(base_loc),
+                             os.path.realpath(dev_loc))
+            with salt.utils.files.fopen(dev_loc) as fp_:
+                self.assertEqual(fp_.read(), 'The same content in every saltenv')
+
+    @skipIf(salt.utils.platform.is_windows(), 'The file store uses symlinks')
+    def test_cache_file_dedup_empty(self):
+        '''
+        Ensure that a file emptied on the master does not empty the file
+        store entry shared with the other saltenvs
+        '''
+        patched_opts = dict((x, y) for x, y in six.iteritems(self.minion_opts))
+        patched_opts.update(self.MOCKED_OPTS)
+        patched_opts['file_cache_dedup'] = True
+        for saltenv in SALTENVS:
+            path = os.path.join(self.FS_ROOT, saltenv, 'shared.txt')
+            with salt.utils.files.fopen(path, 'w') as fp_:
+                fp_.write('The same content in every saltenv')
+
+        with patch.dict(fileclient.__opts__, patched_opts):
+            client = fileclient.get_file_client(fileclient.__opts__, pillar=False)
+            client.cache_file('salt://shared.txt', 'base')
+            dev_loc = client.cache_file('salt://shared.txt', 'dev')
+
+            with salt.utils.files.fopen(os.path.join(self.FS_ROOT, 'base', 'shared.txt'), 'w'):
+                pass
+            base_loc = client.cache_file('salt://shared.txt', 'base')
+            with salt.utils.files.fopen(base_loc) as fp_:
+                self.assertEqual(fp_.read(), '')
+            with salt.utils.files.fopen(dev_loc) as fp_:
+                self.assertEqual(fp_.read(), 'The same content in every saltenv')
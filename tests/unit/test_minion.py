@@ -15,6 +15,7 @@ from tests.support.mixins import AdaptedConfigurationTestCaseMixin
 from tests.support.helpers import skip_if_not_root
 # Import salt libs
 import salt.minion
+import salt.utils.platform
 import salt.utils.event as event
 from salt.exceptions import SaltSystemExit, SaltMasterUnresolvableError
 import salt.syspaths
@@ -383,6 +384,38 @@ class MinionTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
             self.assertIn('ps', minion.opts['beacons'])
             self.assertEqual(minion.opts['beacons']['ps'], bdata)
 
+    @skipIf(salt.utils.platform.is_windows(), 'The request broker is not available on Windows')
+    def test_setup_request_broker(self):
+        '''
+        Tests that the request broker is only started when enabled along with
+        multiprocessing, and closed with the minion
+        '''
+        with patch('salt.minion.Minion.ctx', MagicMock(return_value={})), \
+                patch('salt.transport.broker.RequestBroker') as broker:
+            mock_opts = self.get_config('minion', from_scratch=True)
+            io_loop = tornado.ioloop.IOLoop()
+            io_loop.make_current()
+            self.addCleanup(io_loop.close)
+
+            for opts in ({'minion_request_broker': False, 'multiprocessing': True},
+                         {'minion_request_broker': True, 'multiprocessing': False}):
+                minion = salt.minion.Minion(dict(mock_opts, **opts), io_loop=io_loop)
+                minion.setup_request_broker()
+                self.assertIsNone(minion.request_broker)
+            self.assertFalse(broker.called)
+
+            opts = dict(mock_opts, minion_request_broker=True, multiprocessing=True)
+            minion = salt.minion.Minion(opts, io_loop=io_loop)
+            minion.setup_request_broker()
+            minion.setup_request_broker()
+            broker.assert_called_once_with(opts, io_loop=io_loop)
+            broker.return_value.start.assert_called_once_with()
+
+            minion._running = True
+            minion.destroy()
+            broker.return_value.close.assert_called_once_with()
+            self.assertIsNone(minion.request_broker)
+
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 class MinionAsyncTestCase(TestCase, AdaptedConfigurationTestCaseMixin, tornado.testing.AsyncTestCase):
@@ -13,6 +13,7 @@ import time
 import errno
 import threading
 import datetime
+import io
 
 # Import Salt Testing libs
 from tests.support.unit import skipIf, TestCase
@@ -164,6 +165,81 @@ class PayloadTestCase(TestCase):
         odata = payload.loads(sdata)
         self.assertTrue('recursion' in odata['data'].lower())
 
+    def test_load_iter(self):
+        '''
+        Test the messages of a file are loaded one by one, in small reads
+        '''
+        payload = salt.payload.Serial('msgpack')
+        dtvalue = datetime.datetime(2001, 2, 3, 4, 5, 6, 7)
+        msgs = [{'date': dtvalue}, ['x' * 2048], {'jid': '20191010101010101010'}]
+        sdata = b''.join(payload.dumps(msg, use_bin_type=True) for msg in msgs)
+        fn_ = io.BytesIO(sdata)
+        self.assertEqual(list(payload.load_iter(fn_, read_size=16)), msgs)
+        self.assertTrue(fn_.closed)
+        self.assertEqual(list(payload.load_iter(io.BytesIO(b''))), [])
+
+    @skipIf(not six.PY3, 'Strings are only decoded on Python 3')
+    def test_load_iter_binary(self):
+        '''
+        Test messages holding binary data are loaded like load does, without
+        stopping the messages after them from being decoded
+        '''
+        payload = salt.payload.Serial('msgpack')
+        binary = payload.dumps({'data': b'\xff\xfe'})
+        sdata = payload.dumps({'a': 'b'}) + binary + payload.dumps({'c': 'd'})
+        self.assertEqual(list(payload.load_iter(io.BytesIO(sdata), read_size=4)),
+                         [{'a': 'b'}, payload.load(io.BytesIO(binary)), {'c': 'd'}])
+
+    def test_nested_immutable_dump_load(self):
+        '''
+        Test frozen nested structures are serialized like the structures they
+        wrap
+        '''
+        payload = salt.payload.Serial('msgpack')
+        idata = {'dict': {'list': [{'key': 'value'}, [1, 2]], 'set': {'red'}}}
+        sdata = payload.dumps(immutabletypes.freeze(idata))
+        self.assertEqual(sdata, payload.dumps(idata))
+        self.assertEqual(payload.loads(sdata),
+                         {'dict': {'list': [{'key': 'value'}, [1, 2]], 'set': ['red']}})
+
+    def test_packer_reused(self):
+        '''
+        Test the Packer of the thread is reused, and dropped after failing or
+        serializing a large message
+        '''
+        payload = salt.payload.Serial('msgpack')
+        payload.dumps({'foo': 'bar'})
+        packer = salt.payload._PACKERS.packers[False]
+        self.assertEqual(payload.loads(payload.dumps({'foo': 'baz'})), {'foo': 'baz'})
+        self.assertIs(salt.payload._PACKERS.packers[False], packer)
+
+        with self.assertRaises(TypeError):
+            payload.dumps({'foo': object()})
+        self.assertNotIn(False, salt.payload._PACKERS.packers)
+        self.assertEqual(payload.loads(payload.dumps({'foo': 'bar'})), {'foo': 'bar'})
+
+        packer = salt.payload._PACKERS.packers[False]
+        payload.dumps('x' * (salt.payload._PACKER_MAX_BUFFER_SIZE + 1))
+        self.assertIsNot(salt.payload._PACKERS.packers.get(False), packer)
+
+    def test_packer_per_thread(self):
+        '''
+        Test every thread serializes with its own Packer
+        '''
+        payload = salt.payload.Serial('msgpack')
+        payload.dumps({'foo': 'bar'})
+        packers = []
+
+        def dumps():
+            packers.append(payload.loads(payload.dumps({'foo': 'bar'})))
+            packers.append(salt.payload._PACKERS.packers[False])
+
+        thread = threading.Thread(target=dumps)
+        thread.start()
+        thread.join()
+        self.assertEqual(packers[0], {'foo': 'bar'})
+        self.assertIsNot(packers[1], salt.payload._PACKERS.packers[False])
+
 
 class SREQTestCase(TestCase):
     port = 8845  # TODO: dynamically assign a port?
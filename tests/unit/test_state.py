@@ -129,6 +129,42 @@ class StateCompilerTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
             run_num = ret['test_|-step_one_|-step_one_|-succeed_with_changes']['__run_num__']
             self.assertEqual(run_num, 0)
 
+    def test_stream_results(self):
+        '''
+        Test that the state results are sent to the master in batches when the
+        minion asks for it, and that streaming stops if the master does not
+        store a batch
+        '''
+        jid = '20191010101010101010'
+        high_data = dict(
+            ('step_{0}'.format(idx),
+             {'test': ['succeed_without_changes', {'order': 10000 + idx}],
+              '__env__': 'base',
+              '__sls__': 'test.stream'})
+            for idx in range(3))
+        minion_opts = self.get_temp_config('minion')
+        minion_opts['state_return_batch_size'] = 2
+
+        for stored, sent, streamed in ((True, 2, 3), (False, 1, 0)):
+            channel = MagicMock()
+            channel.send.return_value = stored
+            # The context is shared with the other jobs of the minion
+            context = {'state_streams': {jid: {}, '20191010101010101011': {}}}
+            with patch('salt.state.State._gather_pillar'), \
+                    patch('salt.crypt.SAuth'), \
+                    patch('salt.transport.client.ReqChannel.factory',
+                          MagicMock(return_value=channel)):
+                state_obj = salt.state.State(minion_opts, jid=jid, context=context)
+                ret = state_obj.call_high(high_data)
+            self.assertEqual(len(ret), 3)
+            self.assertEqual(channel.send.call_count, sent)
+            load = channel.send.call_args_list[0][0][0]
+            self.assertEqual(load['cmd'], '_return_partial')
+            self.assertEqual(load['seq'], 0)
+            self.assertEqual(len(load['return']), 2)
+            self.assertEqual(len(context['state_streams'][jid]['tags']), streamed)
+            self.assertEqual(context['state_streams']['20191010101010101011'], {})
+
 
 class HighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
     def setUp(self):
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the master side of the minion authentication
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import os
+import shutil
+import tempfile
+
+# Import Salt libs
+import salt.config
+import salt.crypt
+import salt.transport.mixins.auth
+import salt.utils.files
+import salt.utils.platform
+
+# Import Salt Testing libs
+from tests.support.runtests import RUNTIME_VARS
+from tests.support.mock import MagicMock, patch
+from tests.support.unit import TestCase, skipIf
+
+
+class AuthServer(salt.transport.mixins.auth.AESReqServerMixin):
+    '''
+    The master side of the authentication, without a transport
+    '''
+    def __init__(self, opts):
+        self.opts = opts
+
+
+@skipIf(salt.utils.platform.is_windows(), 'The auth slots are shared by forking')
+class AESReqServerMixinTest(TestCase):
+    '''
+    Test authenticating minions
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        cls.pki_dir = os.path.join(cls.tmpdir, 'pki')
+        for subdir in ('minions', 'minions_pre', 'minions_rejected', 'minions_denied'):
+            os.makedirs(os.path.join(cls.pki_dir, subdir))
+        salt.crypt.gen_keys(cls.pki_dir, 'master', 2048)
+        for name in ('minion', 'other'):
+            salt.crypt.gen_keys(cls.tmpdir, name, 2048)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        opts = salt.config.master_config(None)
+        opts.update({'pki_dir': self.pki_dir,
+                     'cachedir': os.path.join(self.tmpdir, 'cache'),
+                     'sock_dir': os.path.join(self.tmpdir, 'sock'),
+                     'auth_events': False,
+                     'master_stats': True})
+        self.server = AuthServer(opts)
+        self.server.pre_fork(None)
+        with patch('salt.utils.event.get_master_event', MagicMock()):
+            self.server.post_fork(None, None)
+        self.accepted = os.path.join(self.pki_dir, 'minions', 'minion')
+        shutil.copy(os.path.join(self.tmpdir, 'minion.pub'), self.accepted)
+
+    def tearDown(self):
+        os.remove(self.accepted)
+        del self.server
+        del self.accepted
+
+    def _load(self, name='minion'):
+        with salt.utils.files.fopen(os.path.join(self.tmpdir, name + '.pub')) as fp_:
+            return {'cmd': '_auth', 'id': 'minion', 'pub': fp_.read(), 'auth_busy': True}
+
+    def test_auth_key_cache(self):
+        get_rsa_pub_key_str = MagicMock(side_effect=salt.crypt.get_rsa_pub_key_str)
+        private_encrypt = MagicMock(side_effect=salt.crypt.private_encrypt)
+        with patch('salt.crypt.get_rsa_pub_key_str', get_rsa_pub_key_str), \
+                patch('salt.crypt.private_encrypt', private_encrypt):
+            first = self.server._auth(self._load())
+            second = self.server._auth(self._load())
+        self.assertEqual(first['enc'], 'pub')
+        self.assertEqual(second['enc'], 'pub')
+        self.assertEqual(first['sig'], second['sig'])
+        # The key of the minion is loaded, and the AES key signed, only once
+        self.assertEqual(get_rsa_pub_key_str.call_count, 1)
+        self.assertEqual(private_encrypt.call_count, 1)
+        self.assertEqual(self.server._auth_stats['key_cache_hits'], 1)
+        self.assertEqual(self.server._auth_stats['runs'], 2)
+
+        # The key is read again once it changed
+        shutil.copy(os.path.join(self.tmpdir, 'other.pub'), self.accepted)
+        os.utime(self.accepted, (1, 1))
+        self.assertEqual(self.server._auth(self._load())['load'], {'ret': False})
+        self.assertEqual(self.server._auth(self._load('other'))['enc'], 'pub')
+
+    def test_auth_workers(self):
+        self.server.opts['auth_workers'] = 1
+        self.server.pre_fork(None)
+        # Another worker is authenticating a minion
+        self.server._auth_slots[0] = os.getppid()
+        self.assertEqual(self.server._auth(self._load()), {'enc': 'clear', 'load': {'ret': 'busy'}})
+        self.assertEqual(self.server._auth_stats['busy'], 1)
+        self.assertEqual(self.server._auth_stats['in_progress'], 1)
+
+        # The older minions are not deferred
+        load = self._load()
+        del load['auth_busy']
+        self.assertEqual(self.server._auth(load)['enc'], 'pub')
+        self.assertEqual(self.server._auth_stats['busy'], 1)
+        self.assertEqual(self.server._auth_slots[0], os.getppid())
+
+        # The worker died while authenticating a minion
+        with patch('salt.utils.process.os_is_running', MagicMock(return_value=False)):
+            self.assertEqual(self.server._auth(self._load())['enc'], 'pub')
+        self.assertEqual(list(self.server._auth_slots), [0])
+
+    def test_post_auth_stats(self):
+        self.server._auth(self._load())
+        self.server.event.fire_event.assert_not_called()
+        self.server._auth_stat_clock -= self.server.opts['master_stats_event_iter'] + 1
+        self.server._auth(self._load())
+        data, tag = self.server.event.fire_event.call_args[0]
+        self.assertEqual(tag, 'salt/stats/auth')
+        self.assertEqual(data['stats']['_auth']['runs'], 2)
+        self.assertEqual(self.server._auth_stats['runs'], 0)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the minion request broker
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import os
+import shutil
+import tempfile
+
+import tornado.gen
+import tornado.testing
+
+# Import Salt libs
+import salt.config
+import salt.fileclient
+import salt.transport.broker
+import salt.transport.client
+import salt.utils.platform
+from salt.exceptions import SaltReqTimeoutError
+
+# Import Salt Testing libs
+from tests.support.runtests import RUNTIME_VARS
+from tests.support.mock import MagicMock, NonCallableMagicMock, patch
+from tests.support.unit import TestCase, skipIf
+
+
+class FakeChannel(object):
+    '''
+    A channel to the master recording the requests it is sent
+    '''
+    def __init__(self):
+        self.requests = []
+        self.closed = False
+
+    @tornado.gen.coroutine
+    def send(self, load, tries=3, timeout=60, raw=False):
+        self.requests.append(('send', load, tries, timeout, raw))
+        if load.get('cmd') == 'timeout':
+            raise SaltReqTimeoutError('Message timed out')
+        raise tornado.gen.Return({'id': load.get('id'), 'data': b'\x00\xff'})
+
+    @tornado.gen.coroutine
+    def crypted_transfer_decode_dictentry(self, load, dictkey=None, tries=3, timeout=60):
+        self.requests.append(('crypted', load, dictkey, tries, timeout))
+        raise tornado.gen.Return({'pillar': True})
+
+    def close(self):
+        self.closed = True
+
+
+class RequestBrokerTest(TestCase):
+    '''
+    Test which channels use the broker
+    '''
+    def setUp(self):
+        self.opts = {'pki_dir': '/pki', 'id': 'minion', 'master': 'salt',
+                     'master_uri': 'tcp://127.0.0.1:4506', 'sock_dir': '/sock',
+                     'minion_request_broker': True}
+        patcher = patch.dict(salt.transport.broker._BROKERS, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_broker(self):
+        path = salt.transport.broker.socket_path(self.opts)
+        self.assertTrue(path.startswith(os.path.join('/sock', 'minion_req_')))
+        self.assertIsNone(salt.transport.broker.get_broker(self.opts))
+
+        salt.transport.broker._BROKERS[('/pki', 'minion', 'tcp://127.0.0.1:4506')] = (os.getpid(), path)
+        # The minion process connects to the master itself
+        self.assertIsNone(salt.transport.broker.get_broker(self.opts))
+
+        salt.transport.broker._BROKERS[('/pki', 'minion', 'tcp://127.0.0.1:4506')] = (os.getpid() + 1, path)
+        self.assertEqual(salt.transport.broker.get_broker(self.opts), path)
+        self.assertIsNone(salt.transport.broker.get_broker(self.opts, crypt='clear'))
+        self.assertIsNone(salt.transport.broker.get_broker(self.opts, master_uri='tcp://127.0.0.2:4506'))
+        self.assertIsNone(salt.transport.broker.get_broker(dict(self.opts, master_uri='tcp://127.0.0.2:4506')))
+
+        channel = salt.transport.client.AsyncReqChannel.factory(self.opts)
+        self.assertIsInstance(channel, salt.transport.broker.AsyncBrokerReqChannel)
+        self.assertEqual(channel.socket_path, path)
+        with patch('salt.transport.zeromq.AsyncZeroMQReqChannel', MagicMock()) as zmq_channel:
+            salt.transport.client.AsyncReqChannel.factory(self.opts, broker=False)
+            zmq_channel.assert_called_once_with(self.opts)
+            # The requests to an explicit master are sent to it directly
+            salt.transport.client.AsyncReqChannel.factory(self.opts, master_uri='tcp://127.0.0.2:4506')
+            zmq_channel.assert_called_with(self.opts, master_uri='tcp://127.0.0.2:4506')
+
+    def test_master_tops_token(self):
+        '''
+        Test that the requests sent through the broker are signed with the
+        key of the minion
+        '''
+        opts = salt.config.minion_config(None)
+        opts.update(self.opts)
+        salt.transport.broker._BROKERS[('/pki', 'minion', 'tcp://127.0.0.1:4506')] = (
+            os.getpid() + 1, salt.transport.broker.socket_path(opts))
+        with patch('salt.crypt.AsyncAuth', MagicMock(return_value=NonCallableMagicMock())) as auth, \
+                patch.object(salt.transport.broker.AsyncBrokerReqChannel, '_request',
+                             MagicMock(return_value={})) as request:
+            client = salt.fileclient.RemoteClient(opts)
+            self.assertIsInstance(client.channel.asynchronous, salt.transport.broker.AsyncBrokerReqChannel)
+            self.assertEqual(client.master_tops(), {})
+        load = request.call_args[0][0]['load']
+        self.assertEqual(load['cmd'], '_ext_nodes')
+        self.assertEqual(load['tok'], auth.return_value.gen_token.return_value)
+        auth.return_value.gen_token.assert_called_once_with(b'salt')
+
+    def test_advertise(self):
+        broker = salt.transport.broker.RequestBroker(self.opts, io_loop=MagicMock())
+        broker.advertise()
+        self.assertEqual(salt.transport.broker._BROKERS,
+                         {('/pki', 'minion', 'tcp://127.0.0.1:4506'): (os.getpid(), broker.socket_path)})
+        broker.advertise(dict(self.opts, master_uri='tcp://127.0.0.2:4506'))
+        self.assertEqual(salt.transport.broker._BROKERS,
+                         {('/pki', 'minion', 'tcp://127.0.0.2:4506'): (os.getpid(), broker.socket_path)})
+        broker.close()
+        self.assertEqual(salt.transport.broker._BROKERS, {})
+
+
+@skipIf(salt.utils.platform.is_windows(), 'Windows does not support Posix IPC')
+class RequestBrokerIPCTest(tornado.testing.AsyncTestCase):
+    '''
+    Test requests sent through the broker
+    '''
+    def setUp(self):
+        super(RequestBrokerIPCTest, self).setUp()
+        self.tmpdir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.opts = salt.config.minion_config(None)
+        self.opts.update({'id': 'minion', 'master_uri': 'tcp://127.0.0.1:4506',
+                          'sock_dir': self.tmpdir, 'minion_request_broker': True})
+        self.channel = FakeChannel()
+        patcher = patch.object(salt.transport.client.AsyncReqChannel, 'factory',
+                               MagicMock(return_value=self.channel))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.broker = salt.transport.broker.RequestBroker(self.opts, io_loop=self.io_loop)
+        self.broker.start()
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.broker.close()
+        # Let the clients see their connection closed
+        self.io_loop.run_sync(lambda: tornado.gen.sleep(0.01))
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        super(RequestBrokerIPCTest, self).tearDown()
+
+    def _client(self, socket_path=None):
+        channel = salt.transport.broker.AsyncBrokerReqChannel(
+            self.opts, socket_path or self.broker.socket_path, io_loop=self.io_loop)
+        self.clients.append(channel)
+        return channel
+
+    @tornado.testing.gen_test
+    def test_send(self):
+        client = self._client()
+        rets = yield [client.send({'cmd': '_return', 'id': idx}, tries=1, timeout=5, raw=True)
+                      for idx in range(3)]
+        self.assertEqual(rets, [{'id': idx, 'data': b'\x00\xff'} for idx in range(3)])
+        self.assertEqual(sorted(req[1]['id'] for req in self.channel.requests), [0, 1, 2])
+        self.assertEqual(self.channel.requests[0][2:], (1, 5, True))
+        # The channel to the master is kept open for the next requests
+        salt.transport.client.AsyncReqChannel.factory.assert_called_once_with(
+            self.opts, io_loop=self.io_loop, broker=False)
+        self.assertFalse(self.channel.closed)
+
+    @tornado.testing.gen_test
+    def test_crypted_transfer_decode_dictentry(self):
+        ret = yield self._client().crypted_transfer_decode_dictentry(
+            {'cmd': '_pillar'}, dictkey='pillar', tries=2, timeout=5)
+        self.assertEqual(ret, {'pillar': True})
+        self.assertEqual(self.channel.requests, [('crypted', {'cmd': '_pillar'}, 'pillar', 2, 5)])
+
+    @tornado.testing.gen_test
+    def test_timeout(self):
+        with self.assertRaises(SaltReqTimeoutError):
+            yield self._client().send({'cmd': 'timeout'}, tries=1, timeout=5)
+
+    @tornado.testing.gen_test
+    def test_direct_fallback(self):
+        client = self._client(os.path.join(self.tmpdir, 'missing.ipc'))
+        ret = yield client.send({'cmd': '_return', 'id': 'direct'}, tries=1, timeout=5)
+        self.assertEqual(ret['id'], 'direct')
+        salt.transport.client.AsyncReqChannel.factory.assert_called_once_with(
+            self.opts, broker=False, io_loop=self.io_loop)
+        self.assertTrue(self.channel.closed)
@@ -20,7 +20,9 @@ import salt.transport.server
 import salt.transport.client
 import salt.exceptions
 from salt.ext.six.moves import range
-from salt.transport.tcp import SaltMessageClientPool
+import salt.transport.frame
+import salt.transport.tcp
+from salt.transport.tcp import SaltMessageClient, SaltMessageClientPool, SaltMessageServer
 
 # Import Salt Testing libs
 from tests.support.unit import TestCase, skipIf
@@ -310,3 +312,97 @@ class SaltMessageClientPoolTest(AsyncTestCase):
 
         with self.assertRaises(tornado.ioloop.TimeoutError):
             test_connect(self)
+
+
+class SaltMessageClientWindowTest(AsyncTestCase):
+    '''
+    Test the number of messages waiting for their reply at once
+    '''
+    def setUp(self):
+        super(SaltMessageClientWindowTest, self).setUp()
+        self.requests = []
+        self.server = SaltMessageServer(self._handle_message)
+        port = get_unused_localhost_port()
+        self.server.listen(port, address='127.0.0.1')
+        self.client = SaltMessageClient(dict(salt.config.DEFAULT_MINION_OPTS),
+                                        '127.0.0.1', port,
+                                        io_loop=self.io_loop, window=2)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.stop()
+        super(SaltMessageClientWindowTest, self).tearDown()
+
+    def _handle_message(self, stream, header, body):
+        self.requests.append((stream, header, body))
+
+    def _reply(self, idx):
+        stream, header, body = self.requests[idx]
+        stream.write(salt.transport.frame.frame_msg(body, header={'mid': header['mid']}))
+
+    @tornado.gen.coroutine
+    def _received(self, count):
+        while len(self.requests) < count:
+            yield tornado.gen.sleep(0.01)
+        # Leave the time to send more than expected
+        yield tornado.gen.sleep(0.05)
+        self.assertEqual(len(self.requests), count)
+
+    @gen_test
+    def test_window(self):
+        futures = [self.client.send({'idx': idx}, timeout=10) for idx in range(4)]
+        yield self._received(2)
+        self.assertEqual(len(self.client.in_flight), 2)
+        self._reply(1)
+        self.assertEqual((yield futures[1]), {'idx': 1})
+        yield self._received(3)
+        for idx in (0, 2):
+            self._reply(idx)
+        yield self._received(4)
+        self._reply(3)
+        rets = yield futures
+        self.assertEqual(rets, [{'idx': idx} for idx in range(4)])
+        self.assertEqual(self.client.in_flight, set())
+
+    @gen_test
+    def test_window_timeout(self):
+        futures = [self.client.send({'idx': idx}, timeout=timeout)
+                   for idx, timeout in enumerate((0.1, 10, 0.1, 10))]
+        yield self._received(2)
+        # The message which timed out waiting for its reply lets the next one
+        # go out, the one which timed out in the send queue is not sent
+        with self.assertRaises(salt.exceptions.SaltReqTimeoutError):
+            yield futures[0]
+        yield self._received(3)
+        self.assertEqual([body['idx'] for _, _, body in self.requests], [0, 1, 3])
+        with self.assertRaises(salt.exceptions.SaltReqTimeoutError):
+            yield futures[2]
+        for idx in (1, 2):
+            self._reply(idx)
+        self.assertEqual((yield futures[1]), {'idx': 1})
+        self.assertEqual((yield futures[3]), {'idx': 3})
+
+
+class SendManyTest(AsyncTestCase):
+    '''
+    Test sending several requests at once over a request channel
+    '''
+    @gen_test
+    def test_send_many(self):
+        sent = []
+        waiting = []
+
+        @tornado.gen.coroutine
+        def send(load, tries=3, timeout=60, raw=False):
+            sent.append(load)
+            waiting.append(load)
+            self.assertLessEqual(len(waiting), 2)
+            yield tornado.gen.sleep(0.01 * (5 - load))
+            waiting.remove(load)
+            raise tornado.gen.Return(load * 10)
+
+        channel = MagicMock(opts={'tcp_req_window': 2}, io_loop=self.io_loop, send=send)
+        rets = yield salt.transport.tcp.AsyncTCPReqChannel.send_many(channel, range(5))
+        self.assertEqual(rets, [0, 10, 20, 30, 40])
+        self.assertEqual(sorted(sent), list(range(5)))
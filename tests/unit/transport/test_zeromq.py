@@ -19,6 +19,7 @@ except ImportError:
     from distro import linux_distribution
 
 # Import 3rd-party libs
+import zmq
 import zmq.eventloop.ioloop
 # support pyzmq 13.0.x, TODO: remove once we force people to 14.0.x
 if not hasattr(zmq.eventloop.ioloop, 'ZMQIOLoop'):
@@ -43,7 +44,7 @@ from tests.support.runtests import RUNTIME_VARS
 from tests.support.unit import TestCase, skipIf
 from tests.support.helpers import flaky, get_unused_localhost_port
 from tests.support.mixins import AdaptedConfigurationTestCaseMixin
-from tests.support.mock import MagicMock, patch
+from tests.support.mock import MagicMock, call, patch
 from tests.unit.transport.mixins import PubChannelMixin, ReqChannelMixin
 
 ON_SUSE = False
@@ -582,3 +583,201 @@ class PubServerChannel(TestCase, AdaptedConfigurationTestCaseMixin):
         gather.join()
         server_channel.pub_close()
         assert len(results) == send_num, (len(results), set(expect).difference(results))
+
+
+class ZMQPubTopicRoutingTest(TestCase, AdaptedConfigurationTestCaseMixin):
+    '''
+    Test the routing of publishes to the targeted minions
+    '''
+    def setUp(self):
+        salt.master.SMaster.secrets['aes'] = {
+            'secret': multiprocessing.Array(
+                ctypes.c_char,
+                six.b(salt.crypt.Crypticle.generate_key_string()),
+            ),
+        }
+        self.opts = self.get_temp_config(
+            'master',
+            **{'transport': 'zeromq',
+               'sign_pub_messages': False,
+               'zmq_filtering': True,
+               'zmq_filtering_all_targets': True})
+        self.pub_sock = MagicMock()
+        patcher = patch.object(salt.transport.zeromq.ZeroMQPubServerChannel,
+                               'pub_sock', self.pub_sock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _publish(self, load, minions=None, match=None):
+        '''
+        Publish load and return the topics it was sent to
+        '''
+        server_channel = salt.transport.zeromq.ZeroMQPubServerChannel(self.opts)
+        server_channel.ckminions = MagicMock()
+        server_channel.ckminions.check_minions.return_value = {
+            'minions': match or [], 'missing': []}
+        server_channel.publish(load, minions=minions)
+        int_payload = server_channel.serial.loads(
+            self.pub_sock.send_multipart.call_args[0][0][0])
+        return int_payload.get('topic_lst'), server_channel.ckminions.check_minions
+
+    def test_known_minions(self):
+        '''
+        The minions matched by the caller are used as topics
+        '''
+        topics, check_minions = self._publish(
+            {'tgt_type': 'grain', 'tgt': 'os:Fedora', 'jid': '1'},
+            minions=['minion1', 'minion2'])
+        self.assertEqual(topics, ['minion1', 'minion2'])
+        check_minions.assert_not_called()
+
+    def test_check_minions(self):
+        '''
+        The target is matched on the master when the minions are not known
+        '''
+        topics, check_minions = self._publish(
+            {'tgt_type': 'compound', 'tgt': 'G@os|Fedora', 'jid': '1',
+             'delimiter': '|'},
+            match=['minion1'])
+        self.assertEqual(topics, ['minion1'])
+        check_minions.assert_called_once_with(
+            'G@os|Fedora', tgt_type='compound', delimiter='|')
+
+    def test_broadcast_fallback(self):
+        '''
+        A target matching no minion on the master is broadcast
+        '''
+        topics, _ = self._publish(
+            {'tgt_type': 'pillar', 'tgt': 'role:web', 'jid': '1'})
+        self.assertIsNone(topics)
+
+    def test_disabled(self):
+        '''
+        Only glob, pcre and list targets are routed by default
+        '''
+        self.opts['zmq_filtering_all_targets'] = False
+        topics, check_minions = self._publish(
+            {'tgt_type': 'grain', 'tgt': 'os:Fedora', 'jid': '1'},
+            minions=['minion1'])
+        self.assertIsNone(topics)
+        topics, check_minions = self._publish(
+            {'tgt_type': 'glob', 'tgt': 'minion*', 'jid': '1'},
+            match=['minion1'])
+        self.assertEqual(topics, ['minion1'])
+
+
+class ZMQPubShardTest(TestCase, AdaptedConfigurationTestCaseMixin):
+    '''
+    Test the publisher shards
+    '''
+    def setUp(self):
+        salt.master.SMaster.secrets['aes'] = {
+            'secret': multiprocessing.Array(
+                ctypes.c_char,
+                six.b(salt.crypt.Crypticle.generate_key_string()),
+            ),
+        }
+        self.opts = self.get_temp_config(
+            'master',
+            **{'transport': 'zeromq',
+               'sign_pub_messages': False,
+               'publish_shards': 3})
+
+    def test_publish_shard(self):
+        '''
+        Minions are spread over the shards by id
+        '''
+        shards = set()
+        for idx in range(100):
+            shard = salt.transport.publish_shard(self.opts, 'minion{0}'.format(idx))
+            self.assertEqual(
+                shard,
+                salt.transport.publish_shard(self.opts, 'minion{0}'.format(idx)))
+            shards.add(shard)
+        self.assertEqual(shards, {0, 1, 2})
+        self.opts['publish_shards'] = 1
+        self.assertEqual(salt.transport.publish_shard(self.opts, 'minion1'), 0)
+
+    def test_publish_shard_port(self):
+        '''
+        The shards after the first one listen on the ports from
+        publish_shard_port
+        '''
+        self.opts.update({'publish_port': 4505, 'publish_shard_port': 4530,
+                          'tcp_master_publish_pull': 4514,
+                          'tcp_master_publish_pull_shard': 4540,
+                          'ipc_mode': 'tcp'})
+        self.assertEqual(
+            [salt.transport.publish_shard_port(self.opts, shard) for shard in range(3)],
+            [4505, 4530, 4531])
+        self.assertEqual(
+            [salt.transport.publish_pull_path(self.opts, shard) for shard in range(3)],
+            [4514, 4540, 4541])
+
+    def test_publish_to_all_shards(self):
+        '''
+        Every publish is sent to the puller of every shard
+        '''
+        context = MagicMock()
+        context.socket.side_effect = lambda *args: MagicMock()
+        with patch('zmq.Context.instance', MagicMock(return_value=context)):
+            server_channel = salt.transport.zeromq.ZeroMQPubServerChannel(self.opts)
+            server_channel.pub_connect()
+            try:
+                socks = server_channel.pub_socks
+                self.assertEqual(len(socks), 3)
+                self.assertEqual(
+                    [sock.connect.call_args[0][0] for sock in socks],
+                    ['ipc://' + os.path.join(self.opts['sock_dir'], name)
+                     for name in ('publish_pull.ipc',
+                                  'publish_pull_1.ipc',
+                                  'publish_pull_2.ipc')])
+                server_channel.publish(
+                    {'tgt_type': 'glob', 'tgt': '*', 'jid': '1'})
+                for sock in socks:
+                    sock.send_multipart.assert_called_once()
+            finally:
+                server_channel.pub_close()
+        self.assertEqual(server_channel.pub_socks, [])
+
+
+class ZMQPubPayloadTest(TestCase, AdaptedConfigurationTestCaseMixin):
+    '''
+    Test the payloads handed to the publish daemon
+    '''
+    def setUp(self):
+        self.secret = multiprocessing.Array(
+            ctypes.c_char,
+            six.b(salt.crypt.Crypticle.generate_key_string()),
+        )
+        salt.master.SMaster.secrets['aes'] = {'secret': self.secret}
+        self.opts = self.get_temp_config(
+            'master',
+            **{'transport': 'zeromq',
+               'sign_pub_messages': False,
+               'zmq_filtering': True})
+        self.server_channel = salt.transport.zeromq.ZeroMQPubServerChannel(self.opts)
+
+    def test_crypticle_cached(self):
+        '''
+        The Crypticle is only rebuilt when the AES key is rotated
+        '''
+        crypticle = self.server_channel.crypticle
+        self.assertIs(self.server_channel.crypticle, crypticle)
+        self.secret.value = six.b(salt.crypt.Crypticle.generate_key_string())
+        self.assertIsNot(self.server_channel.crypticle, crypticle)
+        self.assertEqual(self.server_channel.crypticle.key_string, self.secret.value)
+
+    def test_payload_not_copied(self):
+        '''
+        The publish daemon sends the payload frame it received as is
+        '''
+        pub_sock = MagicMock()
+        header = zmq.Frame(self.server_channel.serial.dumps(
+            {'topic_lst': ['minion1', 'minion2']}))
+        payload = zmq.Frame(b'payload')
+        self.server_channel._publish_package(pub_sock, 'tcp://127.0.0.1:4505',
+                                             [header, payload])
+        self.assertEqual(
+            pub_sock.send.call_args_list[1::2],
+            [call(payload, copy=False)] * 2)
@@ -10,6 +10,7 @@
 # Import python libs
 from __future__ import absolute_import, unicode_literals, print_function
 import os
+import fnmatch
 import hashlib
 import time
 import shutil
@@ -325,3 +326,20 @@ class TestAsyncEventPublisher(AsyncTestCase):
         self.assertEqual(self.tag, 'evt1')
         self.data.pop('_stamp')  # drop the stamp
         self.assertEqual(self.data, {'data': 'foo1'})
+
+
+class TestTagMatcher(TestCase):
+    def test_match(self):
+        '''Test the matching patterns are returned in the order they were added'''
+        patterns = ['salt/minion/*/start', 'salt/auth', 'salt/job/*/ret/*', '*',
+                    'salt/[ab]*', 'salt/auth', 'salt/minion/?/start', '']
+        matcher = salt.utils.event.TagMatcher((pattern, idx) for idx, pattern in enumerate(patterns))
+        self.assertEqual(len(matcher), 8)
+        for tag in ('salt/minion/web1/start', 'salt/minion/a/start', 'salt/auth',
+                    'salt/job/20190101/ret/web1', 'salt/b', 'salt', '', 'other'):
+            self.assertEqual(
+                matcher.match(tag),
+                [idx for idx, pattern in enumerate(patterns) if fnmatch.fnmatch(tag, pattern)],
+                tag)
+        self.assertEqual(matcher.match('salt/auth'), [1, 3, 4, 5])
+        self.assertEqual(salt.utils.event.TagMatcher().match('salt/auth'), [])
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the ring buffer of the master events
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import os
+import shutil
+import tempfile
+
+# Import Salt libs
+import salt.payload
+import salt.utils.event
+import salt.utils.eventring
+import salt.utils.stringutils
+
+# Import Salt Testing libs
+from tests.support.runtests import RUNTIME_VARS
+from tests.support.mock import MagicMock, patch
+from tests.support.unit import TestCase
+
+
+class EventRingTest(TestCase):
+    '''
+    Test writing and reading the event ring
+    '''
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.opts = {'cachedir': self.cachedir,
+                     'event_ring_segments': 3,
+                     'event_ring_segment_size': 4096}
+        self.writer = salt.utils.eventring.EventRing(self.opts, writer=True)
+        self.reader = salt.utils.eventring.EventRing(self.opts)
+        self.serial = salt.payload.Serial('msgpack')
+
+    def tearDown(self):
+        self.writer.close()
+        self.reader.close()
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+        del self.cachedir
+        del self.opts
+        del self.writer
+        del self.reader
+        del self.serial
+
+    def _append(self, count, start=0):
+        return [self.writer.append(salt.utils.stringutils.to_bytes('tag/{0}\n\n'.format(idx)) +
+                                   self.serial.dumps({'pad': 'x' * 100}))
+                for idx in range(start, start + count)]
+
+    def test_read(self):
+        self.assertEqual(self.reader.read(0), [])
+        self.assertEqual(self.reader.last_seq(), 0)
+        self.assertEqual(self._append(20), list(range(1, 21)))
+        self.assertEqual(self.reader.last_seq(), 20)
+        events = self.reader.read(0)
+        self.assertEqual([seq for seq, _ in events], list(range(1, 21)))
+        self.assertEqual(events[0][1], b'tag/0\n\n' + self.serial.dumps({'pad': 'x' * 100}))
+        self.assertEqual([seq for seq, _ in self.reader.read(15, limit=3)], [16, 17, 18])
+        self.assertEqual([seq for seq, _ in self.reader.read(18)], [19, 20])
+        self.assertEqual(self.reader.read(20), [])
+
+    def test_wrap(self):
+        self._append(200)
+        events = self.reader.read(0, limit=500)
+        # Only the last segments are kept, the oldest events are skipped
+        self.assertEqual(events[-1][0], 200)
+        self.assertEqual([seq for seq, _ in events], list(range(events[0][0], 201)))
+        self.assertGreater(events[0][0], 100)
+        self.assertTrue(os.path.isfile(os.path.join(self.cachedir, 'event_ring', 'segment.2')))
+        # A reader following the writer goes from one segment to the next
+        for seq in range(200, 260, 10):
+            self._append(10)
+            self.assertEqual([item[0] for item in self.reader.read(seq)], list(range(seq + 1, seq + 11)))
+
+    def test_restart(self):
+        self._append(50)
+        self.writer.close()
+        self.writer = salt.utils.eventring.EventRing(self.opts, writer=True)
+        self.assertEqual(self._append(1), [51])
+        self.assertEqual([seq for seq, _ in self.reader.read(49)], [50, 51])
+
+        # The ring is made again with another size, the sequence numbers
+        # start over
+        self.writer.close()
+        self.opts['event_ring_segment_size'] = 8192
+        self.writer = salt.utils.eventring.EventRing(self.opts, writer=True)
+        self.assertEqual(self._append(1), [1])
+        self.assertEqual(self.reader.read(51), [])
+        self.assertEqual([seq for seq, _ in self.reader.read(51)], [1])
+
+    def test_large_event(self):
+        self.assertIsNone(self.writer.append(b'x' * 4096))
+        self.assertEqual(self._append(1), [1])
+
+    def test_iter_events(self):
+        self._append(5)
+        event = MagicMock()
+        event.get_event.side_effect = \
+            lambda **kwargs: None if kwargs.get('no_block') else self._append(1, start=5)
+        stream = self.reader.iter_events(since=3, event=event)
+        self.assertEqual([next(stream)[:2] for _ in range(3)], [(4, 'tag/3'), (5, 'tag/4'), (6, 'tag/5')])
+        self.assertEqual([call[1] for call in event.get_event.call_args_list],
+                         [{'full': True, 'no_block': True, 'auto_reconnect': True},
+                          {'full': True, 'no_block': True, 'auto_reconnect': True},
+                          {'wait': 5, 'full': True, 'auto_reconnect': True},
+                          {'full': True, 'no_block': True, 'auto_reconnect': True}])
+        # The events received on the bus while the ring has new events are
+        # discarded before reading the ring
+        self._append(2, start=6)
+        event.get_event.reset_mock()
+        event.get_event.side_effect = [{'tag': 'tag/6'}, {'tag': 'tag/7'}, None]
+        self.assertEqual([next(stream)[:2] for _ in range(2)], [(7, 'tag/6'), (8, 'tag/7')])
+        self.assertEqual(event.get_event.call_count, 3)
+        # Without a since, the stream starts with the next event
+        stream = self.reader.iter_events()
+        with patch('time.sleep', MagicMock(side_effect=lambda wait: self._append(1, start=8))):
+            self.assertEqual(next(stream)[:2], (9, 'tag/8'))
+
+    def test_get_event_ring(self):
+        self.assertIsNone(salt.utils.eventring.get_event_ring(dict(self.opts, event_ring_segments=0)))
+        self.assertIsInstance(salt.utils.eventring.get_event_ring(self.opts), salt.utils.eventring.EventRing)
+        self.assertIsNone(salt.utils.eventring.get_event_ring(dict(self.opts, cachedir=os.path.join(self.cachedir, 'missing'))))
+
+    def test_event_publisher(self):
+        publisher = salt.utils.event.EventPublisher(self.opts)
+        publisher.publisher = MagicMock()
+        publisher.ring = self.writer
+        package = b'salt/auth\n\n' + b'\x80'
+        self.assertEqual(publisher.handle_publish(package, None), package)
+        publisher.publisher.publish.assert_called_once_with(package)
+        self.assertEqual(self.reader.read(0), [(1, package)])
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for salt.utils.filestore
+'''
+
+# Import Python libs
+from __future__ import absolute_import, unicode_literals, print_function
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from tests.support.runtests import RUNTIME_VARS
+from tests.support.unit import TestCase, skipIf
+
+# Import salt libs
+import salt.utils.files
+import salt.utils.hashutils
+import salt.utils.platform
+from salt.utils.filestore import FileStore
+
+
+@skipIf(salt.utils.platform.is_windows(), 'The file store uses symlinks')
+class FileStoreTestCase(TestCase):
+    '''
+    Test the content-addressed file store
+    '''
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        self.store = FileStore(os.path.join(self.tmpdir, 'store'))
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write(content)
+        return path, salt.utils.hashutils.get_hash(path, 'sha256')
+
+    def test_add_and_link(self):
+        path, hsum = self._write('foo', 'foo content')
+        self.assertTrue(self.store.add(path, hsum, 'sha256'))
+        self.assertTrue(os.path.islink(path))
+        self.assertEqual(os.path.realpath(path),
+                         os.path.realpath(self.store.path(hsum, 'sha256')))
+
+        other = os.path.join(self.tmpdir, 'bar')
+        self.assertTrue(self.store.link(hsum, 'sha256', other))
+        with salt.utils.files.fopen(other) as fp_:
+            self.assertEqual(fp_.read(), 'foo content')
+        self.assertEqual(self.store.size(), len('foo content'))
+
+    def test_add_hash_mismatch(self):
+        path, _ = self._write('foo', 'foo content')
+        self.assertFalse(self.store.add(path, 'abcdef', 'sha256'))
+        self.assertFalse(os.path.islink(path))
+        self.assertFalse(self.store.link('abcdef', 'sha256', path))
+
+    def test_evict_least_recently_used(self):
+        self.store.max_size = 10
+        old, old_hsum = self._write('old', 'x' * 6)
+        self.store.add(old, old_hsum, 'sha256')
+        os.utime(self.store.path(old_hsum, 'sha256'), (1, 1))
+        new, new_hsum = self._write('new', 'y' * 6)
+        self.store.add(new, new_hsum, 'sha256')
+
+        self.assertFalse(os.path.exists(self.store.path(old_hsum, 'sha256')))
+        self.assertTrue(os.path.exists(self.store.path(new_hsum, 'sha256')))
+        # The evicted file is now missing, so it will be fetched again
+        self.assertFalse(os.path.isfile(old))
+        self.assertEqual(self.store.size(), 6)
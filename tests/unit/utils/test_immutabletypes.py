@@ -81,3 +81,11 @@ class ImmutableTypesTestCase(TestCase):
         with self.assertRaises(TypeError):
             flist = frozen[4]
             flist[0] = 5
+
+    def test_thaw(self):
+        data = {'list': [1, 2], 'set': {3}}
+        frozen = immutabletypes.freeze(data)
+        self.assertIs(immutabletypes.thaw(frozen), data)
+        self.assertIs(immutabletypes.thaw(frozen['list']), data['list'])
+        self.assertIs(immutabletypes.thaw(frozen['set']), data['set'])
+        self.assertIs(immutabletypes.thaw(data), data)
@@ -23,6 +23,7 @@ from tests.support.mock import NO_MOCK, NO_MOCK_REASON, patch, MagicMock, Mock
 # Import Salt libs
 import salt.config
 import salt.loader
+import salt.renderers.jinja as jinja_renderer
 from salt.exceptions import SaltRenderError
 
 from salt.ext import six
@@ -395,6 +396,134 @@ class TestGetTemplate(TestCase):
             self.assertEqual('Assunção' + os.linesep, out)
             self.assertEqual(fc.requests[0]['path'], 'salt://macro')
 
+    def test_bytecode_cache(self):
+        '''
+        A template and the templates it imports are only compiled once, the
+        compiled code is then loaded from the bytecode cache
+        '''
+        fc = MockFileClient()
+        filename = os.path.join(self.template_dir, 'hello_import')
+        opts = {'cachedir': self.tempdir, 'file_client': 'remote',
+                'file_roots': self.local_opts['file_roots'],
+                'pillar_roots': self.local_opts['pillar_roots']}
+        with patch.object(SaltCacheLoader, 'file_client', MagicMock(return_value=fc)):
+            with salt.utils.files.fopen(filename) as fp_:
+                tmplstr = salt.utils.stringutils.to_unicode(fp_.read())
+            out = render_jinja_tmpl(
+                tmplstr,
+                dict(opts=opts, saltenv='test', salt=self.local_salt),
+                tmplpath=filename)
+            self.assertEqual(out, 'Hey world !a b !' + os.linesep)
+            cache_dirs = os.listdir(os.path.join(self.tempdir, 'jinja'))
+            self.assertEqual(len(cache_dirs), 1)
+            # The template and the imported macro
+            self.assertEqual(
+                len(os.listdir(os.path.join(self.tempdir, 'jinja', cache_dirs[0]))),
+                2)
+
+            with patch('jinja2.Environment.compile',
+                       MagicMock(side_effect=AssertionError)):
+                out = render_jinja_tmpl(
+                    tmplstr,
+                    dict(opts=opts, saltenv='test', salt=self.local_salt),
+                    tmplpath=filename)
+            self.assertEqual(out, 'Hey world !a b !' + os.linesep)
+
+    def test_env_cache(self):
+        '''
+        The Jinja environment is reused between renders sharing an
+        environment cache, without leaking the context of previous renders
+        '''
+        fc = MockFileClient()
+        env_cache = {}
+        opts = dict(self.local_opts, jinja_bytecode_cache=False)
+        with patch.object(SaltCacheLoader, 'file_client', MagicMock(return_value=fc)):
+            out = render_jinja_tmpl(
+                '{{ a }}',
+                dict(opts=opts, saltenv='test', salt=self.local_salt,
+                     a='Hi', _jinja_env_cache=env_cache))
+            self.assertEqual(out, 'Hi')
+            self.assertEqual(len(env_cache), 1)
+            jinja_env = list(env_cache.values())[0][0]
+            self.assertNotIn('_jinja_env_cache', jinja_env.globals)
+
+            with patch('jinja2.Environment', MagicMock(side_effect=AssertionError)):
+                self.assertRaises(
+                    SaltRenderError,
+                    render_jinja_tmpl,
+                    '{{ a }}',
+                    dict(opts=opts, saltenv='test', salt=self.local_salt,
+                         _jinja_env_cache=env_cache))
+        self.assertEqual(len(env_cache), 1)
+
+    def test_import_cache(self):
+        '''
+        A template imported without context is only executed once per
+        session, as long as the globals it reads do not change
+        '''
+        filename = os.path.join(self.template_dir, 'counted_map')
+        with salt.utils.files.fopen(filename, 'w') as fp_:
+            fp_.write("{% set count = salt['test.count']() %}")
+        count = MagicMock(side_effect=[1, 2, 3])
+        local_salt = {'test.count': count}
+        fc = MockFileClient()
+        env_cache = {}
+        opts = dict(self.local_opts, jinja_bytecode_cache=False,
+                    jinja_import_cache=True)
+        tmplstr = "{% from 'counted_map' import count %}{{ count }}"
+        with patch.object(SaltCacheLoader, 'file_client', MagicMock(return_value=fc)):
+            for _ in range(2):
+                out = render_jinja_tmpl(
+                    tmplstr,
+                    dict(opts=opts, saltenv='test', salt=local_salt,
+                         _jinja_env_cache=env_cache))
+                self.assertEqual(out, '1')
+            self.assertEqual(count.call_count, 1)
+
+            # The imported template reads salt, a new value executes it again
+            out = render_jinja_tmpl(
+                tmplstr,
+                dict(opts=opts, saltenv='test', salt=dict(local_salt),
+                     _jinja_env_cache=env_cache))
+            self.assertEqual(out, '2')
+
+            # Without a session, the imported template is always executed
+            out = render_jinja_tmpl(
+                tmplstr, dict(opts=opts, saltenv='test', salt=local_salt))
+            self.assertEqual(out, '3')
+
+    def test_import_cache_renderer(self):
+        '''
+        A template imported without context by the SLS files of a session
+        rendered by the jinja renderer is only executed once
+        '''
+        with salt.utils.files.fopen(os.path.join(self.template_dir, 'counted_map'), 'w') as fp_:
+            fp_.write("{% set count = salt.test.count() %}")
+        sls_files = []
+        for name in ('one', 'two'):
+            sls_files.append(os.path.join(self.template_dir, name))
+            with salt.utils.files.fopen(sls_files[-1], 'w') as fp_:
+                fp_.write("{% from 'counted_map' import count %}{{ count }}")
+        count = MagicMock(side_effect=[1, 2, 3])
+        opts = dict(self.local_opts, jinja_bytecode_cache=False,
+                    jinja_import_cache=True)
+        fc = MockFileClient()
+        context = {'jinja_env_cache': {}}
+        with patch.object(SaltCacheLoader, 'file_client', MagicMock(return_value=fc)), \
+                patch.multiple(jinja_renderer, create=True,
+                               __salt__={'test.count': count},
+                               __grains__={}, __opts__=opts, __pillar__={},
+                               __proxy__={}, __context__=context,
+                               __salt_system_encoding__='utf-8'):
+            for sls_file in sls_files:
+                out = jinja_renderer.render(sls_file, saltenv='test')
+                self.assertEqual(out.read(), '1')
+            self.assertEqual(count.call_count, 1)
+
+            # Without a session, the imported template is always executed
+            context.clear()
+            self.assertEqual(jinja_renderer.render(sls_files[0], saltenv='test').read(), '2')
+
     @skipIf(HAS_TIMELIB is False, 'The `timelib` library is not installed.')
     def test_strftime(self):
         response = render_jinja_tmpl(
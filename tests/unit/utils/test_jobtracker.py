@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the job tracker of the master
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import Salt libs
+import salt.utils.jobtracker
+
+# Import Salt Testing libs
+from tests.support.mock import MagicMock
+from tests.support.unit import TestCase
+
+
+class JobTrackerTest(TestCase):
+    '''
+    Test tracking the minions running the jobs
+    '''
+    def setUp(self):
+        self.tracker = salt.utils.jobtracker.JobTracker({'job_tracker_timeout': 30,
+                                                         'gather_job_timeout': 10})
+        self.tracker.event = MagicMock()
+
+    def tearDown(self):
+        del self.tracker
+
+    def _fired(self):
+        return [(call[0][1], call[0][0]) for call in self.tracker.event.fire_event.call_args_list]
+
+    def test_returned(self):
+        self.tracker.handle_event('salt/job/1/new', {'jid': '1', 'minions': ['m1', 'm2']}, now=0)
+        self.tracker.handle_event('salt/job/2/new', {'jid': '2', 'minions': []}, now=0)
+        self.assertEqual(list(self.tracker.jobs), ['1'])
+        self.tracker.handle_event('salt/job/1/ret/m1', {'id': 'm1', 'return': True}, now=1)
+        # Returns of minions which were not targeted are ignored
+        self.tracker.handle_event('salt/job/1/ret/m3', {'id': 'm3', 'return': True}, now=1)
+        self.tracker.event.fire_event.assert_not_called()
+        self.tracker.handle_event('salt/job/1/ret/m2', {'id': 'm2', 'return': True}, now=2)
+        self.assertEqual(self._fired(),
+                         [('salt/job/1/complete',
+                           {'jid': '1', 'returned': 2, 'unresponsive': [], 'unknown': []})])
+        self.assertEqual(self.tracker.jobs, {})
+
+    def test_heartbeats(self):
+        self.tracker.handle_event('salt/job/1/new', {'jid': '1', 'minions': ['m1', 'm2', 'm3']}, now=0)
+        self.tracker.handle_event('salt/job/1/ret/m1', {'id': 'm1', 'return': True}, now=1)
+        self.tracker.check(now=4)
+        self.tracker.event.fire_event.assert_not_called()
+        # The minions are running the job until job_tracker_timeout
+        self.tracker.check(now=5)
+        self.assertEqual(self._fired(), [('salt/job/1/running', {'jid': '1', 'running': 2})])
+
+        self.tracker.handle_event('salt/job/heartbeat/m2', {'id': 'm2', 'data': {'jids': ['1', '9']}}, now=20)
+        self.tracker.check(now=40)
+        self.assertEqual(self._fired()[-1], ('salt/job/1/running', {'jid': '1', 'running': 1}))
+        # m2 stopped telling it was running the job, m3 never told it
+        self.tracker.check(now=60)
+        self.assertEqual(self._fired()[-1],
+                         ('salt/job/1/complete',
+                          {'jid': '1', 'returned': 1, 'unresponsive': ['m2'], 'unknown': ['m3']}))
+        self.assertEqual(self.tracker.jobs, {})
+
+    def test_other_events(self):
+        for tag in ('salt/auth', 'salt/job/1/ret', 'salt/job/1/prog/m1/0', 'salt/run/1/new', 'salt/job/1'):
+            self.tracker.handle_event(tag, {'minions': ['m1']}, now=0)
+        self.assertEqual(self.tracker.jobs, {})
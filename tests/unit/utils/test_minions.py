@@ -42,6 +42,40 @@ class MinionsTestCase(TestCase):
             ret = salt.utils.minions.nodegroup_comp(nodegroup, NODEGROUPS)
             self.assertEqual(ret, expected)
 
+    def test_target_snapshot(self):
+        '''
+        Test the targeting snapshot of the data of a minion
+        '''
+        data = {'grains': {'os': 'Linux', 'pkgs': {'vim': '8.0'},
+                           'ec2': {'tags': {'env': 'prod', 'app': 'web'}, 'region': 'eu'},
+                           'ifaces': [{'name': 'eth0'}]},
+                'pillar': {'role': 'web', 'secret': 'x'}}
+        self.assertIsNone(salt.utils.minions.target_snapshot({}, data))
+        opts = {'minion_data_cache_target_keys': {
+            'grains': ['os', 'ec2:tags:env', 'ifaces:0:name', 'missing:key']}}
+        self.assertEqual(salt.utils.minions.target_snapshot(opts, data), {
+            'keys': {'grains': ['ec2:tags:env', 'ifaces:0:name', 'missing:key', 'os'],
+                     'pillar': []},
+            'grains': {'os': 'Linux', 'ec2': {'tags': {'env': 'prod'}},
+                       'ifaces': [{'name': 'eth0'}]},
+            'pillar': {}})
+
+
+class FakeCache(object):
+    '''
+    A minion data cache counting the keys fetched
+    '''
+    def __init__(self, data):
+        self.data = data
+        self.fetched = []
+
+    def list(self, bank):
+        return sorted(set(bank_.split('/')[1] for bank_, _ in self.data))
+
+    def fetch_many(self, banks, key):
+        self.fetched.extend((bank, key) for bank in banks)
+        return dict((bank, self.data.get((bank, key), {})) for bank in banks)
+
 
 class CkMinionsTestCase(TestCase):
     '''
@@ -50,6 +84,52 @@ class CkMinionsTestCase(TestCase):
     def setUp(self):
         self.ckminions = salt.utils.minions.CkMinions({'minion_data_cache': True})
 
+    def test_check_cache_minions_snapshot(self):
+        opts = {'minion_data_cache': True,
+                'minion_data_cache_target_keys': {'grains': ['os', 'ipv4']}}
+        snapshot_data = {'grains': {'os': 'Linux', 'ipv4': ['10.0.0.1'], 'kernel': 'Linux'}}
+        data = {('minions/snap', 'data'): snapshot_data,
+                ('minions/snap', 'target'): salt.utils.minions.target_snapshot(opts, snapshot_data),
+                ('minions/old', 'data'): {'grains': {'os': 'Linux', 'ipv4': ['10.0.0.2']}}}
+        ckminions = salt.utils.minions.CkMinions(opts)
+        ckminions.cache = FakeCache(data)
+
+        # The snapshot is read when it holds the grain targeted
+        ret = ckminions._check_grain_minions('os:Lin*', ':', False)
+        self.assertEqual(sorted(ret['minions']), ['old', 'snap'])
+        self.assertEqual(ckminions.cache.fetched, [('minions/old', 'target'), ('minions/snap', 'target'),
+                                                   ('minions/old', 'data')])
+        del ckminions.cache.fetched[:]
+        ret = ckminions._check_ipcidr_minions('10.0.0.0/24', False)
+        self.assertEqual(sorted(ret['minions']), ['old', 'snap'])
+        self.assertNotIn(('minions/snap', 'data'), ckminions.cache.fetched)
+
+        # The whole data is read otherwise
+        del ckminions.cache.fetched[:]
+        ret = ckminions._check_grain_minions('kernel:Linux', ':', False)
+        self.assertEqual(ret['minions'], ['snap'])
+        self.assertEqual(ckminions.cache.fetched, [('minions/old', 'data'), ('minions/snap', 'data')])
+
+        # The snapshots taken with other keys are not used
+        del ckminions.cache.fetched[:]
+        ckminions.opts['minion_data_cache_target_keys'] = {'grains': ['os']}
+        ret = ckminions._check_grain_minions('os:Linux', ':', False)
+        self.assertEqual(sorted(ret['minions']), ['old', 'snap'])
+        self.assertIn(('minions/snap', 'data'), ckminions.cache.fetched)
+
+    def test_check_cache_minions_chunks(self):
+        data = dict((('minions/minion{0}'.format(idx), 'data'), {'grains': {'idx': idx}})
+                    for idx in range(5))
+        ckminions = salt.utils.minions.CkMinions({'minion_data_cache': True})
+        ckminions.cache = FakeCache(data)
+        fetch_many = MagicMock(side_effect=ckminions.cache.fetch_many)
+        with patch('salt.cache.FETCH_MANY_CHUNK_SIZE', 2), \
+                patch.object(ckminions.cache, 'fetch_many', fetch_many):
+            ret = ckminions._check_grain_minions('idx:3', ':', False)
+        self.assertEqual(ret['minions'], ['minion3'])
+        # The data of the minions is read two minions at a time
+        self.assertEqual([len(call[0][0]) for call in fetch_many.call_args_list], [2, 2, 1])
+
     def test_spec_check(self):
         # Test spec-only rule
         auth_list = ['@runner']
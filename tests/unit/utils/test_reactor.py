@@ -6,13 +6,17 @@ import glob
 import logging
 import os
 import textwrap
+import threading
+import time
 
 import salt.loader
 import salt.utils.data
+import salt.utils.event
 import salt.utils.files
 import salt.utils.reactor as reactor
 import salt.utils.yaml
 
+from tests.support.runtests import RUNTIME_VARS
 from tests.support.unit import TestCase, skipIf
 from tests.support.mixins import AdaptedConfigurationTestCaseMixin
 from tests.support.mock import (
@@ -417,6 +421,84 @@ class TestReactor(TestCase, AdaptedConfigurationTestCaseMixin):
                     self.reaction_map[tag]
                 )
 
+    def test_list_reactors_file(self):
+        '''
+        Ensure that the reactor config file is only read again once it
+        changed, and that the reactors added at runtime are matched.
+        '''
+        self.addCleanup(setattr, self.reactor, 'matcher', None)
+        path = os.path.join(RUNTIME_VARS.TMP, 'reactor.conf')
+        self.addCleanup(os.remove, path)
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write('- salt/minion/*/start: [/srv/reactor/start.sls]\n')
+        with patch.dict(self.reactor.opts, {'reactor': path}):
+            self.assertEqual(self.reactor.list_reactors('salt/minion/web1/start'),
+                             ['/srv/reactor/start.sls'])
+            with patch('salt.utils.files.fopen', MagicMock(side_effect=IOError)):
+                self.assertEqual(self.reactor.list_reactors('salt/minion/web2/start'),
+                                 ['/srv/reactor/start.sls'])
+            with salt.utils.files.fopen(path, 'w') as fp_:
+                fp_.write('- salt/minion/*/start: /srv/reactor/other.sls\n')
+            os.utime(path, (1, 1))
+            self.assertEqual(self.reactor.list_reactors('salt/minion/web1/start'),
+                             ['/srv/reactor/other.sls'])
+
+        reactors = list(self.opts['reactor'])
+        self.addCleanup(self.reactor.minion.opts.__setitem__, 'reactor', reactors)
+        self.reactor.minion.opts['reactor'] = list(reactors)
+        self.reactor.opts['reactor'] = self.reactor.minion.opts['reactor']
+        self.assertEqual(self.reactor.list_reactors('salt/added'), [])
+        self.reactor.add_reactor('salt/*', ['/srv/reactor/added.sls'])
+        self.assertEqual(self.reactor.list_reactors('salt/added'), ['/srv/reactor/added.sls'])
+        self.reactor.delete_reactor('salt/*')
+        self.assertEqual(self.reactor.list_reactors('salt/added'), [])
+
+    def test_render_reaction_files(self):
+        '''
+        Ensure that the files of a reactor SLS ref are only looked up again
+        once reactor_refresh_interval expired.
+        '''
+        self.reactor.reactor_files.clear()
+        self.addCleanup(self.reactor.reactor_files.clear)
+        glob_mock = MagicMock(side_effect=[[], ['/srv/reactor/a.sls'], ['/srv/reactor/b.sls']])
+        render_template = MagicMock(return_value={'reaction': {'local': []}})
+        with patch.object(glob, 'glob', glob_mock), \
+                patch.object(self.reactor, 'render_template', render_template):
+            # The missing files are looked up again
+            self.assertEqual(self.reactor.render_reaction('/srv/reactor/*.sls', 'tag', {}), {})
+            for _ in range(2):
+                self.assertEqual(
+                    self.reactor.render_reaction('/srv/reactor/*.sls', 'tag', {}),
+                    {'reaction': {'local': [], '__sls__': '/srv/reactor/a.sls'}})
+            self.assertEqual(glob_mock.call_count, 2)
+            with patch('time.time', MagicMock(return_value=time.time() + self.opts['reactor_refresh_interval'] + 1)):
+                self.reactor.render_reaction('/srv/reactor/*.sls', 'tag', {})
+        self.assertEqual(glob_mock.call_count, 3)
+        render_template.assert_called_with('/srv/reactor/b.sls', tag='tag', data={})
+
+    def test_render_threads_minion(self):
+        '''
+        Ensure that each render thread renders the reactions with its own
+        master minion.
+        '''
+        self.assertIs(self.reactor.get_minion(), self.reactor.minion)
+        self._reset_queue()
+        minions = []
+
+        def render():
+            minions.append(self.reactor.get_minion())
+            minions.append(self.reactor.get_minion())
+
+        with patch('salt.minion.MasterMinion', MagicMock(side_effect=lambda opts: MagicMock())):
+            for _ in range(2):
+                thread = threading.Thread(target=render)
+                thread.start()
+                thread.join()
+        self.assertIs(minions[0], minions[1])
+        self.assertIs(minions[2], minions[3])
+        self.assertIsNot(minions[0], minions[2])
+        self.assertNotIn(self.reactor.minion, minions)
+
     def test_reactions(self):
         '''
         Ensure that the correct reactions are built from the configured SLS
@@ -461,6 +543,83 @@ class TestReactor(TestCase, AdaptedConfigurationTestCaseMixin):
                                     )
                                     self.assertEqual(reactions, LOW_CHUNKS[tag])
 
+    def _reset_queue(self):
+        self.reactor.pool = MagicMock(**{'fire_async.return_value': True})
+        self.reactor.pending = {}
+        self.reactor.queue_stats = {'depth': 0, 'max_depth': 0, 'dropped': 0}
+        self.addCleanup(setattr, self.reactor, 'pool', None)
+
+    def test_queue_reactions_ordering(self):
+        '''
+        Ensure that the events with the same tag are run one after the other,
+        in the order they were received.
+        '''
+        self._reset_queue()
+        for tag, idx in (('old_runner', 0), ('old_runner', 1), ('old_wheel', 0), ('old_runner', 2)):
+            self.assertTrue(self.reactor.queue_reactions(tag, {'idx': idx}))
+        self.assertEqual(self.reactor.queue_stats, {'depth': 4, 'max_depth': 4, 'dropped': 0})
+        # A render thread is only used by the first event of each tag
+        self.assertEqual(self.reactor.pool.fire_async.call_count, 2)
+        first = self.reactor.pool.fire_async.call_args_list[0][1]['args'][0]
+
+        run_reactions = MagicMock()
+        with patch.object(self.reactor, 'run_reactions', run_reactions):
+            self.reactor._process_queued(first)
+        self.assertEqual([call[0][1]['idx'] for call in run_reactions.call_args_list], [0, 1, 2])
+        self.assertEqual(list(self.reactor.pending), ['old_wheel'])
+        self.assertEqual(self.reactor.queue_stats['depth'], 1)
+
+        # Without ordering, each event is run by a render thread
+        self._reset_queue()
+        with patch.dict(self.reactor.opts, {'reactor_tag_ordering': False}):
+            for idx in range(3):
+                self.reactor.queue_reactions('old_runner', {'idx': idx})
+        self.assertEqual(self.reactor.pool.fire_async.call_count, 3)
+        self.assertEqual(self.reactor.pending, {})
+
+    def test_queue_reactions_hwm(self):
+        '''
+        Ensure that the events are dropped once reactor_worker_hwm events are
+        waiting.
+        '''
+        self._reset_queue()
+        with patch.dict(self.reactor.opts, {'reactor_worker_hwm': 2}):
+            results = [self.reactor.queue_reactions('old_runner', {}) for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(self.reactor.queue_stats, {'depth': 2, 'max_depth': 2, 'dropped': 1})
+
+    def test_run_reactions_stats(self):
+        '''
+        Ensure that the time waited by the events and the time taken by their
+        reactions are recorded by reactor file.
+        '''
+        self.reactor.stats.clear()
+        with patch.dict(self.reactor.opts, {'master_stats': True}), \
+                patch.object(self.reactor, 'reactions', MagicMock(return_value=[])), \
+                patch.object(reactor, 'time', MagicMock(**{'time.side_effect': [10, 12, 20, 21]})):
+            self.reactor.run_reactions('old_runner', {}, 6)
+            self.reactor.run_reactions('old_runner', {}, 20)
+            self.reactor.run_reactions('missing', {}, 20)
+        self.assertEqual(dict(self.reactor.stats),
+                         {'/srv/reactor/old_runner.sls': {'runs': 2, 'latency': 2, 'mean': 1.5}})
+
+    def test_post_stats(self):
+        '''
+        Ensure that the queue depth is sent along with the stats.
+        '''
+        self._reset_queue()
+        self.reactor.queue_stats.update({'depth': 1, 'max_depth': 5, 'dropped': 2})
+        self.reactor.stats['/srv/reactor/old_runner.sls']['runs'] = 1
+        self.reactor.stat_clock -= self.opts['master_stats_event_iter'] + 1
+        with patch.object(self.reactor, 'event', MagicMock()):
+            self.reactor._post_stats(self.reactor.stats)
+            data, tag = self.reactor.event.fire_event.call_args[0]
+        self.assertEqual(tag, salt.utils.event.tagify(self.reactor.name, 'stats'))
+        self.assertEqual(data['queue'], {'depth': 1, 'max_depth': 5, 'dropped': 2})
+        self.assertEqual(data['stats']['/srv/reactor/old_runner.sls']['runs'], 1)
+        self.assertEqual(self.reactor.queue_stats, {'depth': 1, 'max_depth': 1, 'dropped': 0})
+        self.assertEqual(dict(self.reactor.stats), {})
+
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 class TestReactWrap(TestCase, AdaptedConfigurationTestCaseMixin):